@@ -1,17 +1,13 @@
 import streamlit as st
-from services.elevenlabs import *
-from services.gemini import *
 import os
 import logging
-import requests
-from bs4 import BeautifulSoup
-import trafilatura
-import tiktoken
-import json
-from typing import Dict, List, Optional, Tuple, Union
-import re
 import time
-from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+from services.pipeline import generate_podcast
+from services.workspace import save_upload
+
+STAGE_ICONS = {"source": "📊", "dialogue": "🎙️", "audio": "🔊", "save": "✅"}
 
 # Configure logging
 logging.basicConfig(
@@ -25,269 +21,6 @@ logging.basicConfig(
 
 logger = logging.getLogger("podgem")
 
-# Token counter for rate limiting
-def count_tokens(text: str, model: str = "gpt-3.5-turbo") -> int:
-    """Count the number of tokens in a text string."""
-    try:
-        encoding = tiktoken.encoding_for_model(model)
-        return len(encoding.encode(text))
-    except Exception as e:
-        logger.warning(f"Could not count tokens: {e}. Using character-based estimate.")
-        # Fallback to character-based estimate (roughly 4 chars per token)
-        return len(text) // 4
-
-# Advanced web content extraction
-def extract_website_content(url: str, max_tokens: int = 6000) -> Dict[str, str]:
-    """Extract content from a website with advanced methods."""
-    try:
-        logger.info(f"Fetching content from {url}")
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
-        
-        result = {
-            "title": "",
-            "description": "",
-            "main_content": "",
-            "meta": {}
-        }
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        meta_desc = soup.find('meta', attrs={'name': 'description'}) or soup.find('meta', attrs={'property': 'og:description'})
-        if meta_desc and meta_desc.get('content'):
-            result["description"] = meta_desc.get('content')
-            
-        main_content = trafilatura.extract(
-            response.text,
-            url=url,
-            include_comments=False,
-            include_tables=True,
-            include_images=False,
-            include_links=False,
-            output_format="text"
-        )
-        
-        if not main_content:
-            paragraphs = soup.find_all('p')
-            main_content = '\n\n'.join(p.get_text(strip=True) for p in paragraphs if len(p.get_text(strip=True)) > 50)
-        
-        result["main_content"] = main_content
-        title_tag = soup.find('title')
-        result["title"] = title_tag.get_text(strip=True) if title_tag else ""
-        
-        content_text = f"Title: {result['title']}\n\nDescription: {result['description']}\n\n{result['main_content']}"
-        token_count = count_tokens(content_text)
-        
-        logger.info(f"Extracted {token_count} tokens from {url}")
-        
-        if token_count > max_tokens:
-            logger.info(f"Content exceeds {max_tokens} tokens, truncating...")
-            header = f"Title: {result['title']}\n\nDescription: {result['description']}\n\n"
-            header_tokens = count_tokens(header)
-            remaining_tokens = max_tokens - header_tokens
-            chars_to_keep = remaining_tokens * 4
-            truncated_content = result["main_content"][:chars_to_keep]
-            truncated_content += "\n\n[Content truncated due to length limits]"
-            result["main_content"] = truncated_content
-        
-        return result
-        
-    except Exception as e:
-        logger.error(f"Failed to extract content from {url}: {e}", exc_info=True)
-        return {"title": "", "description": "", "main_content": "", "meta": {}}
-
-def summarize_content(content: str, target_length: str = "medium") -> str:
-    """Use Gemini to summarize long content to a specified target length."""
-    token_count = count_tokens(content)
-    
-    if token_count < 1000:
-        logger.info(f"Content already short ({token_count} tokens), skipping summarization")
-        return content
-        
-    length_settings = {
-        "short": "a concise 2-3 paragraph summary",
-        "medium": "a detailed 4-6 paragraph summary with key points",
-        "long": "a comprehensive summary that preserves most important details and examples"
-    }
-    
-    target = length_settings.get(target_length, length_settings["medium"])
-    
-    prompt = f"""
-    Summarize the following content into {target}. Preserve the most important information, 
-    key concepts, and any specific data or statistics that would be valuable in a podcast discussion.
-    Focus on creating a coherent narrative that could be used as source material for a podcast.
-    
-    CONTENT TO SUMMARIZE:
-    {content}
-    """
-    
-    system_message = "You are an expert content summarizer who maintains the key information while reducing length."
-    chat_history = []
-    
-    logger.info(f"Summarizing {token_count} tokens of content to '{target_length}' length")
-    summary = call_gemini(prompt, system_message, chat_history)
-    
-    new_token_count = count_tokens(summary)
-    logger.info(f"Summarization complete: {token_count} → {new_token_count} tokens")
-    
-    return summary
-
-def extract_topics(content: str, num_topics: int = 5) -> List[str]:
-    """Extract main topics from content."""
-    prompt = f"""
-    Identify the {num_topics} most important topics or themes in the following content.
-    For each topic, provide a short phrase (3-5 words) that accurately describes it.
-    Format your response as a simple list of topics, one per line.
-    
-    CONTENT:
-    {content}
-    """
-    
-    system_message = "You are an expert at identifying key topics and themes in content."
-    chat_history = []
-    
-    response = call_gemini(prompt, system_message, chat_history)
-    
-    topics = []
-    for line in response.strip().split('\n'):
-        clean_line = re.sub(r'^\d+\.\s*|^-\s*|^•\s*', '', line).strip()
-        if clean_line:
-            topics.append(clean_line)
-            
-    return topics[:num_topics]
-
-def get_company_info(company_name: str) -> str:
-    """Get comprehensive information about a company using Gemini."""
-    prompt = f"""
-    Research and provide comprehensive information about the company '{company_name}'.
-    
-    Include the following information:
-    1. Basic overview and history
-    2. Main products or services offered
-    3. Target market and customer base
-    4. Recent news or developments (within the last 1-2 years)
-    5. Competitive position in the industry
-    6. Any interesting facts or notable aspects of the company culture
-    
-    Structure this information in a way that would be informative and engaging
-    for a podcast audience who may not be familiar with the company.
-    
-    If you can find the company's official website, include that as well.
-    """
-    
-    system_message = "You are an expert business researcher with extensive knowledge of companies across industries. Provide accurate, well-structured information suitable for a podcast script."
-    chat_history = []
-    
-    logger.info(f"Researching company: {company_name}")
-    company_info = call_gemini(prompt, system_message, chat_history)
-    
-    return company_info
-
-def generate_podcast(prompt: str, system_message: str, content_source: str = "", source_type: str = "pdf") -> dict:
-    """Generate a podcast from various content sources."""
-    logger.info(f"Generating podcast from {source_type} source")
-    
-    try:
-        chat_history = []
-        
-        # Handle different content source types
-        if source_type == "pdf":
-            if not os.path.isfile(content_source):
-                raise FileNotFoundError(f"The file at path '{content_source}' does not exist.")
-                
-            files = upload_to_gemini(content_source, "application/pdf")
-            chat_history = [{'role': 'user', 'parts': [{'file_data': {'mime_type': files.mime_type, 'file_uri': files.uri}}]}]
-            
-        elif source_type == "url":
-            logger.info(f"Extracting content from URL: {content_source}")
-            website_data = extract_website_content(content_source)
-            
-            if not website_data["main_content"].strip():
-                raise ValueError("Could not extract meaningful content from the provided URL.")
-                
-            content_text = f"Title: {website_data['title']}\n\nDescription: {website_data['description']}\n\n{website_data['main_content']}"
-            token_count = count_tokens(content_text)
-            
-            if token_count > 6000:
-                logger.info(f"Website content is very long ({token_count} tokens), summarizing...")
-                content_text = summarize_content(content_text, target_length="long")
-                
-            topics = extract_topics(content_text)
-            topic_str = ", ".join(topics)
-            
-            context_message = f"WEBSITE: {website_data['title']}\n\nCONTENT SUMMARY:\n{content_text}\n\nMAIN TOPICS: {topic_str}"
-            chat_history = [{'role': 'user', 'parts': [{'text': context_message}]}]
-            
-        elif source_type == "company":
-            logger.info(f"Researching company: {content_source}")
-            company_info = get_company_info(content_source)
-            chat_history = [{'role': 'user', 'parts': [{'text': f"COMPANY INFORMATION:\n{company_info}"}]}]
-            
-        elif source_type == "text":
-            token_count = count_tokens(content_source)
-            text_content = content_source
-            
-            if token_count > 8000:
-                logger.info(f"Raw text is very long ({token_count} tokens), summarizing...")
-                text_content = summarize_content(content_source, target_length="long")
-                
-            chat_history = [{'role': 'user', 'parts': [{'text': text_content}]}]
-            
-        else:
-            raise ValueError(f"Unsupported content source type: {source_type}")
-        
-        # Generate dialogue using Gemini
-        logger.info("Generating podcast dialogue with Gemini...")
-        dialogue = call_gemini(
-            prompt=prompt,
-            system_message=system_message,
-            history=chat_history
-        )
-        
-        # Parse dialogue into speaker parts
-        dialogue_items = []
-        for line in dialogue.split('\n'):
-            line = line.strip()
-            if not line:
-                continue
-                
-            speaker_match = re.match(r'^(male-1|female-1|male|female|host|guest)\s*[:-]\s*(.+)$', line, re.IGNORECASE)
-            
-            if speaker_match:
-                raw_speaker = speaker_match.group(1).lower()
-                if raw_speaker in ["male", "host"]:
-                    speaker = "male-1"
-                elif raw_speaker in ["female", "guest"]:
-                    speaker = "female-1"
-                else:
-                    speaker = raw_speaker
-                    
-                text = speaker_match.group(2).strip()
-                dialogue_items.append(DialogueItem(text=text, speaker=speaker))
-            else:
-                # Alternate speakers if no explicit speaker
-                if dialogue_items and line:
-                    last_speaker = dialogue_items[-1].speaker
-                    next_speaker = "female-1" if last_speaker == "male-1" else "male-1"
-                    dialogue_items.append(DialogueItem(text=line, speaker=next_speaker))
-        
-        if not dialogue_items:
-            raise ValueError("No valid dialogue items were parsed from the generated content")
-        
-        logger.info(f"Parsed {len(dialogue_items)} dialogue items")
-        
-        # Generate audio
-        logger.info("Generating audio with ElevenLabs...")
-        audio_result = generate_audio(dialogue_items, output_filename="podcast.mp3")
-        
-        return audio_result
-        
-    except Exception as e:
-        logger.error(f"Error generating podcast: {e}", exc_info=True)
-        raise
-
 # Streamlit UI
 def main():
     st.set_page_config(
@@ -299,6 +32,7 @@ def main():
     st.title("🎙️ Convert Anything to Podcast with Gemini & ElevenLabs")
     
     # Check for API keys
+    load_dotenv()
     ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
     
@@ -327,7 +61,13 @@ def main():
             max_value=10000,
             value=6000,
             step=500,
-            help="Maximum tokens to process from content"
+            help="Maximum Gemini tokens to process from content"
+        )
+        
+        regenerate = st.checkbox(
+            "Regenerate",
+            value=False,
+            help="Ignore the saved episode for the same source and settings"
         )
         
         show_debug = st.checkbox("Show Debug Information", value=False)
@@ -349,9 +89,11 @@ def main():
         if input_type == "Upload PDF":
             uploaded_file = st.file_uploader("Upload a PDF file", type=["pdf"])
             if uploaded_file is not None:
-                pdf_path = "uploaded_pdf.pdf"
-                with open(pdf_path, "wb") as f:
-                    f.write(uploaded_file.getbuffer())
+                # Uploads are stored once per content; reruns with the same file skip the write
+                saved_uploads = st.session_state.setdefault("saved_uploads", {})
+                if uploaded_file.file_id not in saved_uploads:
+                    saved_uploads[uploaded_file.file_id] = save_upload(uploaded_file.name, uploaded_file.getbuffer())
+                pdf_path = saved_uploads[uploaded_file.file_id]
                 st.success("PDF uploaded successfully!")
                 content_source = pdf_path
                 source_type = "pdf"
@@ -365,8 +107,9 @@ def main():
             
         elif input_type == "Company Website URL":
             website_url = st.text_input("Enter company website URL (e.g., https://www.example.com)")
+            crawl_site = st.checkbox("Crawl the whole site (about, products, news pages...)", value=False)
             content_source = website_url
-            source_type = "url"
+            source_type = "site" if crawl_site else "url"
             
         elif input_type == "Raw Text":
             raw_text = st.text_area("Paste or write your text here", height=200)
@@ -398,58 +141,42 @@ def main():
             # Validate input
             if not content_source:
                 st.error(f"⚠️ Please provide {input_type.lower()} first.")
-            elif source_type == "url" and not content_source.startswith("http"):
+            elif source_type in ("url", "site") and not content_source.startswith("http"):
                 st.error("⚠️ Please enter a valid URL starting with http:// or https://")
             else:
                 # Set up progress tracking
                 progress_bar = st.progress(0)
                 status_text = st.empty()
                 
+                def show_progress(snapshot):
+                    progress_bar.progress(snapshot["fraction"])
+                    message = f"{STAGE_ICONS.get(snapshot['stage'], '⏳')} {snapshot['message']}..."
+                    if snapshot["eta_seconds"] is not None and snapshot["status"] != "finished":
+                        message += f" about {int(snapshot['eta_seconds'])}s left"
+                    status_text.text(message)
+                
                 try:
-                    # Step 1: Initial preparation
-                    status_text.text("📊 Analyzing input...")
-                    progress_bar.progress(10)
-                    
-                    # Step 2: Process input based on type
-                    if source_type == "url":
-                        status_text.text("🌐 Extracting website content...")
-                        progress_bar.progress(20)
-                    elif source_type == "company":
-                        status_text.text(f"🔍 Researching {content_source}...")
-                        progress_bar.progress(20)
-                    elif source_type == "pdf":
-                        status_text.text("📄 Processing PDF content...")
-                        progress_bar.progress(20)
-                    elif source_type == "text":
-                        status_text.text("📝 Processing text input...")
-                        progress_bar.progress(20)
-                    
-                    # Step 3: Generate podcast
-                    status_text.text("🎙️ Creating podcast dialogue...")
-                    progress_bar.progress(40)
-                    
-                    # Call the generate_podcast function
+                    # Progress is driven by the pipeline's own stage events
                     podcast_result = generate_podcast(
                         prompt=prompt, 
                         system_message=system_message, 
                         content_source=content_source,
-                        source_type=source_type
+                        source_type=source_type,
+                        max_tokens=max_tokens,
+                        progress=show_progress,
+                        regenerate=regenerate
                     )
-                    
-                    # Step 4: Generate audio
-                    status_text.text("🔊 Audio generation completed!")
-                    progress_bar.progress(90)
-                    
-                    # Step 5: Final processing
-                    status_text.text("✅ Finalizing podcast...")
-                    progress_bar.progress(100)
+                    progress_bar.progress(1.0)
                     
                     # Get the results
                     audio_path = podcast_result.get("audio_path")
                     transcript_path = podcast_result.get("transcript_path")
                     
                     # Display success message
-                    status_text.text("✅ Podcast generated successfully!")
+                    if podcast_result.get("cached"):
+                        status_text.text("♻️ Reused the saved episode for this source and settings (tick Regenerate for a new one)")
+                    else:
+                        status_text.text("✅ Podcast generated successfully!")
                     
                     # Display the results
                     st.success("🎉 Your podcast is ready!")
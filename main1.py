@@ -1,17 +1,12 @@
 import streamlit as st
-from services.elevenlabs import *
-from services.gemini import *
 import os
 import logging
-import requests
-from bs4 import BeautifulSoup
-import trafilatura
-import tiktoken
-import json
-from typing import Dict, List, Optional, Tuple, Union
-import re
-import time
-from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+from services.documents import is_local_document
+from services.jobs import FINISHED_STATUSES, WorkerPool, get_job_store
+from services.prefetch import SessionPrefetcher
+from services.workspace import save_upload
 
 # Configure logging
 logging.basicConfig(
@@ -25,866 +20,30 @@ logging.basicConfig(
 
 logger = logging.getLogger("podgem")
 
+# Seconds between job status checks while a podcast is generating
+JOB_POLL_INTERVAL = 2.0
+
+# Stylesheet and fixed page markup
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+
+@st.cache_resource
+def load_asset(name):
+    """Read a file from assets/ once per server process."""
+    with open(os.path.join(ASSETS_DIR, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+# These elements are byte-identical on every rerun, so Streamlit's message cache sends
+# the browser a hash reference instead of the markup after the first run (elements of
+# at least global.minCachedMessageSize, see .streamlit/config.toml)
+
 # Revolutionary CSS for Stunning UI
 def load_revolutionary_css():
-    st.markdown("""
-    <style>
-    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700;800;900&family=Poppins:wght@300;400;500;600;700;800;900&family=Space+Grotesk:wght@300;400;500;600;700&display=swap');
-    
-    :root {
-        --primary-gradient: linear-gradient(135deg, #667eea 0%, #764ba2 25%, #f093fb 50%, #f5576c 75%, #4facfe 100%);
-        --secondary-gradient: linear-gradient(135deg, #ff6b6b 0%, #feca57 25%, #48dbfb 50%, #ff9ff3 75%, #54a0ff 100%);
-        --dark-gradient: linear-gradient(135deg, #0c0c0c 0%, #1a1a2e 25%, #16213e 50%, #0f3460 75%, #533483 100%);
-        --glass-bg: rgba(255, 255, 255, 0.08);
-        --glass-border: rgba(255, 255, 255, 0.18);
-        --text-primary: #ffffff;
-        --text-secondary: #e2e8f0;
-        --text-muted: #94a3b8;
-        --accent-blue: #3b82f6;
-        --accent-purple: #8b5cf6;
-        --accent-pink: #ec4899;
-        --accent-green: #10b981;
-        --accent-orange: #f59e0b;
-        --shadow-light: 0 8px 32px rgba(31, 38, 135, 0.37);
-        --shadow-heavy: 0 20px 60px rgba(0, 0, 0, 0.5);
-    }
-    
-    * {
-        margin: 0;
-        padding: 0;
-        box-sizing: border-box;
-    }
-    
-    /* Revolutionary Background */
-    .stApp {
-        background: var(--dark-gradient);
-        min-height: 100vh;
-        font-family: 'Inter', sans-serif;
-        overflow-x: hidden;
-    }
-    
-    /* Animated Background Particles */
-    .stApp::before {
-        content: '';
-        position: fixed;
-        top: 0;
-        left: 0;
-        width: 100%;
-        height: 100%;
-        background: 
-            radial-gradient(circle at 20% 50%, rgba(120, 119, 198, 0.3) 0%, transparent 50%),
-            radial-gradient(circle at 80% 20%, rgba(255, 119, 198, 0.3) 0%, transparent 50%),
-            radial-gradient(circle at 40% 80%, rgba(120, 219, 255, 0.3) 0%, transparent 50%);
-        animation: backgroundPulse 15s ease-in-out infinite;
-        z-index: -1;
-    }
-    
-    @keyframes backgroundPulse {
-        0%, 100% { opacity: 0.5; }
-        50% { opacity: 0.8; }
-    }
-    
-    /* Hero Section */
-    .hero-container {
-        background: linear-gradient(135deg, 
-            rgba(102, 126, 234, 0.1) 0%, 
-            rgba(118, 75, 162, 0.1) 25%, 
-            rgba(255, 107, 107, 0.1) 50%, 
-            rgba(84, 160, 255, 0.1) 75%, 
-            rgba(139, 92, 246, 0.1) 100%);
-        backdrop-filter: blur(20px);
-        border-radius: 30px;
-        padding: 4rem 2rem;
-        margin: 2rem auto;
-        max-width: 1200px;
-        border: 2px solid var(--glass-border);
-        position: relative;
-        overflow: hidden;
-        box-shadow: var(--shadow-heavy);
-    }
-    
-    .hero-container::before {
-        content: '';
-        position: absolute;
-        top: -50%;
-        left: -50%;
-        width: 200%;
-        height: 200%;
-        background: conic-gradient(from 0deg, transparent, rgba(255, 255, 255, 0.1), transparent);
-        animation: rotate 20s linear infinite;
-        z-index: -1;
-    }
-    
-    @keyframes rotate {
-        0% { transform: rotate(0deg); }
-        100% { transform: rotate(360deg); }
-    }
-    
-    .hero-title {
-        font-family: 'Space Grotesk', sans-serif;
-        font-size: 4rem;
-        font-weight: 800;
-        background: var(--primary-gradient);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        background-clip: text;
-        text-align: center;
-        margin-bottom: 1rem;
-        text-shadow: 0 0 30px rgba(255, 255, 255, 0.5);
-        animation: titleGlow 3s ease-in-out infinite alternate;
-    }
-    
-    @keyframes titleGlow {
-        0% { filter: brightness(1); }
-        100% { filter: brightness(1.2); }
-    }
-    
-    .hero-subtitle {
-        font-size: 1.5rem;
-        color: var(--text-secondary);
-        text-align: center;
-        margin-bottom: 2rem;
-        font-weight: 500;
-        opacity: 0.9;
-    }
-    
-    .hero-stats {
-        display: flex;
-        justify-content: center;
-        gap: 3rem;
-        margin-top: 2rem;
-    }
-    
-    .stat-item {
-        text-align: center;
-        padding: 1rem;
-        background: rgba(255, 255, 255, 0.05);
-        border-radius: 15px;
-        backdrop-filter: blur(10px);
-        border: 1px solid rgba(255, 255, 255, 0.1);
-        transition: all 0.3s ease;
-    }
-    
-    .stat-item:hover {
-        transform: translateY(-5px);
-        box-shadow: 0 10px 30px rgba(0, 0, 0, 0.3);
-    }
-    
-    .stat-number {
-        font-size: 2rem;
-        font-weight: 700;
-        color: var(--accent-blue);
-        margin-bottom: 0.5rem;
-    }
-    
-    .stat-label {
-        font-size: 0.9rem;
-        color: var(--text-muted);
-        text-transform: uppercase;
-        letter-spacing: 1px;
-    }
-    
-    /* Navigation Pills */
-    .nav-pills {
-        display: flex;
-        justify-content: center;
-        gap: 1rem;
-        margin: 2rem 0;
-        flex-wrap: wrap;
-    }
-    
-    .nav-pill {
-        padding: 1rem 2rem;
-        background: rgba(255, 255, 255, 0.05);
-        border: 2px solid transparent;
-        border-radius: 50px;
-        color: var(--text-secondary);
-        font-weight: 600;
-        cursor: pointer;
-        transition: all 0.3s ease;
-        backdrop-filter: blur(10px);
-        position: relative;
-        overflow: hidden;
-    }
-    
-    .nav-pill::before {
-        content: '';
-        position: absolute;
-        top: 0;
-        left: -100%;
-        width: 100%;
-        height: 100%;
-        background: linear-gradient(90deg, transparent, rgba(255, 255, 255, 0.1), transparent);
-        transition: left 0.5s ease;
-    }
-    
-    .nav-pill:hover::before {
-        left: 100%;
-    }
-    
-    .nav-pill:hover {
-        border-color: var(--accent-blue);
-        transform: translateY(-2px);
-        box-shadow: 0 10px 25px rgba(59, 130, 246, 0.3);
-    }
-    
-    .nav-pill.active {
-        background: var(--accent-blue);
-        color: white;
-        border-color: var(--accent-blue);
-        box-shadow: 0 8px 25px rgba(59, 130, 246, 0.4);
-    }
-    
-    /* Feature Cards */
-    .features-grid {
-        display: grid;
-        grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
-        gap: 2rem;
-        margin: 3rem 0;
-    }
-    
-    .feature-card {
-        background: rgba(255, 255, 255, 0.05);
-        border: 1px solid rgba(255, 255, 255, 0.1);
-        border-radius: 25px;
-        padding: 2rem;
-        text-align: center;
-        backdrop-filter: blur(15px);
-        transition: all 0.4s ease;
-        position: relative;
-        overflow: hidden;
-    }
-    
-    .feature-card::before {
-        content: '';
-        position: absolute;
-        top: 0;
-        left: 0;
-        right: 0;
-        height: 1px;
-        background: var(--secondary-gradient);
-        transform: scaleX(0);
-        transition: transform 0.3s ease;
-    }
-    
-    .feature-card:hover::before {
-        transform: scaleX(1);
-    }
-    
-    .feature-card:hover {
-        transform: translateY(-10px);
-        box-shadow: 0 20px 50px rgba(0, 0, 0, 0.3);
-        border-color: rgba(255, 255, 255, 0.2);
-    }
-    
-    .feature-icon {
-        font-size: 3rem;
-        margin-bottom: 1rem;
-        background: var(--primary-gradient);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        background-clip: text;
-        filter: drop-shadow(0 0 10px rgba(255, 255, 255, 0.3));
-    }
-    
-    .feature-title {
-        font-size: 1.3rem;
-        font-weight: 700;
-        color: var(--text-primary);
-        margin-bottom: 1rem;
-        font-family: 'Space Grotesk', sans-serif;
-    }
-    
-    .feature-description {
-        color: var(--text-muted);
-        line-height: 1.6;
-        font-size: 0.95rem;
-    }
-    
-    /* Content Cards */
-    .content-card {
-        background: rgba(255, 255, 255, 0.08);
-        border: 1px solid rgba(255, 255, 255, 0.12);
-        border-radius: 20px;
-        padding: 2rem;
-        margin: 1.5rem 0;
-        backdrop-filter: blur(20px);
-        transition: all 0.3s ease;
-        position: relative;
-    }
-    
-    .content-card:hover {
-        transform: translateY(-5px);
-        box-shadow: 0 15px 40px rgba(0, 0, 0, 0.2);
-        border-color: rgba(255, 255, 255, 0.2);
-    }
-    
-    .content-card-header {
-        display: flex;
-        align-items: center;
-        gap: 1rem;
-        margin-bottom: 1.5rem;
-    }
-    
-    .content-card-icon {
-        font-size: 2rem;
-        background: var(--secondary-gradient);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        background-clip: text;
-    }
-    
-    .content-card-title {
-        font-size: 1.4rem;
-        font-weight: 600;
-        color: var(--text-primary);
-        font-family: 'Space Grotesk', sans-serif;
-    }
-    
-    /* Input Fields */
-    .stTextInput > div > div > input,
-    .stTextArea > div > div > textarea {
-        background: rgba(255, 255, 255, 0.08) !important;
-        border: 2px solid rgba(255, 255, 255, 0.1) !important;
-        border-radius: 15px !important;
-        color: var(--text-primary) !important;
-        font-family: 'Inter', sans-serif !important;
-        font-weight: 500 !important;
-        padding: 1rem !important;
-        backdrop-filter: blur(10px);
-        transition: all 0.3s ease !important;
-    }
-    
-    .stTextInput > div > div > input:focus,
-    .stTextArea > div > div > textarea:focus {
-        border-color: var(--accent-blue) !important;
-        box-shadow: 0 0 0 3px rgba(59, 130, 246, 0.2) !important;
-        background: rgba(255, 255, 255, 0.12) !important;
-    }
-    
-    .stTextInput > div > div > input::placeholder,
-    .stTextArea > div > div > textarea::placeholder {
-        color: var(--text-muted) !important;
-    }
-    
-    /* Buttons */
-    .stButton > button {
-        background: var(--primary-gradient) !important;
-        color: white !important;
-        border: none !important;
-        border-radius: 50px !important;
-        padding: 1rem 2rem !important;
-        font-weight: 600 !important;
-        font-size: 1rem !important;
-        transition: all 0.3s ease !important;
-        box-shadow: 0 8px 25px rgba(102, 126, 234, 0.3) !important;
-        backdrop-filter: blur(10px) !important;
-        position: relative !important;
-        overflow: hidden !important;
-    }
-    
-    .stButton > button::before {
-        content: '';
-        position: absolute;
-        top: 0;
-        left: -100%;
-        width: 100%;
-        height: 100%;
-        background: linear-gradient(90deg, transparent, rgba(255, 255, 255, 0.2), transparent);
-        transition: left 0.5s ease;
-    }
-    
-    .stButton > button:hover::before {
-        left: 100%;
-    }
-    
-    .stButton > button:hover {
-        transform: translateY(-3px) !important;
-        box-shadow: 0 15px 35px rgba(102, 126, 234, 0.4) !important;
-    }
-    
-    /* Generate Button */
-    .generate-button {
-        background: var(--secondary-gradient) !important;
-        color: white !important;
-        border: none !important;
-        border-radius: 20px !important;
-        padding: 1.5rem 3rem !important;
-        font-weight: 700 !important;
-        font-size: 1.2rem !important;
-        width: 100% !important;
-        margin: 2rem 0 !important;
-        transition: all 0.4s ease !important;
-        box-shadow: 0 10px 30px rgba(255, 107, 107, 0.4) !important;
-        position: relative !important;
-        overflow: hidden !important;
-    }
-    
-    .generate-button::before {
-        content: '';
-        position: absolute;
-        top: 0;
-        left: 0;
-        width: 100%;
-        height: 100%;
-        background: linear-gradient(45deg, transparent 30%, rgba(255, 255, 255, 0.1) 50%, transparent 70%);
-        transform: translateX(-100%);
-        transition: transform 0.8s ease;
-    }
-    
-    .generate-button:hover::before {
-        transform: translateX(100%);
-    }
-    
-    .generate-button:hover {
-        transform: translateY(-5px) !important;
-        box-shadow: 0 20px 50px rgba(255, 107, 107, 0.5) !important;
-    }
-    
-    /* Radio Buttons */
-    .stRadio > div {
-        background: rgba(255, 255, 255, 0.05) !important;
-        border: 1px solid rgba(255, 255, 255, 0.1) !important;
-        border-radius: 15px !important;
-        padding: 1.5rem !important;
-        backdrop-filter: blur(10px) !important;
-    }
-    
-    .stRadio label {
-        color: var(--text-primary) !important;
-        font-weight: 600 !important;
-        font-size: 1.1rem !important;
-    }
-    
-    /* File Uploader */
-    .stFileUploader > div {
-        background: rgba(255, 255, 255, 0.05) !important;
-        border: 2px dashed rgba(59, 130, 246, 0.5) !important;
-        border-radius: 20px !important;
-        padding: 3rem !important;
-        text-align: center !important;
-        transition: all 0.3s ease !important;
-        backdrop-filter: blur(10px) !important;
-    }
-    
-    .stFileUploader > div:hover {
-        border-color: var(--accent-blue) !important;
-        background: rgba(255, 255, 255, 0.08) !important;
-        transform: translateY(-5px) !important;
-    }
-    
-    .stFileUploader label {
-        color: var(--text-primary) !important;
-        font-weight: 600 !important;
-        font-size: 1.1rem !important;
-    }
-    
-    /* Selectbox */
-    .stSelectbox > div > div > div {
-        background: rgba(255, 255, 255, 0.08) !important;
-        border: 2px solid rgba(255, 255, 255, 0.1) !important;
-        border-radius: 15px !important;
-        color: var(--text-primary) !important;
-        backdrop-filter: blur(10px) !important;
-    }
-    
-    .stSelectbox label {
-        color: var(--text-primary) !important;
-        font-weight: 600 !important;
-        font-size: 1.1rem !important;
-    }
-    
-    /* Metrics */
-    .stMetric {
-        background: rgba(255, 255, 255, 0.05) !important;
-        border: 1px solid rgba(255, 255, 255, 0.1) !important;
-        border-radius: 15px !important;
-        padding: 1.5rem !important;
-        backdrop-filter: blur(10px) !important;
-        transition: all 0.3s ease !important;
-    }
-    
-    .stMetric:hover {
-        transform: translateY(-3px) !important;
-        box-shadow: 0 10px 25px rgba(0, 0, 0, 0.2) !important;
-    }
-    
-    .stMetric label {
-        color: var(--text-muted) !important;
-        font-weight: 600 !important;
-        font-size: 0.9rem !important;
-        text-transform: uppercase !important;
-        letter-spacing: 1px !important;
-    }
-    
-    .stMetric div {
-        color: var(--text-primary) !important;
-        font-weight: 700 !important;
-        font-size: 1.8rem !important;
-    }
-    
-    /* Progress Bar */
-    .stProgress > div > div {
-        background: rgba(255, 255, 255, 0.1) !important;
-        border-radius: 10px !important;
-        overflow: hidden !important;
-    }
-    
-    .stProgress > div > div > div {
-        background: var(--primary-gradient) !important;
-        border-radius: 10px !important;
-        position: relative !important;
-        overflow: hidden !important;
-    }
-    
-    .stProgress > div > div > div::before {
-        content: '';
-        position: absolute;
-        top: 0;
-        left: 0;
-        width: 100%;
-        height: 100%;
-        background: linear-gradient(45deg, transparent 30%, rgba(255, 255, 255, 0.3) 50%, transparent 70%);
-        animation: progressShine 2s infinite;
-    }
-    
-    @keyframes progressShine {
-        0% { transform: translateX(-100%); }
-        100% { transform: translateX(100%); }
-    }
-    
-    /* Success/Error Messages */
-    .success-message {
-        background: linear-gradient(135deg, var(--accent-green), #059669) !important;
-        color: white !important;
-        padding: 1.5rem !important;
-        border-radius: 15px !important;
-        text-align: center !important;
-        font-weight: 600 !important;
-        margin: 1rem 0 !important;
-        box-shadow: 0 8px 25px rgba(16, 185, 129, 0.3) !important;
-        backdrop-filter: blur(10px) !important;
-        border: 1px solid rgba(255, 255, 255, 0.1) !important;
-    }
-    
-    .error-message {
-        background: linear-gradient(135deg, #ef4444, #dc2626) !important;
-        color: white !important;
-        padding: 1.5rem !important;
-        border-radius: 15px !important;
-        text-align: center !important;
-        font-weight: 600 !important;
-        margin: 1rem 0 !important;
-        box-shadow: 0 8px 25px rgba(239, 68, 68, 0.3) !important;
-        backdrop-filter: blur(10px) !important;
-        border: 1px solid rgba(255, 255, 255, 0.1) !important;
-    }
-    
-    .info-message {
-        background: linear-gradient(135deg, var(--accent-blue), #2563eb) !important;
-        color: white !important;
-        padding: 1.5rem !important;
-        border-radius: 15px !important;
-        text-align: center !important;
-        font-weight: 600 !important;
-        margin: 1rem 0 !important;
-        box-shadow: 0 8px 25px rgba(59, 130, 246, 0.3) !important;
-        backdrop-filter: blur(10px) !important;
-        border: 1px solid rgba(255, 255, 255, 0.1) !important;
-    }
-    
-    /* Audio Player */
-    .audio-player-container {
-        background: rgba(255, 255, 255, 0.08) !important;
-        border: 1px solid rgba(255, 255, 255, 0.12) !important;
-        border-radius: 25px !important;
-        padding: 2rem !important;
-        margin: 2rem 0 !important;
-        backdrop-filter: blur(20px) !important;
-        position: relative !important;
-        overflow: hidden !important;
-    }
-    
-    .audio-player-container::before {
-        content: '';
-        position: absolute;
-        top: 0;
-        left: 0;
-        right: 0;
-        height: 2px;
-        background: var(--secondary-gradient);
-    }
-    
-    .audio-title {
-        font-size: 1.5rem !important;
-        font-weight: 700 !important;
-        color: var(--text-primary) !important;
-        text-align: center !important;
-        margin-bottom: 1.5rem !important;
-        font-family: 'Space Grotesk', sans-serif !important;
-    }
-    
-    /* Waveform Animation */
-    .waveform-container {
-        background: rgba(255, 255, 255, 0.05) !important;
-        border: 1px solid rgba(255, 255, 255, 0.1) !important;
-        border-radius: 20px !important;
-        padding: 2rem !important;
-        margin: 2rem 0 !important;
-        text-align: center !important;
-        backdrop-filter: blur(15px) !important;
-    }
-    
-    .waveform {
-        display: flex !important;
-        justify-content: center !important;
-        align-items: center !important;
-        gap: 3px !important;
-        margin: 1.5rem 0 !important;
-    }
-    
-    .waveform-bar {
-        width: 4px !important;
-        background: var(--primary-gradient) !important;
-        border-radius: 2px !important;
-        animation: waveform 1.5s ease-in-out infinite !important;
-    }
-    
-    @keyframes waveform {
-        0%, 100% { height: 10px; }
-        50% { height: 35px; }
-    }
-    
-    /* Sidebar */
-    .css-1d391kg {
-        background: rgba(0, 0, 0, 0.3) !important;
-        backdrop-filter: blur(20px) !important;
-        border-right: 1px solid rgba(255, 255, 255, 0.1) !important;
-    }
-    
-    .sidebar-logo {
-        background: var(--primary-gradient) !important;
-        color: white !important;
-        padding: 2rem !important;
-        border-radius: 20px !important;
-        text-align: center !important;
-        margin-bottom: 2rem !important;
-        position: relative !important;
-        overflow: hidden !important;
-    }
-    
-    .sidebar-logo::before {
-        content: '';
-        position: absolute;
-        top: 0;
-        left: 0;
-        width: 100%;
-        height: 100%;
-        background: linear-gradient(45deg, transparent 30%, rgba(255, 255, 255, 0.1) 50%, transparent 70%);
-        animation: logoShine 3s infinite;
-    }
-    
-    @keyframes logoShine {
-        0% { transform: translateX(-100%); }
-        100% { transform: translateX(100%); }
-    }
-    
-    .sidebar-logo h2 {
-        font-family: 'Space Grotesk', sans-serif !important;
-        font-weight: 800 !important;
-        font-size: 1.5rem !important;
-        margin-bottom: 0.5rem !important;
-    }
-    
-    .sidebar-section {
-        background: rgba(255, 255, 255, 0.05) !important;
-        border: 1px solid rgba(255, 255, 255, 0.1) !important;
-        border-radius: 15px !important;
-        padding: 1.5rem !important;
-        margin: 1rem 0 !important;
-        backdrop-filter: blur(10px) !important;
-    }
-    
-    /* Labels and Text */
-    .stMarkdown h1, .stMarkdown h2, .stMarkdown h3, .stMarkdown h4, .stMarkdown h5, .stMarkdown h6 {
-        color: var(--text-primary) !important;
-        font-family: 'Space Grotesk', sans-serif !important;
-        font-weight: 700 !important;
-    }
-    
-    .stMarkdown p, .stMarkdown span, .stMarkdown div {
-        color: var(--text-secondary) !important;
-    }
-    
-    label {
-        color: var(--text-primary) !important;
-        font-weight: 600 !important;
-        font-size: 1rem !important;
-    }
-    
-    /* Section Headers */
-    .section-header {
-        font-family: 'Space Grotesk', sans-serif !important;
-        font-weight: 700 !important;
-        font-size: 2rem !important;
-        background: var(--primary-gradient) !important;
-        -webkit-background-clip: text !important;
-        -webkit-text-fill-color: transparent !important;
-        background-clip: text !important;
-        text-align: center !important;
-        margin: 3rem 0 2rem 0 !important;
-        position: relative !important;
-    }
-    
-    .section-header::after {
-        content: '';
-        position: absolute;
-        bottom: -10px;
-        left: 50%;
-        transform: translateX(-50%);
-        width: 100px;
-        height: 3px;
-        background: var(--secondary-gradient);
-        border-radius: 2px;
-    }
-    
-    /* Floating Action Button */
-    .floating-generate-btn {
-        position: fixed;
-        bottom: 2rem;
-        right: 2rem;
-        background: var(--secondary-gradient) !important;
-        color: white !important;
-        border: none !important;
-        border-radius: 50% !important;
-        width: 70px !important;
-        height: 70px !important;
-        font-size: 1.5rem !important;
-        box-shadow: 0 10px 30px rgba(255, 107, 107, 0.4) !important;
-        backdrop-filter: blur(10px) !important;
-        z-index: 1000 !important;
-        transition: all 0.3s ease !important;
-    }
-    
-    .floating-generate-btn:hover {
-        transform: scale(1.1) !important;
-        box-shadow: 0 15px 40px rgba(255, 107, 107, 0.6) !important;
-    }
-    
-    /* Responsive Design */
-    @media (max-width: 768px) {
-        .hero-title {
-            font-size: 2.5rem !important;
-        }
-        
-        .hero-subtitle {
-            font-size: 1.2rem !important;
-        }
-        
-        .hero-stats {
-            flex-direction: column !important;
-            gap: 1rem !important;
-        }
-        
-        .nav-pills {
-            flex-direction: column !important;
-            align-items: center !important;
-        }
-        
-        .features-grid {
-            grid-template-columns: 1fr !important;
-        }
-    }
-    
-    /* Hide Streamlit Elements */
-    #MainMenu {visibility: hidden;}
-    footer {visibility: hidden;}
-    header {visibility: hidden;}
-    .stDeployButton {display: none;}
-    
-    /* Custom Scrollbar */
-    ::-webkit-scrollbar {
-        width: 8px;
-    }
-    
-    ::-webkit-scrollbar-track {
-        background: rgba(255, 255, 255, 0.1);
-        border-radius: 10px;
-    }
-    
-    ::-webkit-scrollbar-thumb {
-        background: var(--primary-gradient);
-        border-radius: 10px;
-    }
-    
-    ::-webkit-scrollbar-thumb:hover {
-        background: var(--secondary-gradient);
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    st.markdown(f"<style>\n{load_asset('podgem.css')}</style>", unsafe_allow_html=True)
 
 # Stunning Custom Components
-def create_hero_section():
-    st.markdown("""
-    <div class="hero-container">
-        <div class="hero-title">🎙️ PodcastAI</div>
-        <div class="hero-subtitle">Revolutionary AI-Powered Podcast Generation Platform</div>
-        <div class="hero-stats">
-            <div class="stat-item">
-                <div class="stat-number">10K+</div>
-                <div class="stat-label">Podcasts Created</div>
-            </div>
-            <div class="stat-item">
-                <div class="stat-number">500+</div>
-                <div class="stat-label">Happy Users</div>
-            </div>
-            <div class="stat-item">
-                <div class="stat-number">99.9%</div>
-                <div class="stat-label">Uptime</div>
-            </div>
-            <div class="stat-item">
-                <div class="stat-number">< 2min</div>
-                <div class="stat-label">Avg Generation</div>
-            </div>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
-
-def create_feature_showcase():
-    st.markdown("""
-    <div class="features-grid">
-        <div class="feature-card">
-            <div class="feature-icon">🧠</div>
-            <div class="feature-title">Advanced AI Engine</div>
-            <div class="feature-description">Powered by cutting-edge Gemini AI with sophisticated natural language processing and contextual understanding</div>
-        </div>
-        <div class="feature-card">
-            <div class="feature-icon">🎵</div>
-            <div class="feature-title">Premium Voice Synthesis</div>
-            <div class="feature-description">ElevenLabs integration delivers studio-quality, emotionally rich voices with perfect pronunciation and intonation</div>
-        </div>
-        <div class="feature-card">
-            <div class="feature-icon">⚡</div>
-            <div class="feature-title">Lightning Speed</div>
-            <div class="feature-description">Generate professional podcasts in under 2 minutes with our optimized processing pipeline and smart caching</div>
-        </div>
-        <div class="feature-card">
-            <div class="feature-icon">🌐</div>
-            <div class="feature-title">Multi-Source Input</div>
-            <div class="feature-description">Transform PDFs, websites, company data, or raw text into engaging conversational content seamlessly</div>
-        </div>
-        <div class="feature-card">
-            <div class="feature-icon">🎯</div>
-            <div class="feature-title">Smart Content Analysis</div>
-            <div class="feature-description">Intelligent topic extraction, automatic summarization, and context-aware dialogue generation</div>
-        </div>
-        <div class="feature-card">
-            <div class="feature-icon">🚀</div>
-            <div class="feature-title">Enterprise Ready</div>
-            <div class="feature-description">Scalable architecture, API integration, custom voice training, and white-label solutions available</div>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
+def create_intro_section():
+    """Hero, feature header and feature grid as a single cached element."""
+    st.markdown(load_asset("intro.html"), unsafe_allow_html=True)
 
 def create_content_input_card(icon, title, description, input_widget):
     st.markdown(f"""
@@ -952,266 +111,201 @@ def create_audio_player(audio_path):
     
     st.audio(audio_path, format="audio/mp3")
 
-# Keep all your existing helper functions
-def count_tokens(text: str, model: str = "gpt-3.5-turbo") -> int:
-    """Count the number of tokens in a text string."""
-    try:
-        encoding = tiktoken.encoding_for_model(model)
-        return len(encoding.encode(text))
-    except Exception as e:
-        logger.warning(f"Could not count tokens: {e}. Using character-based estimate.")
-        return len(text) // 4
+@st.cache_resource
+def get_worker_pool():
+    """Start the background job workers once per server (PODGEM_WORKERS; 0 when workers run separately)."""
+    pool = WorkerPool(int(os.getenv("PODGEM_WORKERS", "2")))
+    if pool.num_workers > 0:
+        pool.start()
+    return pool
 
-def extract_website_content(url: str, max_tokens: int = 6000) -> Dict[str, str]:
-    """Extract content from a website with advanced methods."""
-    try:
-        logger.info(f"Fetching content from {url}")
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
-        
-        result = {
-            "title": "",
-            "description": "",
-            "main_content": "",
-            "meta": {}
-        }
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        meta_desc = soup.find('meta', attrs={'name': 'description'}) or soup.find('meta', attrs={'property': 'og:description'})
-        if meta_desc and meta_desc.get('content'):
-            result["description"] = meta_desc.get('content')
-            
-        main_content = trafilatura.extract(
-            response.text,
-            url=url,
-            include_comments=False,
-            include_tables=True,
-            include_images=False,
-            include_links=False,
-            output_format="text"
-        )
-        
-        if not main_content:
-            paragraphs = soup.find_all('p')
-            main_content = '\n\n'.join(p.get_text(strip=True) for p in paragraphs if len(p.get_text(strip=True)) > 50)
-        
-        result["main_content"] = main_content
-        title_tag = soup.find('title')
-        result["title"] = title_tag.get_text(strip=True) if title_tag else ""
-        
-        content_text = f"Title: {result['title']}\n\nDescription: {result['description']}\n\n{result['main_content']}"
-        token_count = count_tokens(content_text)
-        
-        logger.info(f"Extracted {token_count} tokens from {url}")
-        
-        if token_count > max_tokens:
-            logger.info(f"Content exceeds {max_tokens} tokens, truncating...")
-            header = f"Title: {result['title']}\n\nDescription: {result['description']}\n\n"
-            header_tokens = count_tokens(header)
-            remaining_tokens = max_tokens - header_tokens
-            chars_to_keep = remaining_tokens * 4
-            truncated_content = result["main_content"][:chars_to_keep]
-            truncated_content += "\n\n[Content truncated due to length limits]"
-            result["main_content"] = truncated_content
-        
-        return result
-        
-    except Exception as e:
-        logger.error(f"Failed to extract content from {url}: {e}", exc_info=True)
-        return {"title": "", "description": "", "main_content": "", "meta": {}}
+def show_podcast_result(podcast_result):
+    # Success
+    create_success_message("🎉 Your VIRAL podcast has been generated! Get ready to amaze your audience!")
 
-def summarize_content(content: str, target_length: str = "medium") -> str:
-    """Use Gemini to summarize long content to a specified target length."""
-    token_count = count_tokens(content)
-    
-    if token_count < 1000:
-        logger.info(f"Content already short ({token_count} tokens), skipping summarization")
-        return content
-        
-    length_settings = {
-        "short": "a concise 2-3 paragraph summary",
-        "medium": "a detailed 4-6 paragraph summary with key points",
-        "long": "a comprehensive summary that preserves most important details and examples"
-    }
-    
-    target = length_settings.get(target_length, length_settings["medium"])
-    
-    prompt = f"""
-    Summarize the following content into {target}. Preserve the most important information, 
-    key concepts, and any specific data or statistics that would be valuable in a podcast discussion.
-    Focus on creating a coherent narrative that could be used as source material for a podcast.
-    
-    CONTENT TO SUMMARIZE:
-    {content}
-    """
-    
-    system_message = "You are an expert content summarizer who maintains the key information while reducing length."
-    chat_history = []
-    
-    logger.info(f"Summarizing {token_count} tokens of content to '{target_length}' length")
-    summary = call_gemini(prompt, system_message, chat_history)
-    
-    new_token_count = count_tokens(summary)
-    logger.info(f"Summarization complete: {token_count} → {new_token_count} tokens")
-    
-    return summary
+    # Results Section
+    st.markdown('<div class="section-header">🎵 Your Viral Podcast</div>', unsafe_allow_html=True)
 
-def extract_topics(content: str, num_topics: int = 5) -> List[str]:
-    """Extract main topics from content."""
-    prompt = f"""
-    Identify the {num_topics} most important topics or themes in the following content.
-    For each topic, provide a short phrase (3-5 words) that accurately describes it.
-    Format your response as a simple list of topics, one per line.
-    
-    CONTENT:
-    {content}
-    """
-    
-    system_message = "You are an expert at identifying key topics and themes in content."
-    chat_history = []
-    
-    response = call_gemini(prompt, system_message, chat_history)
-    
-    topics = []
-    for line in response.strip().split('\n'):
-        clean_line = re.sub(r'^\d+\.\s*|^-\s*|^•\s*', '', line).strip()
-        if clean_line:
-            topics.append(clean_line)
-            
-    return topics[:num_topics]
+    # Analytics Dashboard
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("🎙️ Segments", podcast_result.get("total_items", 0), help="Total dialogue segments")
+    with col2:
+        st.metric("✅ Generated", podcast_result.get("processed_items", 0), help="Successfully processed")
+    with col3:
+        st.metric("📁 Size", podcast_result.get("file_size", "0 MB"), help="Audio file size")
+    with col4:
+        duration = podcast_result.get("audio_duration_estimate", "0min")
+        st.metric("⏱️ Duration", duration, help="Estimated listening time")
 
-def get_company_info(company_name: str) -> str:
-    """Get comprehensive information about a company using Gemini."""
-    prompt = f"""
-    Research and provide comprehensive information about the company '{company_name}'.
-    
-    Include the following information:
-    1. Basic overview and history
-    2. Main products or services offered
-    3. Target market and customer base
-    4. Recent news or developments (within the last 1-2 years)
-    5. Competitive position in the industry
-    6. Any interesting facts or notable aspects of the company culture
-    
-    Structure this information in a way that would be informative and engaging
-    for a podcast audience who may not be familiar with the company.
-    
-    If you can find the company's official website, include that as well.
-    """
-    
-    system_message = "You are an expert business researcher with extensive knowledge of companies across industries. Provide accurate, well-structured information suitable for a podcast script."
-    chat_history = []
-    
-    logger.info(f"Researching company: {company_name}")
-    company_info = call_gemini(prompt, system_message, chat_history)
-    
-    return company_info
+    # Audio Player
+    audio_path = podcast_result.get("audio_path")
+    if audio_path and os.path.exists(audio_path):
+        create_audio_player(audio_path)
+
+        # Download Section
+        st.markdown("#### 📥 Download Your Podcast")
 
-def generate_podcast(prompt: str, system_message: str, content_source: str = "", source_type: str = "pdf") -> dict:
-    """Generate a podcast from various content sources."""
-    logger.info(f"Generating podcast from {source_type} source")
+        col1, col2, col3 = st.columns(3)
+
+        with col1:
+            with open(audio_path, "rb") as audio_file:
+                st.download_button(
+                    label="🎵 Download Audio",
+                    data=audio_file.read(),
+                    file_name="viral_podcast.mp3",
+                    mime="audio/mp3",
+                    use_container_width=True
+                )
+
+        with col2:
+            transcript_path = podcast_result.get("transcript_path")
+            if transcript_path and os.path.exists(transcript_path):
+                with open(transcript_path, "r", encoding="utf-8") as f:
+                    transcript = f.read()
+                st.download_button(
+                    label="📝 Download Transcript",
+                    data=transcript,
+                    file_name="viral_podcast_transcript.txt",
+                    mime="text/plain",
+                    use_container_width=True
+                )
+
+        with col3:
+            # Social sharing placeholder
+            st.button("📱 Share on Social", use_container_width=True, help="Share your viral podcast")
+
+    else:
+        create_error_message("Audio generation failed. Please try again.")
+
+    # Transcript Viewer
+    transcript_path = podcast_result.get("transcript_path")
+    if transcript_path and os.path.exists(transcript_path):
+        with st.expander("📝 View Full Transcript", expanded=False):
+            with open(transcript_path, "r", encoding="utf-8") as f:
+                transcript = f.read()
+
+            st.text_area(
+                "Complete Transcript",
+                transcript,
+                height=400,
+                help="Full transcript of your viral podcast"
+            )
+
+    # Social Media Preview
+    st.markdown("#### 📱 Social Media Ready")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("""
+        **🔥 Viral Potential Score: 95/100**
+        - ✅ Hook Factor: Excellent
+        - ✅ Shareability: High
+        - ✅ Engagement: Premium
+        - ✅ Production: Professional
+        """)
+
+    with col2:
+        st.markdown("""
+        **📊 Predicted Performance**
+        - 🎯 Completion Rate: 85%+
+        - 📈 Share Rate: 40%+
+        - 💬 Engagement: 90%+
+        - ⭐ Quality Score: 4.8/5
+        """)
+
+    # Call to Action
+    st.markdown("""
+    <div style="text-align: center; padding: 2rem; background: rgba(255, 255, 255, 0.05); border-radius: 20px; margin: 2rem 0; border: 1px solid rgba(255, 255, 255, 0.1);">
+        <h3 style="color: var(--text-primary); margin-bottom: 1rem;">🚀 Ready to Go Viral?</h3>
+        <p style="color: var(--text-secondary); font-size: 1.1rem; margin-bottom: 1.5rem;">
+            Your podcast is optimized for maximum engagement and shareability. 
+            Upload to your favorite platform and watch the magic happen!
+        </p>
+    </div>
+    """, unsafe_allow_html=True)
+
+def show_generation_error(error):
+    # Enhanced Error Handling
+    if "rate limit" in str(error).lower():
+        create_error_message("🚦 API rate limit reached. Please wait a moment and try again.")
+    elif "api key" in str(error).lower():
+        create_error_message("🔑 API key issue detected. Please check your configuration.")
+    elif "quota" in str(error).lower():
+        create_error_message("📊 API quota exceeded. Please check your usage limits.")
+    elif "network" in str(error).lower() or "connection" in str(error).lower():
+        create_error_message("🌐 Network connectivity issue. Please check your internet connection.")
+    else:
+        create_error_message(f"⚠️ Generation failed: {str(error)[:100]}...")
+
+@st.fragment(run_every=JOB_POLL_INTERVAL)
+def show_job_progress(job_id):
+    """Progress of a queued or running job; only this fragment reruns while it polls."""
+    job = get_job_store().get(job_id)
+    if job is None or job["status"] in FINISHED_STATUSES:
+        # Rerun the whole page to show the result
+        st.rerun()
+    
+    params = job["params"]
+    st.markdown("#### 🔄 AI Processing Pipeline")
+    
+    progress = job.get("progress")
+    if job["status"] == "queued":
+        st.progress(0)
+        st.markdown("⏳ **Waiting for a free worker...**")
+    elif progress:
+        st.progress(progress["fraction"])
+        caption = f"Elapsed {int(progress['elapsed_seconds'])}s"
+        if progress["eta_seconds"] is not None:
+            caption += f" · about {int(progress['eta_seconds'])}s remaining"
+        st.markdown(f"⚙️ **{progress['message']}...**")
+        st.caption(caption)
+        create_waveform_animation()
+    else:
+        st.progress(0)
+        if params["source_type"] in ("url", "site"):
+            st.markdown("🌐 **Extracting and analyzing website content...**")
+        elif params["source_type"] == "company":
+            st.markdown(f"🔍 **Researching {params['content_source']} with AI...**")
+        elif params["source_type"] in ("pdf", "document"):
+            st.markdown("📄 **Processing document with advanced AI...**")
+        elif params["source_type"] == "text":
+            st.markdown("📝 **Analyzing text content with AI intelligence...**")
+        create_waveform_animation()
+
+def show_job_status(job_id):
+    """Show a background job's progress, result or error."""
+    job = get_job_store().get(job_id)
+    if job is None:
+        create_error_message("This podcast job could not be found. Please generate it again.")
+        st.session_state.job_id = None
+        st.query_params.pop("job", None)
+        return
+    
+    if job["status"] not in FINISHED_STATUSES:
+        show_job_progress(job_id)
+    
+    elif job["status"] == "succeeded":
+        st.session_state.generated_podcast = job["result"]
+        show_podcast_result(job["result"])
+        
+        if job["result"].get("cached"):
+            st.info("♻️ This episode was reused from an earlier generation with the same source and settings.")
+            # Regenerate Button
+            if st.button("🔁 Regenerate From Scratch", use_container_width=True):
+                st.session_state.job_id = get_job_store().submit(dict(job["params"], regenerate=True))
+                st.query_params["job"] = st.session_state.job_id
+                st.rerun()
     
-    try:
-        chat_history = []
-        
-        # Handle different content source types
-        if source_type == "pdf":
-            if not os.path.isfile(content_source):
-                raise FileNotFoundError(f"The file at path '{content_source}' does not exist.")
-                
-            files = upload_to_gemini(content_source, "application/pdf")
-            chat_history = [{'role': 'user', 'parts': [{'file_data': {'mime_type': files.mime_type, 'file_uri': files.uri}}]}]
-            
-        elif source_type == "url":
-            logger.info(f"Extracting content from URL: {content_source}")
-            website_data = extract_website_content(content_source)
-            
-            if not website_data["main_content"].strip():
-                raise ValueError("Could not extract meaningful content from the provided URL.")
-                
-            content_text = f"Title: {website_data['title']}\n\nDescription: {website_data['description']}\n\n{website_data['main_content']}"
-            token_count = count_tokens(content_text)
-            
-            if token_count > 6000:
-                logger.info(f"Website content is very long ({token_count} tokens), summarizing...")
-                content_text = summarize_content(content_text, target_length="long")
-                
-            topics = extract_topics(content_text)
-            topic_str = ", ".join(topics)
-            
-            context_message = f"WEBSITE: {website_data['title']}\n\nCONTENT SUMMARY:\n{content_text}\n\nMAIN TOPICS: {topic_str}"
-            chat_history = [{'role': 'user', 'parts': [{'text': context_message}]}]
-            
-        elif source_type == "company":
-            logger.info(f"Researching company: {content_source}")
-            company_info = get_company_info(content_source)
-            chat_history = [{'role': 'user', 'parts': [{'text': f"COMPANY INFORMATION:\n{company_info}"}]}]
-            
-        elif source_type == "text":
-            token_count = count_tokens(content_source)
-            text_content = content_source
-            
-            if token_count > 8000:
-                logger.info(f"Raw text is very long ({token_count} tokens), summarizing...")
-                text_content = summarize_content(content_source, target_length="long")
-                
-            chat_history = [{'role': 'user', 'parts': [{'text': text_content}]}]
-            
-        else:
-            raise ValueError(f"Unsupported content source type: {source_type}")
-        
-        # Generate dialogue using Gemini
-        logger.info("Generating podcast dialogue with Gemini...")
-        dialogue = call_gemini(
-            prompt=prompt,
-            system_message=system_message,
-            history=chat_history
-        )
-        
-        # Parse dialogue into speaker parts
-        dialogue_items = []
-        for line in dialogue.split('\n'):
-            line = line.strip()
-            if not line:
-                continue
-                
-            speaker_match = re.match(r'^(male-1|female-1|male|female|host|guest)\s*[:-]\s*(.+)', line, re.IGNORECASE)
-            
-            if speaker_match:
-                raw_speaker = speaker_match.group(1).lower()
-                if raw_speaker in ["male", "host"]:
-                    speaker = "male-1"
-                elif raw_speaker in ["female", "guest"]:
-                    speaker = "female-1"
-                else:
-                    speaker = raw_speaker
-                    
-                text = speaker_match.group(2).strip()
-                dialogue_items.append(DialogueItem(text=text, speaker=speaker))
-            else:
-                # Alternate speakers if no explicit speaker
-                if dialogue_items and line:
-                    last_speaker = dialogue_items[-1].speaker
-                    next_speaker = "female-1" if last_speaker == "male-1" else "male-1"
-                    dialogue_items.append(DialogueItem(text=line, speaker=next_speaker))
-        
-        if not dialogue_items:
-            raise ValueError("No valid dialogue items were parsed from the generated content")
-        
-        logger.info(f"Parsed {len(dialogue_items)} dialogue items")
-        
-        # Generate audio
-        logger.info("Generating audio with ElevenLabs...")
-        audio_result = generate_audio(dialogue_items, output_filename="podcast.mp3")
-        
-        return audio_result
+    else:
+        show_generation_error(job["error"] or "Unknown error")
         
-    except Exception as e:
-        logger.error(f"Error generating podcast: {e}", exc_info=True)
-        raise
+        # Retry Button
+        if st.button("🔄 Retry Generation", use_container_width=True):
+            # Joins an identical job another session already queued instead of running it twice
+            st.session_state.job_id, _ = get_job_store().submit_or_join(job["params"])
+            st.query_params["job"] = st.session_state.job_id
+            st.rerun()
 
 # Revolutionary Main App
 def main():
@@ -1226,6 +320,7 @@ def main():
     load_revolutionary_css()
     
     # Check API Keys
+    load_dotenv()
     ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
     
@@ -1233,6 +328,8 @@ def main():
         create_error_message("🔑 API Keys Required - Please set your ELEVENLABS_API_KEY and GEMINI_API_KEY environment variables to unlock the full potential of PodcastAI!")
         st.stop()
     
+    get_worker_pool()
+    
     # Initialize session state
     if 'content_source' not in st.session_state:
         st.session_state.content_source = ""
@@ -1242,6 +339,8 @@ def main():
         st.session_state.content_ready = False
     if 'generated_podcast' not in st.session_state:
         st.session_state.generated_podcast = None
+    if 'job_id' not in st.session_state:
+        st.session_state.job_id = st.query_params.get("job")
     
     # Revolutionary Sidebar
     with st.sidebar:
@@ -1269,7 +368,13 @@ def main():
                 max_value=12000,
                 value=8000,
                 step=1000,
-                help="Maximum content size to process"
+                help="Maximum content size to process, in Gemini tokens"
+            )
+            
+            regenerate = st.checkbox(
+                "🔁 Always Regenerate",
+                value=False,
+                help="Skip the saved episode for the same source and settings and generate a new one"
             )
             
             podcast_style = st.selectbox(
@@ -1311,12 +416,8 @@ def main():
             st.metric("👥 Listeners", "2.1K", "↗️ 67%")
             st.metric("⭐ Rating", "4.9", "↗️ 2%")
     
-    # Hero Section
-    create_hero_section()
-    
-    # Feature Showcase
-    st.markdown('<div class="section-header">🚀 Revolutionary Features</div>', unsafe_allow_html=True)
-    create_feature_showcase()
+    # Hero Section and Feature Showcase
+    create_intro_section()
     
     # Content Input Section
     st.markdown('<div class="section-header">📝 Content Input</div>', unsafe_allow_html=True)
@@ -1352,14 +453,21 @@ def main():
         )
         
         if uploaded_file is not None:
-            file_path = f"uploaded_{uploaded_file.name}"
-            with open(file_path, "wb") as f:
-                f.write(uploaded_file.getbuffer())
+            # Stored once per content hash; every later rerun with this upload reuses the
+            # saved path and size instead of touching the buffer or the disk again
+            saved_uploads = st.session_state.setdefault("saved_uploads", {})
+            if uploaded_file.file_id not in saved_uploads:
+                buffer = uploaded_file.getbuffer()
+                saved_uploads[uploaded_file.file_id] = {
+                    "path": save_upload(uploaded_file.name, buffer),
+                    "size": buffer.nbytes,
+                }
+            file_path = saved_uploads[uploaded_file.file_id]["path"]
             
             create_success_message(f"Document '{uploaded_file.name}' uploaded successfully! Ready for AI processing.")
             
             # File Analytics
-            file_size = len(uploaded_file.getbuffer()) / (1024 * 1024)
+            file_size = saved_uploads[uploaded_file.file_id]["size"] / (1024 * 1024)
             col1, col2, col3 = st.columns(3)
             with col1:
                 st.metric("📁 File Size", f"{file_size:.1f} MB")
@@ -1369,7 +477,8 @@ def main():
                 st.metric("⚡ Processing", "Ready")
             
             st.session_state.content_source = file_path
-            st.session_state.source_type = "pdf"
+            # TXT and DOCX are read locally; only PDFs go through the Gemini file upload
+            st.session_state.source_type = "document" if is_local_document(file_path) else "pdf"
             st.session_state.content_ready = True
         else:
             create_info_message("Upload a document to begin the AI-powered podcast generation process")
@@ -1417,6 +526,11 @@ def main():
                 help="Enter the full URL including https://"
             )
         )
+        crawl_site = st.checkbox(
+            "🕸️ Crawl the whole site",
+            value=False,
+            help="Also pull in the about, products and news pages of the same site"
+        )
         
         if website_url:
             if website_url.startswith("http"):
@@ -1432,7 +546,7 @@ def main():
                     st.metric("🔄 Extraction", "Intelligent")
                 
                 st.session_state.content_source = website_url
-                st.session_state.source_type = "url"
+                st.session_state.source_type = "site" if crawl_site else "url"
                 st.session_state.content_ready = True
             else:
                 create_error_message("Please enter a valid URL starting with http:// or https://")
@@ -1632,6 +746,15 @@ Transform this content into the most engaging podcast episode of the year!""",
     st.markdown('<div class="section-header">🚀 Generate Your Viral Podcast</div>', unsafe_allow_html=True)
     
     if st.session_state.content_ready:
+        # Start reading the source while the user is still tuning prompts; the job
+        # picks up the prepared history when Generate is clicked. The prefetcher waits
+        # for the source and budget to settle, so edits don't each start Gemini work
+        prefetcher = st.session_state.setdefault("prefetcher", SessionPrefetcher())
+        prefetch_request = (st.session_state.content_source, st.session_state.source_type, max_tokens)
+        if st.session_state.get("prefetch_request") != prefetch_request:
+            prefetcher.request(*prefetch_request)
+            st.session_state.prefetch_request = prefetch_request
+        
         # Content Preview
         st.markdown("#### 📊 Content Preview")
         
@@ -1650,187 +773,22 @@ Transform this content into the most engaging podcast episode of the year!""",
         
         # Main Generate Button
         if st.button("🎙️ Generate Viral Podcast", key="main_generate", help="Create your viral podcast masterpiece"):
-            # Progress Section
-            st.markdown("#### 🔄 AI Processing Pipeline")
-            
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            
-            try:
-                # Step 1: Content Analysis
-                status_text.markdown("🧠 **AI Content Analysis in Progress...**")
-                progress_bar.progress(15)
-                time.sleep(1.5)
-                
-                # Step 2: Content Processing
-                if st.session_state.source_type == "url":
-                    status_text.markdown("🌐 **Extracting and analyzing website content...**")
-                elif st.session_state.source_type == "company":
-                    status_text.markdown(f"🔍 **Researching {st.session_state.content_source} with AI...**")
-                elif st.session_state.source_type == "pdf":
-                    status_text.markdown("📄 **Processing document with advanced AI...**")
-                elif st.session_state.source_type == "text":
-                    status_text.markdown("📝 **Analyzing text content with AI intelligence...**")
-                
-                progress_bar.progress(30)
-                time.sleep(1.5)
-                
-                # Step 3: AI Dialogue Creation
-                status_text.markdown("🎭 **Creating viral podcast dialogue with AI...**")
-                progress_bar.progress(50)
-                
-                # Generate the podcast
-                podcast_result = generate_podcast(
-                    prompt=prompt,
-                    system_message=system_message,
-                    content_source=st.session_state.content_source,
-                    source_type=st.session_state.source_type
-                )
-                
-                progress_bar.progress(70)
-                
-                # Step 4: Premium Audio Generation
-                status_text.markdown("🎵 **Generating premium audio with ElevenLabs...**")
-                create_waveform_animation()
-                
-                progress_bar.progress(85)
-                time.sleep(1.5)
-                
-                # Step 5: Final Processing
-                status_text.markdown("✨ **Finalizing your viral podcast...**")
-                progress_bar.progress(100)
-                time.sleep(1)
-                
-                # Clear progress
-                status_text.empty()
-                
-                # Success
-                create_success_message("🎉 Your VIRAL podcast has been generated! Get ready to amaze your audience!")
-                
-                # Store in session state
-                st.session_state.generated_podcast = podcast_result
-                
-                # Results Section
-                st.markdown('<div class="section-header">🎵 Your Viral Podcast</div>', unsafe_allow_html=True)
-                
-                # Analytics Dashboard
-                col1, col2, col3, col4 = st.columns(4)
-                with col1:
-                    st.metric("🎙️ Segments", podcast_result.get("total_items", 0), help="Total dialogue segments")
-                with col2:
-                    st.metric("✅ Generated", podcast_result.get("processed_items", 0), help="Successfully processed")
-                with col3:
-                    st.metric("📁 Size", podcast_result.get("file_size", "0 MB"), help="Audio file size")
-                with col4:
-                    duration = podcast_result.get("audio_duration_estimate", "0min")
-                    st.metric("⏱️ Duration", duration, help="Estimated listening time")
-                
-                # Audio Player
-                audio_path = podcast_result.get("audio_path")
-                if audio_path and os.path.exists(audio_path):
-                    create_audio_player(audio_path)
-                    
-                    # Download Section
-                    st.markdown("#### 📥 Download Your Podcast")
-                    
-                    col1, col2, col3 = st.columns(3)
-                    
-                    with col1:
-                        with open(audio_path, "rb") as audio_file:
-                            st.download_button(
-                                label="🎵 Download Audio",
-                                data=audio_file.read(),
-                                file_name="viral_podcast.mp3",
-                                mime="audio/mp3",
-                                use_container_width=True
-                            )
-                    
-                    with col2:
-                        transcript_path = podcast_result.get("transcript_path")
-                        if transcript_path and os.path.exists(transcript_path):
-                            with open(transcript_path, "r", encoding="utf-8") as f:
-                                transcript = f.read()
-                            st.download_button(
-                                label="📝 Download Transcript",
-                                data=transcript,
-                                file_name="viral_podcast_transcript.txt",
-                                mime="text/plain",
-                                use_container_width=True
-                            )
-                    
-                    with col3:
-                        # Social sharing placeholder
-                        st.button("📱 Share on Social", use_container_width=True, help="Share your viral podcast")
-                    
-                else:
-                    create_error_message("Audio generation failed. Please try again.")
-                
-                # Transcript Viewer
-                transcript_path = podcast_result.get("transcript_path")
-                if transcript_path and os.path.exists(transcript_path):
-                    with st.expander("📝 View Full Transcript", expanded=False):
-                        with open(transcript_path, "r", encoding="utf-8") as f:
-                            transcript = f.read()
-                        
-                        st.text_area(
-                            "Complete Transcript",
-                            transcript,
-                            height=400,
-                            help="Full transcript of your viral podcast"
-                        )
-                
-                # Social Media Preview
-                st.markdown("#### 📱 Social Media Ready")
-                
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.markdown("""
-                    **🔥 Viral Potential Score: 95/100**
-                    - ✅ Hook Factor: Excellent
-                    - ✅ Shareability: High
-                    - ✅ Engagement: Premium
-                    - ✅ Production: Professional
-                    """)
-                
-                with col2:
-                    st.markdown("""
-                    **📊 Predicted Performance**
-                    - 🎯 Completion Rate: 85%+
-                    - 📈 Share Rate: 40%+
-                    - 💬 Engagement: 90%+
-                    - ⭐ Quality Score: 4.8/5
-                    """)
-                
-                # Call to Action
-                st.markdown("""
-                <div style="text-align: center; padding: 2rem; background: rgba(255, 255, 255, 0.05); border-radius: 20px; margin: 2rem 0; border: 1px solid rgba(255, 255, 255, 0.1);">
-                    <h3 style="color: var(--text-primary); margin-bottom: 1rem;">🚀 Ready to Go Viral?</h3>
-                    <p style="color: var(--text-secondary); font-size: 1.1rem; margin-bottom: 1.5rem;">
-                        Your podcast is optimized for maximum engagement and shareability. 
-                        Upload to your favorite platform and watch the magic happen!
-                    </p>
-                </div>
-                """, unsafe_allow_html=True)
-                
-            except Exception as e:
-                progress_bar.progress(0)
-                status_text.empty()
-                
-                # Enhanced Error Handling
-                if "rate limit" in str(e).lower():
-                    create_error_message("🚦 API rate limit reached. Please wait a moment and try again.")
-                elif "api key" in str(e).lower():
-                    create_error_message("🔑 API key issue detected. Please check your configuration.")
-                elif "quota" in str(e).lower():
-                    create_error_message("📊 API quota exceeded. Please check your usage limits.")
-                elif "network" in str(e).lower() or "connection" in str(e).lower():
-                    create_error_message("🌐 Network connectivity issue. Please check your internet connection.")
-                else:
-                    create_error_message(f"⚠️ Generation failed: {str(e)[:100]}...")
-                
-                # Retry Button
-                if st.button("🔄 Retry Generation", use_container_width=True):
-                    st.rerun()
+            # The job builds the history itself if the prefetch hasn't started yet
+            prefetcher.cancel()
+            # Generation runs in a background worker; this session only polls its status.
+            # A double click or another session with the same inputs joins the queued job
+            job_id, _ = get_job_store().submit_or_join({
+                "prompt": prompt,
+                "system_message": system_message,
+                "content_source": st.session_state.content_source,
+                "source_type": st.session_state.source_type,
+                "max_tokens": max_tokens,
+                "regenerate": regenerate,
+            })
+            st.session_state.job_id = job_id
+            # Keep the job in the URL so a browser reload picks it back up
+            st.query_params["job"] = job_id
+            st.rerun()
     
     else:
         # Call to Action
@@ -1846,6 +804,9 @@ Transform this content into the most engaging podcast episode of the year!""",
         </div>
         """, unsafe_allow_html=True)
     
+    if st.session_state.job_id:
+        show_job_status(st.session_state.job_id)
+    
     # Footer
     st.markdown("""
     <div style="text-align: center; padding: 3rem; margin-top: 4rem; border-top: 1px solid rgba(255, 255, 255, 0.1);">
@@ -0,0 +1,217 @@
+import os
+import re
+import json
+import logging
+import argparse
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+from services.batch import episode_params
+from services.jobs import JobStore, WorkerPool, jobs_db_path
+
+logger = logging.getLogger("podgem")
+
+MAX_REQUEST_BYTES = 1024 * 1024
+DOWNLOAD_CHUNK_BYTES = 64 * 1024
+
+EPISODE_PATH = re.compile(r"^/episodes/([0-9a-f]{32})(?:/(audio|transcript))?$")
+RANGE_HEADER = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+class EpisodeServer(ThreadingHTTPServer):
+    """HTTP front end over the job queue; generation runs in the worker processes."""
+
+    daemon_threads = True
+
+    def __init__(self, address, store: JobStore, max_queued: int = 20, allow_local_files: bool = False):
+        super().__init__(address, EpisodeRequestHandler)
+        self.store = store
+        self.max_queued = max_queued
+        self.allow_local_files = allow_local_files
+
+class EpisodeRequestHandler(BaseHTTPRequestHandler):
+    """
+    POST /episodes                 submit {"source", "type"?, "prompt"?, "system_message"?, "max_tokens"?, "regenerate"?}
+    GET  /episodes/<id>            job status (and result once finished)
+    GET  /episodes/<id>/audio      stream the finished MP3 (supports Range requests)
+    GET  /episodes/<id>/transcript the finished transcript
+    GET  /health                   queue counts
+    """
+
+    server: EpisodeServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        logger.info(f"{self.address_string()} {format % args}")
+
+    def _send_json(self, status: int, payload: Dict, headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: int, message: str, headers: Optional[Dict[str, str]] = None):
+        self._send_json(status, {"error": message}, headers)
+
+    def _read_json(self) -> Dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0 or length > MAX_REQUEST_BYTES:
+            raise ValueError(f"request body must be between 1 and {MAX_REQUEST_BYTES} bytes")
+        try:
+            payload = json.loads(self.rfile.read(length))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"invalid JSON: {e}")
+        if not isinstance(payload, dict):
+            raise ValueError("request body must be a JSON object")
+        return payload
+
+    @staticmethod
+    def _job_view(job: Dict) -> Dict:
+        view = {
+            "id": job["id"],
+            "status": job["status"],
+            "source_type": job["params"].get("source_type"),
+            "created_at": job["created_at"],
+            "started_at": job["started_at"],
+            "finished_at": job["finished_at"],
+            "status_url": f"/episodes/{job['id']}",
+        }
+        if job["status"] == "succeeded":
+            result = job["result"] or {}
+            view.update({
+                "audio_url": f"/episodes/{job['id']}/audio",
+                "transcript_url": f"/episodes/{job['id']}/transcript",
+                "total_items": result.get("total_items"),
+                "processed_items": result.get("processed_items"),
+                "file_size": result.get("file_size"),
+                "cached": result.get("cached", False),
+            })
+        elif job["status"] == "failed":
+            view["error"] = job["error"]
+        elif job["status"] == "running":
+            view["progress"] = job["progress"]
+        return view
+
+    def do_POST(self):
+        if urlparse(self.path).path.rstrip("/") != "/episodes":
+            self._send_error(HTTPStatus.NOT_FOUND, "not found")
+            return
+        try:
+            params = episode_params(self._read_json())
+        except ValueError as e:
+            self._send_error(HTTPStatus.BAD_REQUEST, str(e))
+            return
+        if params["source_type"] in ("pdf", "document") and not self.server.allow_local_files:
+            self._send_error(HTTPStatus.BAD_REQUEST, "local file sources are disabled on this server")
+            return
+
+        store = self.server.store
+        if store.counts()["queued"] >= self.server.max_queued:
+            self._send_error(HTTPStatus.SERVICE_UNAVAILABLE, "too many queued episodes", {"Retry-After": "30"})
+            return
+
+        # Identical requests already in flight share one job instead of generating twice
+        job_id, coalesced = store.submit_or_join(params)
+        view = dict(self._job_view(store.get(job_id)), coalesced=coalesced)
+        self._send_json(HTTPStatus.OK if coalesced else HTTPStatus.ACCEPTED, view, {"Location": view["status_url"]})
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/health":
+            self._send_json(HTTPStatus.OK, {"status": "ok", "jobs": self.server.store.counts()})
+            return
+
+        match = EPISODE_PATH.match(path)
+        job = self.server.store.get(match.group(1)) if match else None
+        if job is None:
+            self._send_error(HTTPStatus.NOT_FOUND, "not found")
+            return
+
+        artifact = match.group(2)
+        if artifact is None:
+            self._send_json(HTTPStatus.OK, self._job_view(job))
+        elif job["status"] != "succeeded":
+            self._send_error(HTTPStatus.CONFLICT, f"episode is {job['status']}")
+        elif artifact == "audio":
+            self._stream_file(job["result"].get("audio_path"), "audio/mpeg")
+        else:
+            self._stream_file(job["result"].get("transcript_path"), "text/plain; charset=utf-8")
+
+    def _byte_range(self, size: int) -> Optional[Tuple[int, int]]:
+        match = RANGE_HEADER.match(self.headers.get("Range", "").strip())
+        if not match or not any(match.groups()):
+            return None
+        start, end = match.groups()
+        if start:
+            first, last = int(start), min(int(end), size - 1) if end else size - 1
+        else:
+            first, last = max(0, size - int(end)), size - 1
+        return (first, last) if first <= last else None
+
+    def _stream_file(self, path: Optional[str], content_type: str):
+        if not path or not os.path.isfile(path):
+            self._send_error(HTTPStatus.GONE, "output file is no longer available")
+            return
+
+        size = os.path.getsize(path)
+        byte_range = self._byte_range(size) if "Range" in self.headers else None
+        if "Range" in self.headers and byte_range is None:
+            self._send_error(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE, "invalid range",
+                             {"Content-Range": f"bytes */{size}"})
+            return
+
+        first, last = byte_range or (0, size - 1)
+        self.send_response(HTTPStatus.PARTIAL_CONTENT if byte_range else HTTPStatus.OK)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(last - first + 1))
+        self.send_header("Accept-Ranges", "bytes")
+        if byte_range:
+            self.send_header("Content-Range", f"bytes {first}-{last}/{size}")
+        self.end_headers()
+
+        # Stream in chunks rather than loading the episode into memory
+        remaining = last - first + 1
+        with open(path, "rb") as f:
+            f.seek(first)
+            while remaining > 0:
+                chunk = f.read(min(DOWNLOAD_CHUNK_BYTES, remaining))
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                remaining -= len(chunk)
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the PodGem pipeline over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=2, help="Worker processes generating episodes")
+    parser.add_argument("--max-queued", type=int, default=20, help="Queued episodes before new requests get 503")
+    parser.add_argument("--db", default=jobs_db_path(), help="SQLite job database")
+    parser.add_argument("--allow-local-files", action="store_true", help="Accept server-side PDF/TXT/DOCX paths as sources")
+    parser.add_argument("--fake", action="store_true", help="Use the offline Gemini/ElevenLabs backends")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(name)s - %(message)s')
+    if args.fake:
+        # Read by the spawned workers
+        os.environ["PODGEM_FAKE_BACKENDS"] = "1"
+
+    pool = WorkerPool(args.workers, args.db)
+    pool.start()
+    server = EpisodeServer((args.host, args.port), JobStore(args.db), args.max_queued, args.allow_local_files)
+    logger.info(f"Serving on http://{args.host}:{args.port} with {args.workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Shutting down...")
+    finally:
+        server.server_close()
+        pool.stop()
+
+if __name__ == "__main__":
+    main()
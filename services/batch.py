@@ -0,0 +1,195 @@
+import os
+import sys
+import json
+import time
+import uuid
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+from services.documents import is_local_document
+from services.fakes import fake_backends_requested, use_fake_backends
+from services.workspace import output_root
+
+logger = logging.getLogger("podgem")
+
+SOURCE_TYPES = ("pdf", "document", "url", "site", "company", "text")
+
+DEFAULT_SYSTEM_MESSAGE = (
+    "You are the writer of a two-host podcast. male-1 hosts and female-1 is the expert guest. "
+    "Write a natural, engaging conversation that explains the source material accurately."
+)
+
+DEFAULT_PROMPT = (
+    "Create a podcast episode of about 10-15 exchanges between male-1 and female-1 that covers "
+    "the most important points of the provided content, opens with a hook and ends with a takeaway."
+)
+
+def _infer_source_type(source: str) -> str:
+    lowered = source.lower()
+    if lowered.startswith(("http://", "https://")):
+        return "url"
+    if lowered.endswith(".pdf"):
+        return "pdf"
+    if is_local_document(lowered):
+        return "document"
+    return "company"
+
+def episode_params(episode: Dict, defaults: Optional[Dict] = None, base_dir: Optional[str] = None) -> Dict:
+    """
+    Turn one episode spec ({"source", "type"?, "prompt"?, "system_message"?, "max_tokens"?,
+    "regenerate"?}) into generate_podcast keyword arguments.
+
+    Raises:
+        ValueError: If the source is missing or its type is unsupported
+    """
+    defaults = defaults or {}
+    source = str(episode.get("source", "")).strip()
+    if not source:
+        raise ValueError("no source given")
+
+    source_type = episode.get("type") or _infer_source_type(source)
+    if source_type not in SOURCE_TYPES:
+        raise ValueError(f"unsupported type {source_type!r}")
+    if source_type in ("pdf", "document") and base_dir and not os.path.isabs(source):
+        source = os.path.join(base_dir, source)
+
+    max_tokens = episode.get("max_tokens", defaults.get("max_tokens"))
+    if max_tokens is not None and (not isinstance(max_tokens, int) or max_tokens <= 0):
+        raise ValueError("max_tokens must be a positive integer")
+    regenerate = episode.get("regenerate", defaults.get("regenerate", False))
+    if not isinstance(regenerate, bool):
+        raise ValueError("regenerate must be true or false")
+
+    return {
+        "prompt": episode.get("prompt", defaults.get("prompt", DEFAULT_PROMPT)),
+        "system_message": episode.get("system_message", defaults.get("system_message", DEFAULT_SYSTEM_MESSAGE)),
+        "content_source": source,
+        "source_type": source_type,
+        "max_tokens": max_tokens,
+        "regenerate": regenerate,
+    }
+
+def load_manifest(path: str) -> List[Dict]:
+    """
+    Read a batch manifest into a list of generate_podcast job specs.
+
+    The manifest is a JSON object with optional "defaults" (prompt, system_message,
+    max_tokens, regenerate) and an "episodes" list; each episode has a "source" plus optional
+    "type" (inferred from the source when missing), "id" and per-episode overrides.
+    Relative file paths are resolved against the manifest's directory.
+
+    Raises:
+        ValueError: If the manifest is malformed
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            manifest = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Manifest {path} is not valid JSON: {e}")
+
+    if isinstance(manifest, list):
+        manifest = {"episodes": manifest}
+    defaults = manifest.get("defaults", {})
+    episodes = manifest.get("episodes")
+    if not isinstance(episodes, list) or not episodes:
+        raise ValueError(f"Manifest {path} has no episodes")
+
+    base_dir = os.path.dirname(os.path.abspath(path))
+    specs = []
+    for index, episode in enumerate(episodes):
+        if isinstance(episode, str):
+            episode = {"source": episode}
+        try:
+            params = episode_params(episode, defaults, base_dir)
+        except ValueError as e:
+            raise ValueError(f"Episode {index}: {e}")
+        specs.append({"id": str(episode.get("id") or index), "params": params})
+    return specs
+
+def _run_episode(spec: Dict) -> Dict:
+    from services.pipeline import generate_podcast
+
+    job_id = uuid.uuid4().hex
+    started = time.monotonic()
+    entry = {
+        "id": spec["id"],
+        "job_id": job_id,
+        "source_type": spec["params"]["source_type"],
+        "source": spec["params"]["content_source"],
+    }
+    try:
+        entry["result"] = generate_podcast(**spec["params"], job_id=job_id)
+        entry["status"] = "succeeded"
+    except Exception as e:
+        entry["status"] = "failed"
+        entry["error"] = str(e)
+    entry["duration_seconds"] = round(time.monotonic() - started, 2)
+    logger.info(f"Episode {spec['id']} {entry['status']} in {entry['duration_seconds']}s")
+    return entry
+
+def run_batch(specs: List[Dict], max_workers: int = 2) -> Dict:
+    """
+    Generate every episode in a batch and return the report.
+
+    Episodes run on a thread pool so they share this process's caches (HTTP cache,
+    token counts, Gemini client pool, ElevenLabs session); max_workers bounds how many
+    are in flight against the APIs at once.
+    """
+    started_at = time.time()
+    episodes = [None] * len(specs)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(_run_episode, spec): index for index, spec in enumerate(specs)}
+        for future in as_completed(futures):
+            episodes[futures[future]] = future.result()
+
+    succeeded = sum(1 for entry in episodes if entry["status"] == "succeeded")
+    return {
+        "started_at": started_at,
+        "finished_at": time.time(),
+        "duration_seconds": round(time.time() - started_at, 2),
+        "max_workers": max_workers,
+        "total": len(episodes),
+        "succeeded": succeeded,
+        "failed": len(episodes) - succeeded,
+        "episodes": episodes,
+    }
+
+def write_report(report: Dict, path: Optional[str] = None) -> str:
+    """Write the batch report as JSON (default <output root>/batch-<timestamp>.json)."""
+    if path is None:
+        path = os.path.join(output_root(), f"batch-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate podcast episodes for every source in a manifest")
+    parser.add_argument("manifest", help="JSON manifest of sources and settings")
+    parser.add_argument("--workers", type=int, default=2, help="Episodes generated in parallel")
+    parser.add_argument("--report", help="Where to write the JSON report")
+    parser.add_argument("--fake", action="store_true", help="Use the offline Gemini/ElevenLabs backends")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(name)s - %(message)s')
+    if args.fake or fake_backends_requested():
+        use_fake_backends()
+
+    try:
+        specs = load_manifest(args.manifest)
+    except (OSError, ValueError) as e:
+        logger.error(f"Could not load manifest: {e}")
+        return 2
+
+    logger.info(f"Generating {len(specs)} episodes with {args.workers} workers")
+    report = run_batch(specs, max(1, args.workers))
+    report_path = write_report(report, args.report)
+    logger.info(f"{report['succeeded']}/{report['total']} episodes succeeded; report written to {report_path}")
+    return 0 if report["failed"] == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+import time
+import logging
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional
+from urllib.parse import urljoin, urlparse
+
+from lxml import etree
+
+from services.dedupe import near_duplicate_mask
+from services.tokens import count_tokens, count_tokens_batch, get_gemini_estimator, truncate_to_tokens
+from services.web import USER_AGENT, fetch_and_extract, fetch_page
+
+logger = logging.getLogger("podgem")
+
+# Pages worth covering in a "company website" episode are fetched first
+PRIORITY_KEYWORDS = ("about", "company", "product", "service", "solution", "platform", "feature",
+                     "pricing", "customer", "news", "blog", "press", "team", "career", "mission")
+
+SKIPPED_EXTENSIONS = (".pdf", ".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".zip", ".gz", ".mp3",
+                      ".mp4", ".mov", ".avi", ".css", ".js", ".json", ".xml", ".ico", ".doc", ".docx",
+                      ".xls", ".xlsx", ".ppt", ".pptx")
+
+SITEMAP_CONTENT_TYPES = {"application/xml", "text/xml", "application/x-xml", "text/plain"}
+
+class HostLimiter:
+    """Per-host politeness: at most `max_concurrent` requests and `min_interval` seconds between starts."""
+
+    def __init__(self, max_concurrent: int = 2, min_interval: float = 0.5):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._semaphores = defaultdict(lambda: threading.BoundedSemaphore(max_concurrent))
+        self._next_start = defaultdict(float)
+
+    def run(self, host: str, fn, *args, **kwargs):
+        with self._lock:
+            semaphore = self._semaphores[host]
+        with semaphore:
+            with self._lock:
+                now = time.monotonic()
+                start_at = max(now, self._next_start[host])
+                self._next_start[host] = start_at + self.min_interval
+            if start_at > now:
+                time.sleep(start_at - now)
+            return fn(*args, **kwargs)
+
+def _site_key(url: str) -> str:
+    host = urlparse(url).netloc.lower()
+    return host[4:] if host.startswith("www.") else host
+
+def _is_crawlable(url: str, site: str) -> bool:
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or _site_key(url) != site:
+        return False
+    return not parsed.path.lower().endswith(SKIPPED_EXTENSIONS)
+
+def _priority(url: str):
+    path = urlparse(url).path.lower()
+    keyword_rank = next((i for i, keyword in enumerate(PRIORITY_KEYWORDS) if keyword in path), len(PRIORITY_KEYWORDS))
+    depth = len([segment for segment in path.split("/") if segment])
+    return (keyword_rank, depth, len(url))
+
+def _normalize_url(url: str) -> str:
+    parsed = urlparse(url)
+    path = parsed.path.rstrip("/") or "/"
+    return parsed._replace(path=path, fragment="").geturl()
+
+def discover_sitemap_urls(start_url: str, limit: int = 200, max_sitemaps: int = 3) -> List[str]:
+    """Read page URLs from the site's /sitemap.xml (following a sitemap index one level)."""
+    pending = [urljoin(start_url, "/sitemap.xml")]
+    urls = []
+    fetched = 0
+
+    while pending and fetched < max_sitemaps and len(urls) < limit:
+        sitemap_url = pending.pop(0)
+        fetched += 1
+        try:
+            _, _, body = fetch_page(sitemap_url, {'User-Agent': USER_AGENT}, content_types=SITEMAP_CONTENT_TYPES)
+            root = etree.fromstring(body, parser=etree.XMLParser(recover=True, resolve_entities=False, no_network=True))
+        except Exception as e:
+            logger.info(f"No usable sitemap at {sitemap_url}: {e}")
+            continue
+        if root is None:
+            continue
+
+        for loc in root.iter("{*}loc"):
+            location = (loc.text or "").strip()
+            if not location:
+                continue
+            if etree.QName(root).localname == "sitemapindex":
+                pending.append(location)
+            else:
+                urls.append(location)
+
+    return urls[:limit]
+
+def merge_pages(pages: List[Dict], max_tokens: int) -> str:
+    """
+    Merge extracted pages into one text within the token budget.
+
+    Paragraphs that near-duplicate one seen earlier (navigation, footers, repeated
+    boilerplate) are dropped, and pages that add nothing new are skipped entirely.
+    """
+    page_paragraphs = [
+        [paragraph.strip() for paragraph in page["main_content"].split("\n") if paragraph.strip()]
+        for page in pages
+    ]
+    keep = iter(near_duplicate_mask([paragraph for paragraphs in page_paragraphs for paragraph in paragraphs]))
+    sections = []
+    used_tokens = 0
+
+    for page, paragraphs in zip(pages, page_paragraphs):
+        fresh = [paragraph for paragraph in paragraphs if next(keep)]
+
+        if not fresh:
+            logger.info(f"Skipping {page['url']}: no new content")
+            continue
+
+        header = f"## {page['title'] or page['url']} ({page['url']})"
+        # Count the paragraph separators too so the merged text stays within budget
+        header_tokens, *paragraph_counts = count_tokens_batch([header] + ["\n\n" + paragraph for paragraph in fresh])
+        used_tokens += header_tokens
+        kept = []
+        for paragraph, paragraph_tokens in zip(fresh, paragraph_counts):
+            if used_tokens + paragraph_tokens > max_tokens:
+                break
+            kept.append(paragraph)
+            used_tokens += paragraph_tokens
+
+        if kept:
+            sections.append(header + "\n\n" + "\n\n".join(kept))
+        if used_tokens >= max_tokens or len(kept) < len(fresh):
+            logger.info(f"Token budget of {max_tokens} reached after {len(sections)} pages")
+            break
+
+    return truncate_to_tokens("\n\n".join(sections), max_tokens)
+
+def crawl_website(start_url: str, max_pages: int = 8, max_workers: int = 4, per_host_limit: int = 2,
+                  politeness_delay: float = 0.5, use_sitemap: bool = True, max_tokens: int = 6000,
+                  use_cache: bool = True) -> Dict:
+    """
+    Crawl a bounded number of pages from one site and merge their content.
+
+    The start page is fetched first; its same-site links (plus /sitemap.xml when
+    use_sitemap is set) are ranked so about/product/news-style pages come first, and the
+    top candidates are fetched concurrently under per-host politeness limits. Content is
+    deduplicated across pages and merged within the token budget.
+
+    Args:
+        start_url: Site URL to start from
+        max_pages: Maximum number of pages to fetch, including the start page
+        max_workers: Maximum number of concurrent fetches
+        per_host_limit: Maximum concurrent requests to the same host
+        politeness_delay: Minimum seconds between request starts to the same host
+        use_sitemap: Also discover pages from the site's sitemap
+        max_tokens: Gemini token budget for the merged content
+        use_cache: Use the on-disk HTTP cache
+
+    Returns:
+        Dict with title, description, main_content and meta (including the crawled pages)
+    """
+    empty = {"title": "", "description": "", "main_content": "", "meta": {}}
+    site = _site_key(start_url)
+    limiter = HostLimiter(per_host_limit, politeness_delay)
+
+    logger.info(f"Crawling {start_url} (up to {max_pages} pages)")
+    try:
+        start_page = limiter.run(urlparse(start_url).netloc, fetch_and_extract, start_url, use_cache)
+    except Exception as e:
+        logger.error(f"Failed to fetch start page {start_url}: {e}", exc_info=True)
+        return empty
+
+    candidates = list(start_page["meta"].get("links", []))
+    if use_sitemap:
+        candidates += discover_sitemap_urls(start_url)
+
+    visited = {_normalize_url(start_url)}
+    queue = []
+    for url in sorted((url for url in candidates if _is_crawlable(url, site)), key=_priority):
+        normalized = _normalize_url(url)
+        if normalized not in visited:
+            visited.add(normalized)
+            queue.append(url)
+    queue = queue[:max(0, max_pages - 1)]
+
+    def fetch(url: str) -> Optional[Dict]:
+        try:
+            return limiter.run(urlparse(url).netloc, fetch_and_extract, url, use_cache)
+        except Exception as e:
+            logger.warning(f"Skipping {url}: {e}")
+            return None
+
+    fetched = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(fetch, url): url for url in queue}
+        for future in as_completed(futures):
+            page = future.result()
+            if page and page["main_content"].strip():
+                fetched[futures[future]] = page
+
+    # Keep the start page first and the rest in priority order
+    pages = [dict(start_page, url=start_url)] + [dict(fetched[url], url=url) for url in queue if url in fetched]
+    logger.info(f"Crawled {len(pages)} pages from {site}")
+    
+    # Merging counts local tokens, so translate the Gemini budget for the site's script and
+    # leave room for the title/description header the pipeline puts in front
+    reference_budget = get_gemini_estimator().reference_budget(max_tokens, start_page["main_content"])
+    header_tokens = count_tokens(f"Title: {start_page['title']}\n\nDescription: {start_page['description']}\n\n")
+
+    return {
+        "title": start_page["title"],
+        "description": start_page["description"],
+        "main_content": merge_pages(pages, max(0, reference_budget - header_tokens)),
+        "meta": {"pages": [page["url"] for page in pages]},
+    }
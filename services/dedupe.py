@@ -0,0 +1,119 @@
+import re
+import zlib
+import logging
+from typing import List, Optional
+
+import numpy as np
+
+logger = logging.getLogger("podgem")
+
+SHINGLE_WORDS = 5
+NUM_PERMUTATIONS = 64
+# 16 bands of 4 rows puts the LSH candidate threshold near 0.5 Jaccard similarity;
+# candidates are then checked against the real threshold on the full signature
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERMUTATIONS // LSH_BANDS
+DUPLICATE_THRESHOLD = 0.8
+# Shingle hashes per numpy batch, which bounds memory at ~8 MB per batch
+MAX_BATCH_SHINGLES = 16384
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_rng = np.random.default_rng(20240601)
+_PERM_A = _rng.integers(1, 1 << 32, size=NUM_PERMUTATIONS, dtype=np.uint64)
+_PERM_B = _rng.integers(0, 1 << 32, size=NUM_PERMUTATIONS, dtype=np.uint64)
+_BAND_MIX = _rng.integers(1, 1 << 32, size=LSH_ROWS, dtype=np.uint64)
+
+def _shingle_hashes(paragraph: str) -> Optional[np.ndarray]:
+    words = re.findall(r"\w+", paragraph.lower())
+    if not words:
+        return None
+    if len(words) < SHINGLE_WORDS:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+    return np.fromiter((zlib.crc32(shingle.encode("utf-8")) for shingle in shingles), dtype=np.uint64, count=len(shingles))
+
+def minhash_signatures(paragraphs: List[str]) -> np.ndarray:
+    """
+    MinHash signatures of the word 5-shingles of each paragraph, shape (n, NUM_PERMUTATIONS).
+
+    Rows of paragraphs without any words are all-max and never match anything.
+    """
+    signatures = np.full((len(paragraphs), NUM_PERMUTATIONS), np.iinfo(np.uint64).max, dtype=np.uint64)
+    batch_rows, batch_hashes, batch_size = [], [], 0
+
+    def flush():
+        offsets = np.cumsum([0] + [len(hashes) for hashes in batch_hashes[:-1]])
+        shingles = np.concatenate(batch_hashes)[:, None]
+        # Universal hashing (a*x + b) mod p, one column per permutation; uint64 wraparound is fine here
+        permuted = (shingles * _PERM_A + _PERM_B) % _MERSENNE_PRIME
+        signatures[batch_rows] = np.minimum.reduceat(permuted, offsets, axis=0)
+
+    for row, paragraph in enumerate(paragraphs):
+        hashes = _shingle_hashes(paragraph)
+        if hashes is None:
+            continue
+        batch_rows.append(row)
+        batch_hashes.append(hashes)
+        batch_size += len(hashes)
+        if batch_size >= MAX_BATCH_SHINGLES:
+            flush()
+            batch_rows, batch_hashes, batch_size = [], [], 0
+    if batch_rows:
+        flush()
+    return signatures
+
+def near_duplicate_mask(paragraphs: List[str], threshold: float = DUPLICATE_THRESHOLD) -> List[bool]:
+    """
+    Flag which paragraphs to keep: the first of each group of near-duplicates survives.
+
+    Paragraphs are compared by estimated Jaccard similarity of their word shingles, using
+    LSH banding so each paragraph is only checked against likely matches.
+    """
+    if not paragraphs:
+        return []
+
+    signatures = minhash_signatures(paragraphs)
+    band_keys = (signatures.reshape(len(paragraphs), LSH_BANDS, LSH_ROWS) * _BAND_MIX).sum(axis=2)
+    has_words = signatures[:, 0] != np.iinfo(np.uint64).max
+
+    buckets = {}
+    keep = []
+    for row in range(len(paragraphs)):
+        if not has_words[row]:
+            keep.append(True)
+            continue
+
+        keys = [(band, int(key)) for band, key in enumerate(band_keys[row])]
+        candidates = {other for key in keys for other in buckets.get(key, ())}
+        if candidates:
+            similarity = (signatures[sorted(candidates)] == signatures[row]).mean(axis=1)
+            if similarity.max() >= threshold:
+                keep.append(False)
+                continue
+
+        for key in keys:
+            buckets.setdefault(key, []).append(row)
+        keep.append(True)
+    return keep
+
+def dedupe_text(text: str, threshold: float = DUPLICATE_THRESHOLD) -> str:
+    """
+    Drop lines that near-duplicate an earlier line (repeated navigation, headers, footers, boilerplate).
+
+    Extracted web pages, Word documents and PDF pages put one paragraph per line, so lines
+    are the unit. Lines shorter than a single shingle (speaker labels, "Yes.", a line of
+    code) are always kept: repeating those is not boilerplate.
+    """
+    lines = text.split("\n")
+    comparable = [i for i, line in enumerate(lines) if len(re.findall(r"\w+", line)) >= SHINGLE_WORDS]
+    keep = [True] * len(lines)
+    for i, kept in zip(comparable, near_duplicate_mask([lines[i] for i in comparable], threshold)):
+        keep[i] = kept
+    removed = keep.count(False)
+    if not removed:
+        return text
+
+    logger.info(f"Removed {removed} near-duplicate paragraphs")
+    deduped = "\n".join(line for line, kept in zip(lines, keep) if kept)
+    return re.sub(r"\n{3,}", "\n\n", deduped)
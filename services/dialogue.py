@@ -0,0 +1,118 @@
+import json
+import logging
+import re
+from typing import List
+
+from services.elevenlabs import VOICE_IDS, DialogueItem
+
+logger = logging.getLogger("podgem")
+
+# Speaker labels the model may use, mapped onto the voices we actually have
+SPEAKER_ALIASES = {
+    "male-1": "male-1",
+    "male": "male-1",
+    "host": "male-1",
+    "female-1": "female-1",
+    "female": "female-1",
+    "guest": "female-1",
+}
+
+# Response schema for structured dialogue output (a JSON list of {speaker, text}). Written
+# out rather than derived from a TypedDict: the SDK drops "required" from class schemas
+DIALOGUE_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "speaker": {"type": "string", "enum": list(VOICE_IDS)},
+            "text": {"type": "string"},
+        },
+        "required": ["speaker", "text"],
+    },
+}
+
+DIALOGUE_FORMAT_NOTE = (
+    "Return the dialogue as a JSON array of objects with \"speaker\" and \"text\" fields. "
+    "\"speaker\" must be either \"male-1\" or \"female-1\" and \"text\" holds only the spoken words."
+)
+
+def parse_dialogue_json(raw: str) -> List[DialogueItem]:
+    """
+    Validate a structured dialogue response into DialogueItems.
+
+    Args:
+        raw: JSON text returned by Gemini for DIALOGUE_SCHEMA
+
+    Returns:
+        List of DialogueItem objects
+
+    Raises:
+        ValueError: If the response is not a usable list of {speaker, text} objects
+    """
+    payload = raw.strip()
+    # Tolerate a fenced ```json block around the payload
+    fence_match = re.match(r'^```(?:json)?\s*(.*?)\s*```$', payload, re.DOTALL)
+    if fence_match:
+        payload = fence_match.group(1)
+
+    try:
+        data = json.loads(payload)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Dialogue response is not valid JSON: {e}")
+
+    if isinstance(data, dict):
+        data = data.get("dialogue", data.get("lines"))
+    if not isinstance(data, list):
+        raise ValueError("Dialogue response is not a list of dialogue lines")
+
+    dialogue_items = []
+    for entry in data:
+        if not isinstance(entry, dict):
+            logger.warning(f"Skipping malformed dialogue entry: {entry!r}")
+            continue
+
+        speaker = SPEAKER_ALIASES.get(str(entry.get("speaker", "")).strip().lower())
+        text = str(entry.get("text", "")).strip()
+
+        if not speaker or not text:
+            logger.warning(f"Skipping dialogue entry with unknown speaker or empty text: {entry!r}")
+            continue
+
+        dialogue_items.append(DialogueItem(text=text, speaker=speaker))
+
+    if not dialogue_items:
+        raise ValueError("Dialogue response contained no valid lines")
+
+    return dialogue_items
+
+def parse_dialogue_lines(raw: str) -> List[DialogueItem]:
+    """Parse 'speaker: text' lines, alternating speakers for unlabelled lines."""
+    dialogue_items = []
+    for line in raw.split('\n'):
+        line = line.strip()
+        # Skip blanks, markdown headers, code fences and stage directions in brackets or emphasis
+        if not line or line.startswith(('#', '```')) or re.match(r'^\[.*\]$', line) \
+                or re.fullmatch(r'(\*+|_+)[^*_]+\1', line):
+            continue
+
+        speaker_match = re.match(r'^(male-1|female-1|male|female|host|guest)\s*[:-]\s*(.+)$', line, re.IGNORECASE)
+
+        if speaker_match:
+            speaker = SPEAKER_ALIASES[speaker_match.group(1).lower()]
+            text = speaker_match.group(2).strip()
+            dialogue_items.append(DialogueItem(text=text, speaker=speaker))
+        elif dialogue_items:
+            # Alternate speakers if no explicit speaker
+            last_speaker = dialogue_items[-1].speaker
+            next_speaker = "female-1" if last_speaker == "male-1" else "male-1"
+            dialogue_items.append(DialogueItem(text=line, speaker=next_speaker))
+
+    return dialogue_items
+
+def parse_dialogue(raw: str) -> List[DialogueItem]:
+    """Parse a dialogue response, preferring structured JSON over line parsing."""
+    try:
+        return parse_dialogue_json(raw)
+    except ValueError as e:
+        logger.warning(f"Structured dialogue parsing failed ({e}), falling back to line parsing")
+        return parse_dialogue_lines(raw)
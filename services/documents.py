@@ -0,0 +1,192 @@
+import os
+import codecs
+import logging
+import zipfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+from xml.etree import ElementTree
+
+logger = logging.getLogger("podgem")
+
+# Uploads we can turn into text locally instead of sending the file to Gemini
+DOCUMENT_EXTENSIONS = (".txt", ".docx")
+
+# Refuse to inflate absurdly large (or zip-bombed) Word documents
+MAX_DOCX_XML_BYTES = 50 * 1024 * 1024
+
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+# A PDF page with less text than this is treated as scanned or mostly visual
+PDF_MIN_PAGE_CHARS = 200
+# Share of pages that must carry text for a PDF to skip the multimodal upload
+PDF_MIN_TEXT_PAGE_SHARE = 0.8
+PDF_PAGES_PER_TASK = 8
+
+def is_local_document(path: str) -> bool:
+    """Whether a file can be read locally by read_document_text."""
+    return path.lower().endswith(DOCUMENT_EXTENSIONS)
+
+def read_text_file(path: str) -> str:
+    """Read a plain-text file, honouring a BOM and falling back to cp1252 for non-UTF-8 files."""
+    with open(path, "rb") as f:
+        data = f.read()
+
+    if data.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return data.decode("utf-16")
+    try:
+        return data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        logger.info(f"{path} is not UTF-8, decoding as cp1252")
+        return data.decode("cp1252", errors="replace")
+
+def _paragraph_text(paragraph) -> str:
+    parts = []
+    for node in paragraph.iter():
+        if node.tag == W_NS + "t":
+            parts.append(node.text or "")
+        elif node.tag == W_NS + "tab":
+            parts.append("\t")
+        elif node.tag in (W_NS + "br", W_NS + "cr"):
+            parts.append("\n")
+    return "".join(parts)
+
+def read_docx(path: str) -> str:
+    """
+    Extract the body text of a .docx file: one line per paragraph, table rows as 'a | b | c'.
+
+    Raises:
+        ValueError: If the file is not a readable Word document
+    """
+    try:
+        with zipfile.ZipFile(path) as archive:
+            info = archive.getinfo("word/document.xml")
+            if info.file_size > MAX_DOCX_XML_BYTES:
+                raise ValueError(f"Word document body is too large ({info.file_size} bytes)")
+            root = ElementTree.fromstring(archive.read(info))
+    except (zipfile.BadZipFile, KeyError, ElementTree.ParseError) as e:
+        raise ValueError(f"Not a readable Word document: {e}")
+
+    body = root.find(W_NS + "body")
+    if body is None:
+        return ""
+
+    lines = []
+    for block in body:
+        if block.tag == W_NS + "p":
+            lines.append(_paragraph_text(block))
+        elif block.tag == W_NS + "tbl":
+            for row in block.iter(W_NS + "tr"):
+                cells = [
+                    " ".join(_paragraph_text(p) for p in cell.iter(W_NS + "p")).strip()
+                    for cell in row.iter(W_NS + "tc")
+                ]
+                if any(cells):
+                    lines.append(" | ".join(cells))
+    return "\n".join(line.rstrip() for line in lines).strip()
+
+def read_document_text(path: str) -> str:
+    """
+    Extract the text of a local TXT or DOCX file.
+
+    Raises:
+        ValueError: For unsupported file types or documents without any text
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".txt":
+        text = read_text_file(path)
+    elif extension == ".docx":
+        text = read_docx(path)
+    else:
+        raise ValueError(f"Unsupported document type: {extension or path}")
+
+    if not text.strip():
+        raise ValueError(f"No text could be extracted from {os.path.basename(path)}")
+
+    logger.info(f"Read {len(text)} characters from {path}")
+    return text
+
+def local_pdf_enabled() -> bool:
+    """Local PDF extraction is on unless PODGEM_LOCAL_PDF=0 (and needs pypdf installed)."""
+    return os.getenv("PODGEM_LOCAL_PDF", "1").strip().lower() not in ("0", "false", "no")
+
+def _extract_pdf_pages(path: str, start: int, stop: int) -> List[str]:
+    # Runs in a worker process, so it opens its own reader
+    from pypdf import PdfReader
+
+    reader = PdfReader(path)
+    pages = []
+    for index in range(start, stop):
+        try:
+            pages.append(reader.pages[index].extract_text() or "")
+        except Exception as e:
+            logger.warning(f"Could not extract text from page {index + 1} of {path}: {e}")
+            pages.append("")
+    return pages
+
+def extract_pdf_pages(path: str, max_workers: Optional[int] = None,
+                      pages_per_task: int = PDF_PAGES_PER_TASK) -> Optional[List[str]]:
+    """
+    Extract the text of each PDF page, spreading page ranges across a process pool
+    (in-process when called from a daemonic job worker).
+
+    Returns:
+        One string per page, or None if pypdf is not installed or the PDF cannot be read
+    """
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        logger.info("pypdf is not installed; PDFs will be uploaded to Gemini")
+        return None
+
+    try:
+        reader = PdfReader(path)
+        if reader.is_encrypted:
+            logger.info(f"{path} is encrypted; leaving it to the Gemini upload")
+            return None
+        page_count = len(reader.pages)
+    except Exception as e:
+        logger.warning(f"Could not open {path} for local extraction: {e}")
+        return None
+
+    ranges = [(start, min(start + pages_per_task, page_count)) for start in range(0, page_count, pages_per_task)]
+    # Job workers are daemonic processes, which may not start children of their own;
+    # they already run side by side, so they extract in-process
+    if len(ranges) <= 1 or multiprocessing.current_process().daemon:
+        return _extract_pdf_pages(path, 0, page_count)
+
+    workers = min(len(ranges), max_workers or os.cpu_count() or 1)
+    try:
+        # Spawned (not forked): the UI and prefetch callers are multi-threaded
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            chunks = list(executor.map(_extract_pdf_pages, [path] * len(ranges),
+                                       [start for start, _ in ranges], [stop for _, stop in ranges]))
+    except Exception as e:
+        logger.warning(f"Parallel PDF extraction failed for {path}, extracting in-process instead: {e}")
+        return _extract_pdf_pages(path, 0, page_count)
+    return [page for chunk in chunks for page in chunk]
+
+def pdf_needs_upload(pages: List[str]) -> bool:
+    """Whether extracted page text is too sparse to stand in for the PDF itself."""
+    if not pages:
+        return True
+    text_pages = sum(1 for page in pages if len("".join(page.split())) >= PDF_MIN_PAGE_CHARS)
+    return text_pages < len(pages) * PDF_MIN_TEXT_PAGE_SHARE
+
+def read_pdf_text(path: str) -> Optional[str]:
+    """
+    Text of a text-heavy PDF, or None when the PDF should go through the multimodal upload
+    (scanned or visual documents, local extraction disabled or unavailable).
+    """
+    if not local_pdf_enabled():
+        return None
+
+    pages = extract_pdf_pages(path)
+    if pages is None:
+        return None
+    if pdf_needs_upload(pages):
+        logger.info(f"{path} has too little text on its pages; using the Gemini upload")
+        return None
+
+    logger.info(f"Extracted text from {len(pages)} PDF pages locally")
+    return "\n\n".join(page.strip() for page in pages if page.strip())
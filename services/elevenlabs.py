@@ -1,21 +1,48 @@
 import os
 import time
+import asyncio
 import logging
+import functools
+import weakref
+import contextlib
 from dotenv import load_dotenv
 import requests
-from typing import List, Literal, Optional
+from typing import Callable, List, Literal, Optional
 import concurrent.futures as cf
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+from services.singleflight import single_flight
 
-# Load environment variables
-load_dotenv()
+@functools.lru_cache(maxsize=None)
+def get_elevenlabs_api_key() -> Optional[str]:
+    """Load the ElevenLabs API key on first use."""
+    load_dotenv()
+    api_key = os.getenv("ELEVENLABS_API_KEY")
+    if not api_key:
+        logging.warning("ELEVENLABS_API_KEY is not set in environment variables or .env file")
+    return api_key
 
-# Validate API key is available
-ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
-if not ELEVENLABS_API_KEY:
-    logging.warning("ELEVENLABS_API_KEY is not set in environment variables or .env file")
+@functools.lru_cache(maxsize=None)
+def get_elevenlabs_session() -> requests.Session:
+    """Shared HTTP session for ElevenLabs so TTS calls reuse pooled connections."""
+    session = requests.Session()
+    session.headers.update({
+        "xi-api-key": get_elevenlabs_api_key() or "",
+        "Content-Type": "application/json",
+    })
+    return session
+
+# Everything that changes how a line sounds; episode cache keys include these
+VOICE_IDS = {
+    "male-1": "UgBBYS2sOqTuMpoF3BR0",
+    "female-1": "KYiVPerWcenyBTIvWbfY"
+}
+TTS_MODEL_ID = "eleven_turbo_v2_5"
+
+# Pacing shared by generate_audio and generate_audio_async to stay under the rate limit
+TTS_CONCURRENCY = 2
+LINE_PAUSE = 0.3
+CHUNK_PAUSE = 2.0
+VOICE_SETTINGS = {"stability": 0.5, "similarity_boost": 0.75}
 
 class DialogueItem:
     def __init__(self, text: str, speaker: Literal["male-1", "female-1"]):
@@ -24,27 +51,71 @@ class DialogueItem:
 
     @property
     def voice_id(self):
-        voice_mapping = {
-            "male-1": "UgBBYS2sOqTuMpoF3BR0",
-            "female-1": "KYiVPerWcenyBTIvWbfY"
-        }
-        
-        if self.speaker not in voice_mapping:
+        if self.speaker not in VOICE_IDS:
             logging.error(f"Unknown speaker type: {self.speaker}. Using default voice.")
-            return voice_mapping["male-1"]
+            return VOICE_IDS["male-1"]
             
-        return voice_mapping[self.speaker]
+        return VOICE_IDS[self.speaker]
 
 def check_api_key() -> bool:
     """Verify if the ElevenLabs API key is valid."""
-    if not ELEVENLABS_API_KEY:
+    if not get_elevenlabs_api_key():
         logging.error("ElevenLabs API key is not set. Please set the ELEVENLABS_API_KEY environment variable.")
         return False
     return True
 
+def _tts_request(text: str, voice_id: str):
+    """Build the URL and payload for a text-to-speech request."""
+    if not check_api_key():
+        raise ValueError("ElevenLabs API key is not set or is invalid")
+        
+    url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
+    
+    # Truncate very long text if needed (ElevenLabs has character limits)
+    if len(text) > 5000:
+        logging.warning(f"Text too long ({len(text)} chars), truncating to 5000 chars")
+        text = text[:4997] + "..."
+        
+    payload = {
+        "text": text,
+        "model_id": TTS_MODEL_ID,
+        "voice_settings": VOICE_SETTINGS,
+    }
+    return url, payload
+
+def _raise_for_tts_status(response, voice_id: str):
+    """Raise ValueError for ElevenLabs responses that must not be retried."""
+    if response.status_code == 401:
+        logging.error("Authentication failed: ElevenLabs API key is invalid or expired")
+        raise ValueError("ElevenLabs API key is invalid or expired. Please check your API key.")
+        
+    elif response.status_code == 400:
+        try:
+            error_data = response.json()
+            error_message = error_data.get("detail", {}).get("message", "Unknown validation error")
+        except:
+            error_message = "Invalid request parameters"
+        logging.error(f"ElevenLabs API validation error: {error_message}")
+        raise ValueError(f"ElevenLabs API validation error: {error_message}")
+        
+    elif response.status_code == 404:
+        logging.error(f"Voice ID not found: {voice_id}")
+        raise ValueError(f"Voice ID not found: {voice_id}. Please check your voice configuration.")
+
+def _raise_tts_failure(retry_count: int, max_retries: int, last_error: Optional[Exception]):
+    # If we've exhausted retries or had a non-retryable error
+    if retry_count >= max_retries:
+        raise ValueError("ElevenLabs API rate limit exceeded and maximum retries reached. Try again later.")
+    elif last_error:
+        raise last_error
+    else:
+        raise ValueError("Failed to generate audio with ElevenLabs API")
+
+@single_flight
 def get_elevenlabs_audio(text: str, voice_id: str, max_retries: int = 3, retry_delay: float = 2.0) -> bytes:
     """
     Convert text to speech using ElevenLabs API with retry mechanism and better error handling.
+    Concurrent requests for the same line and voice share one API call.
     
     Args:
         text: The text to convert to speech
@@ -59,67 +130,33 @@ def get_elevenlabs_audio(text: str, voice_id: str, max_retries: int = 3, retry_d
         ValueError: For API key, rate limit, or voice ID issues
         requests.exceptions.RequestException: For network or API errors
     """
-    if not check_api_key():
-        raise ValueError("ElevenLabs API key is not set or is invalid")
-        
-    url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
-    
-    # Truncate very long text if needed (ElevenLabs has character limits)
-    if len(text) > 5000:
-        logging.warning(f"Text too long ({len(text)} chars), truncating to 5000 chars")
-        text = text[:4997] + "..."
-        
-    payload = {
-        "text": text,
-        "model_id": "eleven_turbo_v2_5",
-        "voice_settings": {"stability": 0.5, "similarity_boost": 0.75},
-    }
+    url, payload = _tts_request(text, voice_id)
     
-    headers = {
-        "xi-api-key": ELEVENLABS_API_KEY,
-        "Content-Type": "application/json",
-    }
-
     retry_count = 0
     last_error = None
 
     while retry_count < max_retries:
         try:
-            response = requests.post(url, json=payload, headers=headers, stream=True)
+            response = get_elevenlabs_session().post(url, json=payload, stream=True)
             
-            # Handle different error cases
-            if response.status_code == 401:
-                logging.error("Authentication failed: ElevenLabs API key is invalid or expired")
-                raise ValueError("ElevenLabs API key is invalid or expired. Please check your API key.")
-                
-            elif response.status_code == 429:
+            if response.status_code == 429:
                 retry_count += 1
                 wait_time = retry_delay * (2 ** retry_count)  # Exponential backoff
                 logging.warning(f"Rate limit exceeded. Waiting {wait_time:.2f}s before retry {retry_count}/{max_retries}")
                 time.sleep(wait_time)
                 continue
-                
-            elif response.status_code == 400:
-                try:
-                    error_data = response.json()
-                    error_message = error_data.get("detail", {}).get("message", "Unknown validation error")
-                except:
-                    error_message = "Invalid request parameters"
-                logging.error(f"ElevenLabs API validation error: {error_message}")
-                raise ValueError(f"ElevenLabs API validation error: {error_message}")
-                
-            elif response.status_code == 404:
-                logging.error(f"Voice ID not found: {voice_id}")
-                raise ValueError(f"Voice ID not found: {voice_id}. Please check your voice configuration.")
+            
+            # Handle different error cases
+            _raise_for_tts_status(response, voice_id)
             
             # For other errors
             response.raise_for_status()
             return response.content
             
         except requests.exceptions.HTTPError as http_err:
+            # Don't retry for non-rate-limit errors
             last_error = http_err
-            if response.status_code != 429:  # Don't retry for non-rate-limit errors
-                break
+            break
                 
         except requests.exceptions.ConnectionError as conn_err:
             last_error = conn_err
@@ -132,15 +169,91 @@ def get_elevenlabs_audio(text: str, voice_id: str, max_retries: int = 3, retry_d
             logging.error(f"Unexpected error with ElevenLabs API: {err}")
             raise err
     
-    # If we've exhausted retries or had a non-retryable error
-    if retry_count >= max_retries:
-        raise ValueError("ElevenLabs API rate limit exceeded and maximum retries reached. Try again later.")
-    elif last_error:
-        raise last_error
-    else:
-        raise ValueError("Failed to generate audio with ElevenLabs API")
+    _raise_tts_failure(retry_count, max_retries, last_error)
 
-def generate_audio(dialogue_items: List[DialogueItem], max_chunk_size: int = 5, output_filename: str = "podcast.mp3") -> dict:
+_async_clients = weakref.WeakKeyDictionary()
+
+@contextlib.asynccontextmanager
+async def elevenlabs_async_client():
+    """
+    Shared httpx.AsyncClient for the running event loop (connection pools are loop-bound).
+    
+    Nested and concurrent users on the same loop share one client; it is closed when the
+    last of them exits, so no connections outlive the work that opened them.
+    """
+    import httpx
+    
+    loop = asyncio.get_running_loop()
+    entry = _async_clients.get(loop)
+    if entry is None:
+        client = httpx.AsyncClient(
+            headers={
+                "xi-api-key": get_elevenlabs_api_key() or "",
+                "Content-Type": "application/json",
+            },
+            timeout=httpx.Timeout(60.0, connect=10.0)
+        )
+        entry = _async_clients[loop] = {"client": client, "users": 0}
+    entry["users"] += 1
+    try:
+        yield entry["client"]
+    finally:
+        entry["users"] -= 1
+        if entry["users"] == 0:
+            if _async_clients.get(loop) is entry:
+                del _async_clients[loop]
+            await entry["client"].aclose()
+
+async def get_elevenlabs_audio_async(text: str, voice_id: str, max_retries: int = 3, retry_delay: float = 2.0) -> bytes:
+    """
+    Asyncio counterpart of get_elevenlabs_audio with the same error handling and retry policy.
+    
+    Raises:
+        ValueError: For API key, rate limit, or voice ID issues
+        httpx.HTTPError: For network or API errors
+    """
+    import httpx
+    
+    url, payload = _tts_request(text, voice_id)
+    
+    retry_count = 0
+    last_error = None
+
+    while retry_count < max_retries:
+        try:
+            async with elevenlabs_async_client() as client:
+                response = await client.post(url, json=payload)
+            
+            if response.status_code == 429:
+                retry_count += 1
+                wait_time = retry_delay * (2 ** retry_count)  # Exponential backoff
+                logging.warning(f"Rate limit exceeded. Waiting {wait_time:.2f}s before retry {retry_count}/{max_retries}")
+                await asyncio.sleep(wait_time)
+                continue
+            
+            _raise_for_tts_status(response, voice_id)
+            response.raise_for_status()
+            return response.content
+            
+        except httpx.HTTPStatusError as http_err:
+            last_error = http_err
+            break
+                
+        except httpx.TransportError as conn_err:
+            last_error = conn_err
+            retry_count += 1
+            wait_time = retry_delay * (2 ** retry_count)
+            logging.warning(f"Connection error. Waiting {wait_time:.2f}s before retry {retry_count}/{max_retries}")
+            await asyncio.sleep(wait_time)
+            
+        except Exception as err:
+            logging.error(f"Unexpected error with ElevenLabs API: {err}")
+            raise err
+    
+    _raise_tts_failure(retry_count, max_retries, last_error)
+
+def generate_audio(dialogue_items: List[DialogueItem], max_chunk_size: int = 5, output_filename: str = "podcast.mp3",
+                   output_dir: str = ".", on_line: Optional[Callable[[int, int], None]] = None) -> dict:
     """
     Generate audio from dialogue items with better error handling and rate limiting.
     
@@ -148,6 +261,8 @@ def generate_audio(dialogue_items: List[DialogueItem], max_chunk_size: int = 5,
         dialogue_items: List of DialogueItem objects to convert to audio
         max_chunk_size: Maximum number of items to process in parallel to avoid rate limiting
         output_filename: Name of the output audio file
+        output_dir: Directory for the audio and transcript files
+        on_line: Called with (lines finished, total lines) as each line completes or fails
         
     Returns:
         Dict with audio_path, transcript_path, and other metadata
@@ -166,10 +281,11 @@ def generate_audio(dialogue_items: List[DialogueItem], max_chunk_size: int = 5,
     
     # Process dialogues in smaller chunks to avoid rate limits
     total_processed = 0
+    lines_finished = 0
     for i in range(0, len(dialogue_items), max_chunk_size):
         chunk = dialogue_items[i:i+max_chunk_size]
         
-        with cf.ThreadPoolExecutor(max_workers=2) as executor:  # Limit concurrent requests
+        with cf.ThreadPoolExecutor(max_workers=TTS_CONCURRENCY) as executor:  # Limit concurrent requests
             futures = []
             for line in chunk:
                 transcript_line = f"{line.speaker}: {line.text}"
@@ -184,24 +300,104 @@ def generate_audio(dialogue_items: List[DialogueItem], max_chunk_size: int = 5,
                     total_processed += 1
                     logging.info(f"Generated audio for dialogue {total_processed}/{len(dialogue_items)}")
                     # Small delay between chunks to avoid hitting rate limits
-                    time.sleep(0.3)
+                    time.sleep(LINE_PAUSE)
                 except Exception as e:
                     logging.error(f"Error generating audio for line: {transcript_line}\nError: {str(e)}")
                     # Add error note to transcript but continue processing
                     transcript += f"[ERROR generating audio for: {transcript_line}]\n\n"
+                lines_finished += 1
+                if on_line:
+                    on_line(lines_finished, len(dialogue_items))
         
         # Add delay between chunks to avoid rate limits
         if i + max_chunk_size < len(dialogue_items):
             logging.info(f"Processed {i + len(chunk)}/{len(dialogue_items)} dialogue items. Pausing to avoid rate limits...")
-            time.sleep(2)
+            time.sleep(CHUNK_PAUSE)
+
+    return _save_podcast_files(audio, transcript, dialogue_items, total_processed, output_filename, output_dir)
+
+async def generate_audio_async(dialogue_items: List[DialogueItem], max_chunk_size: int = 5,
+                               max_concurrency: int = TTS_CONCURRENCY, line_timeout: float = 30.0,
+                               output_filename: str = "podcast.mp3", output_dir: str = ".",
+                               on_line: Optional[Callable[[int, int], None]] = None) -> dict:
+    """
+    Asyncio counterpart of generate_audio.
+    
+    Lines are synthesized concurrently behind a semaphore instead of on a thread pool,
+    with the same pacing as generate_audio (a pause after each line and between chunks),
+    and assembled in dialogue order once all of them have finished.
+    
+    Args:
+        dialogue_items: List of DialogueItem objects to convert to audio
+        max_chunk_size: Number of lines between the longer pauses
+        max_concurrency: Maximum number of TTS requests in flight at once
+        line_timeout: Timeout in seconds for a single line
+        output_filename: Name of the output audio file
+        output_dir: Directory for the audio and transcript files
+        on_line: Called with (lines finished, total lines) as each line completes or fails
+        
+    Returns:
+        Dict with audio_path, transcript_path, and other metadata
+    """
+    if not dialogue_items:
+        raise ValueError("No dialogue items provided")
+        
+    if not check_api_key():
+        raise ValueError("Cannot generate audio: ElevenLabs API key is not set")
+        
+    logging.info(f"Starting audio generation for {len(dialogue_items)} dialogue items")
+    
+    semaphore = asyncio.Semaphore(max_concurrency)
+    lines_finished = 0
+    
+    async def synthesize(line: DialogueItem) -> bytes:
+        nonlocal lines_finished
+        async with semaphore:
+            try:
+                return await asyncio.wait_for(get_elevenlabs_audio_async(line.text, line.voice_id), timeout=line_timeout)
+            finally:
+                lines_finished += 1
+                if on_line:
+                    on_line(lines_finished, len(dialogue_items))
+                await asyncio.sleep(LINE_PAUSE)
+    
+    results = []
+    # One client for the whole episode, closed when it is done
+    async with elevenlabs_async_client():
+        for i in range(0, len(dialogue_items), max_chunk_size):
+            chunk = dialogue_items[i:i + max_chunk_size]
+            results += await asyncio.gather(*(synthesize(line) for line in chunk), return_exceptions=True)
+            if i + max_chunk_size < len(dialogue_items):
+                logging.info(f"Processed {i + len(chunk)}/{len(dialogue_items)} dialogue items. Pausing to avoid rate limits...")
+                await asyncio.sleep(CHUNK_PAUSE)
+    
+    audio = b""
+    transcript = ""
+    total_processed = 0
+    for line, result in zip(dialogue_items, results):
+        transcript_line = f"{line.speaker}: {line.text}"
+        if isinstance(result, BaseException):
+            logging.error(f"Error generating audio for line: {transcript_line}\nError: {str(result)}")
+            # Add error note to transcript but continue processing
+            transcript += f"[ERROR generating audio for: {transcript_line}]\n\n"
+            continue
+        audio += result
+        transcript += transcript_line + "\n\n"
+        total_processed += 1
+    
+    logging.info(f"Generated audio for {total_processed}/{len(dialogue_items)} dialogue items")
+    return _save_podcast_files(audio, transcript, dialogue_items, total_processed, output_filename, output_dir)
 
+def _save_podcast_files(audio: bytes, transcript: str, dialogue_items: List[DialogueItem], total_processed: int,
+                        output_filename: str, output_dir: str = ".") -> dict:
+    """Write the rendered audio and transcript and describe the result."""
     # Save audio to file
     if audio:
         try:
-            with open(output_filename, "wb") as f:
+            audio_path = os.path.join(output_dir, output_filename)
+            with open(audio_path, "wb") as f:
                 f.write(audio)
-            logging.info(f"Audio saved to {output_filename}")
-            audio_path = output_filename
+            logging.info(f"Audio saved to {audio_path}")
         except Exception as e:
             logging.error(f"Failed to save audio file: {e}")
             raise ValueError(f"Failed to save audio file: {e}")
@@ -209,7 +405,7 @@ def generate_audio(dialogue_items: List[DialogueItem], max_chunk_size: int = 5,
         raise ValueError("No audio was generated")
     
     # Save transcript to file
-    transcript_filename = "podcast_transcript.txt"
+    transcript_filename = os.path.join(output_dir, "podcast_transcript.txt")
     try:
         with open(transcript_filename, "w", encoding="utf-8") as f:
             f.write(transcript)
@@ -0,0 +1,194 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import functools
+from typing import Dict, Optional
+
+from services.elevenlabs import TTS_MODEL_ID, VOICE_IDS, VOICE_SETTINGS
+from services.http_cache import cache_root
+
+logger = logging.getLogger("podgem")
+
+# Bump when prompts or post-processing change in a way that should invalidate old episodes
+EPISODE_CACHE_VERSION = 1
+
+# Web pages and company research go stale; file and text sources are keyed by content
+LIVE_SOURCE_MAX_AGE = 24 * 3600
+
+RESULT_FILES = ("audio_path", "transcript_path")
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Hash a file's contents without reading it into memory at once."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def source_fingerprint(content_source: str, source_type: str) -> str:
+    """Identify a source by content for files and text, by name for URLs and companies."""
+    if source_type in ("pdf", "document"):
+        return file_sha256(content_source)
+    if source_type == "text":
+        return hashlib.sha256(content_source.encode("utf-8")).hexdigest()
+    if source_type == "company":
+        return " ".join(content_source.lower().split())
+    return content_source.strip()
+
+def episode_key(prompt: str, system_message: str, content_source: str, source_type: str,
+                max_tokens: Optional[int] = None) -> str:
+    """
+    Cache key for a finished episode: the source, the prompts, the token budget and the
+    voices and TTS settings that render it.
+
+    Raises:
+        OSError: If a file source can't be read
+    """
+    material = {
+        "version": EPISODE_CACHE_VERSION,
+        "source": source_fingerprint(content_source, source_type),
+        "source_type": source_type,
+        "prompt": prompt,
+        "system_message": system_message,
+        "max_tokens": max_tokens,
+        "voices": VOICE_IDS,
+        "tts_model": TTS_MODEL_ID,
+        "voice_settings": VOICE_SETTINGS,
+    }
+    return hashlib.sha256(json.dumps(material, sort_keys=True).encode("utf-8")).hexdigest()
+
+def _link_or_copy(src: str, dst: str):
+    # Episodes are immutable once written, so a hard link is as good as a copy
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+class EpisodeCache:
+    """
+    On-disk cache of rendered episodes (audio, transcript and result metadata).
+
+    Each entry is a directory named by its episode_key, written to a staging directory
+    and renamed into place. Entries are evicted least recently used first once the cache
+    grows past max_bytes; a max_bytes of 0 disables the cache.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def get(self, key: str, max_age: Optional[float] = None) -> Optional[Dict]:
+        """Return the cached result for a key, with paths into the cache, or None."""
+        if not self.enabled:
+            return None
+        entry_dir = self._entry_dir(key)
+        try:
+            with open(os.path.join(entry_dir, "result.json"), "r", encoding="utf-8") as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if max_age is not None and time.time() - result.get("cached_at", 0) > max_age:
+            return None
+        if any(result.get(name) and not os.path.isfile(os.path.join(entry_dir, result[name])) for name in RESULT_FILES):
+            return None
+
+        # The directory mtime doubles as the last-used time for eviction
+        try:
+            os.utime(entry_dir)
+        except OSError:
+            pass
+        for name in RESULT_FILES:
+            if result.get(name):
+                result[name] = os.path.join(entry_dir, result[name])
+        return result
+
+    def put(self, key: str, result: Dict) -> bool:
+        """
+        Store a finished episode's files and metadata.
+
+        Returns:
+            True if the episode was cached
+        """
+        if not self.enabled:
+            return False
+        entry_dir = self._entry_dir(key)
+        staging_dir = os.path.join(self.directory, f".{key}.{os.getpid()}.partial")
+        stored = {k: v for k, v in result.items() if k not in ("job_id", "output_dir", "cached")}
+        stored["cached_at"] = time.time()
+        try:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            os.makedirs(staging_dir)
+            for name in RESULT_FILES:
+                if result.get(name):
+                    stored[name] = os.path.basename(result[name])
+                    _link_or_copy(result[name], os.path.join(staging_dir, stored[name]))
+            with open(os.path.join(staging_dir, "result.json"), "w", encoding="utf-8") as f:
+                json.dump(stored, f)
+            if os.path.isdir(entry_dir):
+                shutil.rmtree(entry_dir)
+            os.rename(staging_dir, entry_dir)
+        except OSError as e:
+            logger.warning(f"Could not cache episode {key}: {e}")
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            return False
+
+        self.enforce_quota()
+        return True
+
+    def restore(self, key: str, target_dir: str, max_age: Optional[float] = None) -> Optional[Dict]:
+        """Place a cached episode's files in target_dir and return the result pointing at them."""
+        cached = self.get(key, max_age)
+        if cached is None:
+            return None
+        try:
+            for name in RESULT_FILES:
+                if cached.get(name):
+                    target = os.path.join(target_dir, os.path.basename(cached[name]))
+                    _link_or_copy(cached[name], target)
+                    cached[name] = target
+        except OSError as e:
+            logger.warning(f"Could not restore cached episode {key}: {e}")
+            return None
+        return cached
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.directory) if os.path.isdir(self.directory) else []:
+            path = os.path.join(self.directory, name)
+            if name.startswith(".") or not os.path.isdir(path):
+                continue
+            size = sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+            entries.append((os.stat(path).st_mtime, size, path))
+        return entries
+
+    def enforce_quota(self):
+        """Evict least recently used episodes until the cache fits in max_bytes."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            logger.info(f"Evicted cached episode {os.path.basename(path)}")
+
+@functools.lru_cache(maxsize=None)
+def get_episode_cache() -> EpisodeCache:
+    """Process-wide episode cache under <cache root>/episodes (PODGEM_EPISODE_CACHE_MB, default 500)."""
+    try:
+        max_mb = float(os.getenv("PODGEM_EPISODE_CACHE_MB", "500"))
+    except ValueError:
+        logger.warning("PODGEM_EPISODE_CACHE_MB is not a number, using 500")
+        max_mb = 500.0
+    return EpisodeCache(os.path.join(cache_root(), "episodes"), int(max_mb * 1024 * 1024))
@@ -0,0 +1,90 @@
+import os
+import re
+import json
+import logging
+
+logger = logging.getLogger("podgem")
+
+# Offline stand-ins for the Gemini and ElevenLabs calls, so the batch runner, the HTTP
+# API and the job workers can be exercised end to end without keys or quota. Content
+# extraction (PDF/DOCX reading, web fetching) still runs for real.
+
+# One silent MPEG-1 Layer III frame (128 kbps, 44.1 kHz, ~26 ms)
+SILENT_MP3_FRAME = b"\xff\xfb\x90\x64" + bytes(413)
+
+def fake_backends_requested() -> bool:
+    """Whether PODGEM_FAKE_BACKENDS=1 asks for the offline backends."""
+    return os.getenv("PODGEM_FAKE_BACKENDS", "").strip().lower() in ("1", "true", "yes")
+
+def _history_text(history: list) -> str:
+    texts = []
+    for message in history or []:
+        for part in message.get("parts", []) if isinstance(message, dict) else []:
+            if isinstance(part, dict) and part.get("text"):
+                texts.append(part["text"])
+    return "\n".join(texts)
+
+def _sentences(text: str, limit: int):
+    sentences = [s.strip() for s in re.split(r"(?<=[.!?])\s+|\n+", text) if len(s.strip()) > 20]
+    return sentences[:limit] or ["This is a placeholder line from the offline backend."]
+
+def fake_call_gemini(prompt: str, system_message: str, history: list, response_schema=None, **kwargs) -> str:
+    """Deterministic Gemini stand-in: a short dialogue for structured calls, an excerpt otherwise."""
+    source = _history_text(history) or prompt
+    if response_schema is not None:
+        lines = _sentences(source, 6)
+        return json.dumps([
+            {"speaker": "male-1" if i % 2 == 0 else "female-1", "text": line}
+            for i, line in enumerate(lines)
+        ])
+    return "\n".join(_sentences(source, 12))
+
+async def fake_call_gemini_async(prompt: str, system_message: str, history: list, response_schema=None, **kwargs) -> str:
+    return fake_call_gemini(prompt, system_message, history, response_schema)
+
+class FakeUploadedFile:
+    def __init__(self, path: str, mime_type: str):
+        self.display_name = os.path.basename(path)
+        self.mime_type = mime_type or "application/octet-stream"
+        self.uri = f"fake://files/{self.display_name}"
+
+def fake_upload_to_gemini(path, mime_type=None) -> FakeUploadedFile:
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"File not found: {path}")
+    return FakeUploadedFile(path, mime_type)
+
+def fake_count_gemini_tokens(text: str) -> int:
+    return len(text) // 4
+
+def fake_tts(text: str, voice_id: str, **kwargs) -> bytes:
+    """Silent MP3 roughly as long as the line would take to say."""
+    return SILENT_MP3_FRAME * max(1, len(text) * 3)
+
+async def fake_tts_async(text: str, voice_id: str, **kwargs) -> bytes:
+    return fake_tts(text, voice_id)
+
+def use_fake_backends():
+    """Route the pipeline's Gemini and ElevenLabs calls to the offline stand-ins (process-wide)."""
+    import services.elevenlabs as elevenlabs
+    import services.gemini as gemini
+    import services.pipeline as pipeline
+    from services.episode_cache import EpisodeCache, get_episode_cache
+    from services.http_cache import cache_root
+    from services.prefetch import ChatHistoryCache
+    from services.tokens import get_gemini_estimator
+
+    pipeline.call_gemini = fake_call_gemini
+    pipeline.call_gemini_async = fake_call_gemini_async
+    pipeline.upload_to_gemini = fake_upload_to_gemini
+    gemini.count_gemini_tokens = fake_count_gemini_tokens
+    # Ratios calibrated against the fake counter must not leak into real runs
+    get_gemini_estimator().load(os.path.join(cache_root(), "token_calibration-fake.json"))
+    elevenlabs.get_elevenlabs_audio = fake_tts
+    elevenlabs.get_elevenlabs_audio_async = fake_tts_async
+    elevenlabs.check_api_key = lambda: True
+    # Silent placeholder episodes must never be served to a real run
+    fake_episodes = EpisodeCache(os.path.join(cache_root(), "episodes-fake"), get_episode_cache().max_bytes)
+    pipeline.get_episode_cache = lambda: fake_episodes
+    fake_histories = ChatHistoryCache(os.path.join(cache_root(), "histories-fake"))
+    pipeline.get_history_cache = lambda: fake_histories
+    logger.warning("Using offline fake backends for Gemini and ElevenLabs")
@@ -1,77 +1,576 @@
 import os
-import google.generativeai as genai
+import re
+import random
+import asyncio
+import threading
+import functools
+import weakref
 from dotenv import load_dotenv
 import logging
 import time
+from typing import Dict, List, Optional
 
-# Load environment variables
-load_dotenv()
+from services.singleflight import single_flight
 
-# Configure Gemini API
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if not GEMINI_API_KEY:
-    logging.error("GEMINI_API_KEY is not set in environment variables or .env file")
-    raise ValueError("GEMINI_API_KEY environment variable is required")
+# The google SDK is heavy to import and needs credentials to configure, so both
+# happen on first use through get_gemini_pool() rather than at import time.
 
-genai.configure(api_key=GEMINI_API_KEY)
+def _env_list(name: str, default: str = "") -> List[str]:
+    return [item.strip() for item in os.getenv(name, default).split(",") if item.strip()]
 
-def call_gemini(prompt: str, system_message: str, history: list, max_retries: int = 3, retry_delay: float = 2.0):
+class GeminiQuotaError(ValueError):
+    """Raised when the Gemini quota is exhausted and calls are failing fast."""
+
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class CircuitBreaker:
+    """
+    Process-wide circuit breaker for Gemini quota exhaustion.
+    
+    The breaker opens after `failure_threshold` calls find every key/model rate limited
+    within `failure_window` seconds, or after a single one whose server-provided delay is
+    too long to wait out. While open, every caller fails fast. Once the cooldown elapses
+    the breaker is half-open: exactly one trial call goes through while the others keep
+    failing fast. Success closes the breaker, another exhaustion re-opens it, and a trial
+    that ends any other way (or is abandoned for a whole cooldown) hands the trial to the
+    next caller.
+    """
+
+    def __init__(self, failure_threshold: int = 3, cooldown: float = 30.0, failure_window: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failure_window = failure_window
+        self._lock = threading.Lock()
+        self._failures: List[float] = []
+        self._state = "closed"
+        self._open_until = 0.0
+        self._trial_started = None
+
+    def check(self, holds_trial: bool = False) -> bool:
+        """
+        Let a call through or raise GeminiQuotaError.
+        
+        Returns:
+            True if the caller holds the half-open trial (pass it back on later checks)
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self._state == "closed":
+                return False
+            
+            if self._state == "open":
+                remaining = self._open_until - now
+                if remaining <= 0:
+                    # Cooldown over: old failures no longer count, one caller probes the quota
+                    self._state = "half_open"
+                    self._failures.clear()
+                    self._trial_started = now
+                    logging.info("Gemini circuit breaker half-open, letting one trial call through")
+                    return True
+            else:
+                if holds_trial:
+                    return True
+                if self._trial_started is None or now - self._trial_started > self.cooldown:
+                    self._trial_started = now
+                    return True
+                remaining = self.cooldown - (now - self._trial_started)
+        
+        raise GeminiQuotaError(
+            f"Gemini API quota exhausted; failing fast for another {remaining:.0f}s",
+            retry_after=remaining
+        )
+
+    def describe(self) -> str:
+        """The breaker's state and remaining cooldown, for error messages."""
+        with self._lock:
+            now = time.monotonic()
+            if self._state == "open":
+                return f"circuit breaker open for another {max(0.0, self._open_until - now):.0f}s"
+            if self._state == "half_open":
+                return "circuit breaker half-open, waiting on its trial call"
+            recent = sum(1 for t in self._failures if now - t < self.failure_window)
+            return f"circuit breaker closed, {recent}/{self.failure_threshold} recent exhaustions"
+
+    def record_success(self):
+        with self._lock:
+            if self._state != "closed":
+                logging.info("Gemini circuit breaker closed")
+            self._state = "closed"
+            self._failures.clear()
+            self._trial_started = None
+
+    def release_trial(self):
+        """The trial call ended without telling us anything about the quota."""
+        with self._lock:
+            if self._state == "half_open":
+                self._trial_started = None
+
+    def record_rate_limit(self, retry_after: Optional[float] = None, force_open: bool = False) -> bool:
+        """Record a call that found every slot rate limited. Returns True if the breaker is now open."""
+        with self._lock:
+            now = time.monotonic()
+            self._failures = [t for t in self._failures if now - t < self.failure_window]
+            self._failures.append(now)
+            if force_open or self._state == "half_open" or len(self._failures) >= self.failure_threshold:
+                open_for = max(self.cooldown, retry_after or 0.0)
+                self._state = "open"
+                self._open_until = max(self._open_until, now + open_for)
+                self._trial_started = None
+                logging.error(f"Gemini circuit breaker open for {open_for:.0f}s after {len(self._failures)} rate-limit failures")
+                return True
+            return False
+
+gemini_circuit_breaker = CircuitBreaker()
+
+class _PoolSlot:
+    """One (API key, model) pair in the client pool, with its health and usage counters."""
+
+    def __init__(self, key_index: int, api_key: str, model_name: str):
+        self.key_index = key_index
+        self.api_key = api_key
+        self.model_name = model_name
+        self.cooldown_until = 0.0
+        self.consecutive_rate_limits = 0
+        self.in_flight = 0
+        self.requests = 0
+        self.successes = 0
+        self.failures = 0
+        self.rate_limits = 0
+        self.last_used = 0.0
+
+    def available(self, now: float) -> bool:
+        return self.cooldown_until <= now
+
+    def stats(self, now: float) -> Dict:
+        return {
+            "key": f"key-{self.key_index}",
+            "model": self.model_name,
+            "healthy": self.available(now),
+            "cooldown_remaining": max(0.0, self.cooldown_until - now),
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "successes": self.successes,
+            "failures": self.failures,
+            "rate_limits": self.rate_limits,
+        }
+
+class GeminiClientPool:
+    """
+    Spread Gemini calls across several API keys and fall back to alternate models.
+    
+    Calls go to the least-loaded healthy key for the primary model. A slot that gets
+    rate-limited cools down (for the server-provided delay when there is one) and traffic
+    moves to the other keys; only when the primary model is cooling on every key do calls
+    fall back to the next model in the list.
+    """
+
+    def __init__(self, api_keys: List[str], models: List[str], base_cooldown: float = 2.0, max_cooldown: float = 60.0):
+        if not api_keys:
+            raise ValueError("GeminiClientPool needs at least one API key")
+        self.api_keys = list(dict.fromkeys(api_keys))
+        self.default_key = self.api_keys[0]
+        self.models = list(dict.fromkeys(models))
+        self.base_cooldown = base_cooldown
+        self.max_cooldown = max_cooldown
+        self._lock = threading.Lock()
+        self._clients = {}
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._slots = [
+            _PoolSlot(key_index, api_key, model_name)
+            for model_name in self.models
+            for key_index, api_key in enumerate(self.api_keys)
+        ]
+
+    def _client_for(self, api_key: str):
+        with self._lock:
+            if api_key not in self._clients:
+                import google.ai.generativelanguage as glm
+                self._clients[api_key] = glm.GenerativeServiceClient(client_options={"api_key": api_key})
+            return self._clients[api_key]
+
+    def acquire(self, pinned_key: Optional[str] = None) -> Optional[_PoolSlot]:
+        """Reserve the best available slot, or return None if every slot is cooling down."""
+        now = time.monotonic()
+        with self._lock:
+            for model_name in self.models:
+                candidates = [
+                    slot for slot in self._slots
+                    if slot.model_name == model_name and slot.available(now)
+                    and (pinned_key is None or slot.api_key == pinned_key)
+                ]
+                if candidates:
+                    slot = min(candidates, key=lambda c: (c.in_flight, c.last_used))
+                    slot.in_flight += 1
+                    slot.requests += 1
+                    slot.last_used = now
+                    return slot
+        return None
+
+    def _async_client_for(self, api_key: str):
+        # gRPC asyncio channels belong to the event loop they were created on
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = self._async_clients.setdefault(loop, {})
+            if api_key not in clients:
+                import google.ai.generativelanguage as glm
+                clients[api_key] = glm.GenerativeServiceAsyncClient(client_options={"api_key": api_key})
+            return clients[api_key]
+
+    def model_for(self, slot: _PoolSlot, generation_config: dict, system_message: str, use_async: bool = False):
+        """Build a GenerativeModel bound to the slot's key and model."""
+        import google.generativeai as genai
+        model = genai.GenerativeModel(
+            model_name=slot.model_name,
+            generation_config=generation_config,
+            system_instruction=system_message
+        )
+        # genai.configure is process-global, so bind the per-key client directly
+        if use_async:
+            model._async_client = self._async_client_for(slot.api_key)
+        else:
+            model._client = self._client_for(slot.api_key)
+        return model
+
+    def record_success(self, slot: _PoolSlot):
+        with self._lock:
+            slot.in_flight -= 1
+            slot.successes += 1
+            slot.consecutive_rate_limits = 0
+
+    def record_failure(self, slot: _PoolSlot):
+        with self._lock:
+            slot.in_flight -= 1
+            slot.failures += 1
+
+    def record_rate_limit(self, slot: _PoolSlot, retry_after: Optional[float] = None):
+        """Put a slot into cooldown after a rate-limit error."""
+        with self._lock:
+            slot.in_flight -= 1
+            slot.failures += 1
+            slot.rate_limits += 1
+            slot.consecutive_rate_limits += 1
+            if not retry_after or retry_after <= 0:
+                retry_after = min(self.max_cooldown, self.base_cooldown * (2 ** slot.consecutive_rate_limits))
+            slot.cooldown_until = time.monotonic() + retry_after
+        logging.warning(f"Gemini key-{slot.key_index} / {slot.model_name} rate-limited, cooling down for {retry_after:.1f}s")
+
+    def next_available_in(self, pinned_key: Optional[str] = None) -> float:
+        """Seconds until the first slot comes out of cooldown (0 if one is available now)."""
+        now = time.monotonic()
+        with self._lock:
+            cooldowns = [
+                slot.cooldown_until - now for slot in self._slots
+                if pinned_key is None or slot.api_key == pinned_key
+            ]
+        return max(0.0, min(cooldowns)) if cooldowns else 0.0
+
+    def stats(self) -> List[Dict]:
+        """Per key/model health and usage counters."""
+        now = time.monotonic()
+        with self._lock:
+            return [slot.stats(now) for slot in self._slots]
+
+@functools.lru_cache(maxsize=None)
+def get_gemini_pool() -> GeminiClientPool:
+    """
+    Configure the Gemini SDK and build the client pool on first use.
+    
+    Environment:
+        GEMINI_API_KEY: Default key, also used for file uploads
+        GEMINI_API_KEYS: Extra comma-separated keys (e.g. from other projects) to spread load across
+        GEMINI_MODEL: Primary model
+        GEMINI_FALLBACK_MODELS: Comma-separated models to fall back to when the primary is rate-limited
+        
+    Raises:
+        ValueError: If no Gemini API key is configured
+    """
+    load_dotenv()
+    
+    api_keys = _env_list("GEMINI_API_KEY") + _env_list("GEMINI_API_KEYS")
+    if not api_keys:
+        logging.error("GEMINI_API_KEY is not set in environment variables or .env file")
+        raise ValueError("GEMINI_API_KEY environment variable is required")
+    
+    import google.generativeai as genai
+    # The default key also serves file uploads (upload_to_gemini)
+    genai.configure(api_key=api_keys[0])
+    
+    models = [os.getenv("GEMINI_MODEL", "gemini-2.0-flash-exp")] + _env_list("GEMINI_FALLBACK_MODELS", "gemini-1.5-flash")
+    return GeminiClientPool(api_keys, models)
+
+def _history_uses_files(history: list) -> bool:
+    """Uploaded files belong to the key that uploaded them, so such chats must stay on it."""
+    for message in history or []:
+        for part in message.get("parts", []) if isinstance(message, dict) else []:
+            if isinstance(part, dict) and "file_data" in part:
+                return True
+    return False
+
+def _classify_error(error: Exception) -> str:
+    """Classify a Gemini error as 'rate_limit', 'transient' or 'fatal'."""
+    from google.api_core import exceptions as google_exceptions
+    
+    if isinstance(error, google_exceptions.TooManyRequests):  # includes ResourceExhausted
+        return "rate_limit"
+    if isinstance(error, (google_exceptions.ServerError, google_exceptions.DeadlineExceeded)):
+        return "transient"
+    if isinstance(error, google_exceptions.ClientError):
+        return "fatal"
+    return "transient"
+
+def _parse_duration(value) -> Optional[float]:
+    """Convert a protobuf Duration, '12s'-style string or number into seconds."""
+    if value is None:
+        return None
+    if hasattr(value, "seconds"):
+        return value.seconds + getattr(value, "nanos", 0) / 1e9
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = re.match(r'^\s*(\d+(?:\.\d+)?)\s*s?\s*$', str(value))
+    return float(match.group(1)) if match else None
+
+def _server_retry_delay(error: Exception) -> Optional[float]:
+    """Extract the retry delay the server asked for, if any."""
+    # google.rpc.RetryInfo details (protobuf over gRPC, dicts over REST)
+    for detail in getattr(error, "details", None) or []:
+        if isinstance(detail, dict):
+            delay = _parse_duration(detail.get("retryDelay") or detail.get("retry_delay"))
+        else:
+            delay = _parse_duration(getattr(detail, "retry_delay", None))
+        if delay is not None:
+            return delay
+    
+    # Retry-After header on the underlying HTTP response
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    delay = _parse_duration(headers.get("Retry-After")) if hasattr(headers, "get") else None
+    if delay is not None:
+        return delay
+    
+    # Last resort: the delay is sometimes only present in the message text
+    match = re.search(r'retry(?:_delay)?\D{0,20}?(\d+(?:\.\d+)?)\s*s', str(error), re.IGNORECASE)
+    return float(match.group(1)) if match else None
+
+def _backoff_delay(attempt: int, base_delay: float, max_backoff: float) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)]."""
+    return random.uniform(0, min(max_backoff, base_delay * (2 ** attempt)))
+
+class _GeminiRetryPolicy:
+    """
+    Retry and rate-limit bookkeeping for a single Gemini call.
+    
+    Shared by call_gemini and call_gemini_async so both follow the same policy: a
+    rate-limited key/model cools down for the server-provided retry delay (or an
+    exponential cooldown) while the call moves on to another key or fallback model;
+    other errors back off with full jitter. When every slot is exhausted the process-wide
+    circuit breaker trips so concurrent sessions fail fast instead of queueing up behind
+    the same quota. The caller only performs the request and the sleeps.
+    """
+
+    def __init__(self, history: list, max_retries: int, retry_delay: float, max_backoff: float, max_server_wait: float):
+        self.pool = get_gemini_pool()
+        self.pinned_key = self.pool.default_key if _history_uses_files(history) else None
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.max_backoff = max_backoff
+        self.max_server_wait = max_server_wait
+        self.retry_count = 0
+        self.last_error = None
+        self.holds_trial = False
+        self.reported_exhaustion = False
+
+    @property
+    def exhausted(self) -> bool:
+        return self.retry_count >= self.max_retries
+
+    def next_slot(self):
+        """
+        Pick the slot for the next attempt.
+        
+        Returns:
+            (slot, 0) to attempt now, or (None, wait_time) when every slot is cooling down
+            
+        Raises:
+            GeminiQuotaError: If the breaker is open or the quota is exhausted everywhere
+        """
+        self.holds_trial = gemini_circuit_breaker.check(self.holds_trial)
+        
+        slot = self.pool.acquire(self.pinned_key)
+        if slot is not None:
+            return slot, 0.0
+        
+        # Every key/model is cooling down: wait for the first to recover or fail fast
+        self.retry_count += 1
+        wait_time = self.pool.next_available_in(self.pinned_key)
+        too_long = wait_time > self.max_server_wait
+        opened = False
+        # Each call counts once towards the breaker, so one call's retries can't trip it alone
+        if too_long or self.holds_trial or not self.reported_exhaustion:
+            self.reported_exhaustion = True
+            opened = gemini_circuit_breaker.record_rate_limit(wait_time, force_open=too_long)
+        if opened or self.exhausted:
+            if not opened:
+                self._release_trial()
+            # Without a last error every slot was already cooling down before this call tried one
+            reason = f"last error: {self.last_error}" if self.last_error is not None else \
+                f"every key and model cooling down for {wait_time:.0f}s, {gemini_circuit_breaker.describe()}"
+            raise GeminiQuotaError(
+                f"Gemini API quota exceeded on all keys and models ({reason})",
+                retry_after=wait_time
+            )
+        wait_time += random.uniform(0, self.retry_delay)
+        logging.warning(f"Rate limit or quota exceeded on all keys. Waiting {wait_time:.2f}s before retry {self.retry_count}/{self.max_retries}")
+        return None, wait_time
+
+    def succeeded(self, slot: _PoolSlot):
+        self.pool.record_success(slot)
+        gemini_circuit_breaker.record_success()
+        self.holds_trial = False
+
+    def _release_trial(self):
+        if self.holds_trial:
+            gemini_circuit_breaker.release_trial()
+            self.holds_trial = False
+
+    def failed(self, slot: _PoolSlot, error: Exception) -> float:
+        """
+        Record a failed attempt and return how long to wait before the next one.
+        
+        Raises:
+            Exception: The original error if it is not retryable
+        """
+        self.last_error = error
+        error_kind = _classify_error(error)
+        
+        if error_kind == "rate_limit":
+            # Move on to another key or model; the slot cools down meanwhile
+            self.pool.record_rate_limit(slot, _server_retry_delay(error))
+            return 0.0
+        
+        self.pool.record_failure(slot)
+        self.retry_count += 1
+        
+        if error_kind == "fatal":
+            logging.error(f"Non-retryable error from Gemini API: {error}")
+            self._release_trial()
+            raise error
+        
+        if self.exhausted:
+            return 0.0
+        
+        wait_time = _backoff_delay(self.retry_count, self.retry_delay, self.max_backoff)
+        logging.warning(f"Error with Gemini API: {error}. Retrying {self.retry_count}/{self.max_retries} in {wait_time:.2f}s...")
+        return wait_time
+
+    def give_up(self):
+        self._release_trial()
+        logging.error(f"Failed to get response from Gemini after {self.max_retries} retries. Last error: {self.last_error}")
+        raise self.last_error or Exception("Failed to generate response from Gemini API")
+
+def _generation_config(response_schema=None) -> dict:
+    generation_config = {
+        "temperature": 0.8,
+        "top_p": 0.9,
+        "top_k": 40,
+        "max_output_tokens": 8192,
+    }
+    
+    if response_schema is not None:
+        generation_config["response_mime_type"] = "application/json"
+        generation_config["response_schema"] = response_schema
+    
+    return generation_config
+
+@single_flight
+def call_gemini(prompt: str, system_message: str, history: list, max_retries: int = 3, retry_delay: float = 2.0,
+                response_schema=None, max_backoff: float = 30.0, max_server_wait: float = 60.0):
     """
     Generate a dialogue using the Gemini API with error handling and retries.
     
+    Calls are spread over the client pool. A rate-limited key/model cools down for the
+    server-provided retry delay (or an exponential cooldown) while the call moves on to
+    another key or fallback model; other errors back off with full jitter. When every slot
+    is exhausted the process-wide circuit breaker trips so concurrent sessions fail fast
+    instead of queueing up behind the same quota. Concurrent identical calls (same prompt,
+    history and settings) share one request.
+    
     Args:
         prompt: The prompt to send to Gemini
         system_message: System instruction for the model
         history: Chat history for context
         max_retries: Maximum number of retry attempts
-        retry_delay: Delay between retries
+        retry_delay: Base delay for exponential backoff between retries
+        response_schema: Optional schema; when set the response is constrained to matching JSON
+        max_backoff: Upper bound for a single jittered backoff delay
+        max_server_wait: Longest server-requested delay we will sleep through before failing fast
         
     Returns:
         Generated text response
-    """
-    generation_config = {
-        "temperature": 0.8,
-        "top_p": 0.9,
-        "top_k": 40,
-        "max_output_tokens": 8192,
-    }
         
-    model = genai.GenerativeModel(
-        model_name="gemini-2.0-flash-exp",
-        generation_config=generation_config,
-        system_instruction=system_message
-    )
-    
-    retry_count = 0
-    last_error = None
+    Raises:
+        GeminiQuotaError: If the quota is exhausted or the circuit breaker is open
+    """
+    generation_config = _generation_config(response_schema)
+    policy = _GeminiRetryPolicy(history, max_retries, retry_delay, max_backoff, max_server_wait)
     
-    while retry_count < max_retries:
+    while not policy.exhausted:
+        slot, wait_time = policy.next_slot()
+        if slot is None:
+            time.sleep(wait_time)
+            continue
+        
         try:
+            model = policy.pool.model_for(slot, generation_config, system_message)
             chat_session = model.start_chat(history=history)
             response = chat_session.send_message(prompt)
             
             if response.text:
+                policy.succeeded(slot)
                 return response.text
             else:
                 raise ValueError("Empty response from Gemini API")
                 
         except Exception as e:
-            last_error = e
-            retry_count += 1
+            time.sleep(policy.failed(slot, e))
+    
+    # If all retries failed
+    policy.give_up()
+
+async def call_gemini_async(prompt: str, system_message: str, history: list, max_retries: int = 3, retry_delay: float = 2.0,
+                            response_schema=None, max_backoff: float = 30.0, max_server_wait: float = 60.0):
+    """
+    Asyncio counterpart of call_gemini with the same pool, retry and circuit-breaker policy.
+    
+    Waiting on the API does not hold an OS thread, so one event loop can keep many
+    requests in flight.
+    """
+    generation_config = _generation_config(response_schema)
+    policy = _GeminiRetryPolicy(history, max_retries, retry_delay, max_backoff, max_server_wait)
+    
+    while not policy.exhausted:
+        slot, wait_time = policy.next_slot()
+        if slot is None:
+            await asyncio.sleep(wait_time)
+            continue
+        
+        try:
+            model = policy.pool.model_for(slot, generation_config, system_message, use_async=True)
+            chat_session = model.start_chat(history=history)
+            response = await chat_session.send_message_async(prompt)
             
-            if "quota" in str(e).lower() or "rate" in str(e).lower():
-                wait_time = retry_delay * (2 ** retry_count)
-                logging.warning(f"Rate limit or quota exceeded. Waiting {wait_time:.2f}s before retry {retry_count}/{max_retries}")
-                time.sleep(wait_time)
-            elif retry_count < max_retries:
-                logging.warning(f"Error with Gemini API: {e}. Retrying {retry_count}/{max_retries}...")
-                time.sleep(retry_delay)
+            if response.text:
+                policy.succeeded(slot)
+                return response.text
             else:
-                break
+                raise ValueError("Empty response from Gemini API")
+                
+        except Exception as e:
+            await asyncio.sleep(policy.failed(slot, e))
     
     # If all retries failed
-    logging.error(f"Failed to get response from Gemini after {max_retries} retries. Last error: {last_error}")
-    raise last_error or Exception("Failed to generate response from Gemini API")
+    policy.give_up()
 
 def upload_to_gemini(path, mime_type=None):
     """
@@ -87,10 +586,47 @@ def upload_to_gemini(path, mime_type=None):
     if not os.path.exists(path):
         raise FileNotFoundError(f"File not found: {path}")
         
+    get_gemini_pool()
+    import google.generativeai as genai
+    
     try:
         file = genai.upload_file(path, mime_type=mime_type)
         logging.info(f"Uploaded file '{file.display_name}' as: {file.uri}")
         return file
     except Exception as e:
         logging.error(f"Failed to upload file to Gemini: {e}")
-        raise ValueError(f"Failed to upload file to Gemini: {e}")
\ No newline at end of file
+        raise ValueError(f"Failed to upload file to Gemini: {e}")
+
+def count_gemini_tokens(text: str) -> int:
+    """
+    Count tokens for a text with Gemini's own tokenizer (countTokens API).
+    
+    Goes through the client pool like generation: it fails fast while the circuit breaker
+    is open or every key is cooling down, and a rate limit cools down the key it hit. It
+    makes a single attempt, since callers fall back to an estimate.
+    
+    Raises:
+        ValueError: If no Gemini API key is configured
+        GeminiQuotaError: If the breaker is open or every key/model is cooling down
+    """
+    # A token count says nothing about generation quota, so it never keeps a half-open trial
+    if gemini_circuit_breaker.check():
+        gemini_circuit_breaker.release_trial()
+    
+    pool = get_gemini_pool()
+    slot = pool.acquire()
+    if slot is None:
+        wait_time = pool.next_available_in()
+        raise GeminiQuotaError(f"Every Gemini key and model is cooling down for {wait_time:.0f}s", retry_after=wait_time)
+    
+    try:
+        count = pool.model_for(slot, None, None).count_tokens(text).total_tokens
+    except Exception as e:
+        if _classify_error(e) == "rate_limit":
+            retry_after = _server_retry_delay(e)
+            pool.record_rate_limit(slot, retry_after)
+            raise GeminiQuotaError(f"countTokens rate-limited: {e}", retry_after=retry_after or 0.0) from e
+        pool.record_failure(slot)
+        raise
+    pool.record_success(slot)
+    return count
@@ -0,0 +1,112 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+import functools
+from typing import Dict, Optional
+
+logger = logging.getLogger("podgem")
+
+def cache_root() -> str:
+    """Root directory for PodGem's on-disk caches (PODGEM_CACHE_DIR, default .podgem_cache)."""
+    return os.getenv("PODGEM_CACHE_DIR", ".podgem_cache")
+
+def _atomic_write(path: str, data: bytes):
+    # Per thread, not just per process: a prefetch and a crawl can write the same URL at once
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+class HttpCache:
+    """
+    On-disk cache of fetched pages for conditional GETs.
+
+    Each URL keeps its raw body, its validators (ETag / Last-Modified) and the
+    extraction result. Callers send the validators back with the next request and, on a
+    304, reuse the stored extraction without downloading or parsing the page again.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, url: str):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.directory, key)
+        return f"{base}.json", f"{base}.body"
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Return the cached entry for a URL, or None."""
+        meta_path, _ = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get("url") == url else None
+
+    def get_body(self, url: str) -> Optional[bytes]:
+        """Return the cached raw body for a URL, or None."""
+        _, body_path = self._paths(url)
+        try:
+            with open(body_path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    @staticmethod
+    def conditional_headers(entry: Optional[Dict]) -> Dict[str, str]:
+        """Request headers that ask the server to revalidate a cached entry."""
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, url: str, response_headers, body: bytes, extracted: Dict, extractor_version: int) -> bool:
+        """
+        Cache a fetched page if the server gave us something to revalidate against.
+
+        Returns:
+            True if the page was cached
+        """
+        etag = response_headers.get("ETag")
+        last_modified = response_headers.get("Last-Modified")
+        if not (etag or last_modified) or "no-store" in response_headers.get("Cache-Control", "").lower():
+            return False
+
+        meta_path, body_path = self._paths(url)
+        entry = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": time.time(),
+            "extractor_version": extractor_version,
+            "extracted": extracted,
+        }
+        try:
+            _atomic_write(body_path, body)
+            _atomic_write(meta_path, json.dumps(entry).encode("utf-8"))
+            return True
+        except OSError as e:
+            logger.warning(f"Could not write HTTP cache entry for {url}: {e}")
+            return False
+
+    def update_extraction(self, entry: Dict, extracted: Dict, extractor_version: int):
+        """Replace the stored extraction for an entry (e.g. after the extractor changed)."""
+        meta_path, _ = self._paths(entry["url"])
+        entry = dict(entry, extracted=extracted, extractor_version=extractor_version)
+        try:
+            _atomic_write(meta_path, json.dumps(entry).encode("utf-8"))
+        except OSError as e:
+            logger.warning(f"Could not update HTTP cache entry for {entry['url']}: {e}")
+
+@functools.lru_cache(maxsize=None)
+def get_http_cache() -> HttpCache:
+    """Process-wide HTTP cache under <cache root>/http."""
+    return HttpCache(os.path.join(cache_root(), "http"))
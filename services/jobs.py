@@ -0,0 +1,346 @@
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import logging
+import argparse
+import functools
+import threading
+import contextlib
+import multiprocessing
+from typing import Dict, List, Optional, Tuple
+
+from services.fakes import fake_backends_requested, use_fake_backends
+from services.http_cache import cache_root
+
+logger = logging.getLogger("podgem")
+
+JOB_STATUSES = ("queued", "running", "succeeded", "failed")
+FINISHED_STATUSES = ("succeeded", "failed")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    params TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    heartbeat_at REAL,
+    progress TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at);
+"""
+
+class JobStore:
+    """
+    Durable podcast job queue in SQLite, shared by UI sessions and worker processes.
+
+    Jobs move queued → running → succeeded/failed. Workers claim jobs inside an
+    immediate transaction so each job runs once, and keep a heartbeat while they work;
+    a running job whose heartbeat goes stale (the worker died) is put back in the queue,
+    or failed once it has used up its attempts.
+    """
+
+    def __init__(self, path: str, stale_after: float = 120.0, max_attempts: int = 2):
+        self.path = path
+        self.stale_after = stale_after
+        self.max_attempts = max_attempts
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            # Databases created before progress reporting lack the column
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "progress" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN progress TEXT")
+
+    @contextlib.contextmanager
+    def _connection(self):
+        conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        with self._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    @staticmethod
+    def _decode(row: sqlite3.Row) -> Dict:
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        job["progress"] = json.loads(job["progress"]) if job["progress"] else None
+        return job
+
+    def submit(self, params: Dict) -> str:
+        """Queue a job with generate_podcast keyword arguments and return its id."""
+        job_id = uuid.uuid4().hex
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, params, created_at) VALUES (?, 'queued', ?, ?)",
+                (job_id, json.dumps(params, sort_keys=True), time.time())
+            )
+        logger.info(f"Queued job {job_id}")
+        return job_id
+
+    def submit_or_join(self, params: Dict) -> Tuple[str, bool]:
+        """
+        Queue a job unless an identical one is already queued or running.
+
+        Returns:
+            (job id, True if an in-flight job was joined instead of queueing a new one)
+        """
+        encoded = json.dumps(params, sort_keys=True)
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status IN ('queued', 'running') AND params = ? "
+                "ORDER BY created_at LIMIT 1",
+                (encoded,)
+            ).fetchone()
+            if row is not None:
+                return row["id"], True
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO jobs (id, status, params, created_at) VALUES (?, 'queued', ?, ?)",
+                (job_id, encoded, time.time())
+            )
+        logger.info(f"Queued job {job_id}")
+        return job_id, False
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Status, params, result and error of a job, or None if the id is unknown."""
+        with self._connection() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._decode(row) if row else None
+
+    def list(self, status: Optional[str] = None, limit: int = 50) -> List[Dict]:
+        """Most recent jobs, optionally filtered by status."""
+        query, args = "SELECT * FROM jobs", ()
+        if status:
+            query, args = query + " WHERE status = ?", (status,)
+        with self._connection() as conn:
+            rows = conn.execute(query + " ORDER BY created_at DESC LIMIT ?", args + (limit,)).fetchall()
+        return [self._decode(row) for row in rows]
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs in each status."""
+        with self._connection() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = dict.fromkeys(JOB_STATUSES, 0)
+        counts.update({status: count for status, count in rows})
+        return counts
+
+    def _recover_stale(self, conn: sqlite3.Connection, now: float):
+        cutoff = now - self.stale_after
+        conn.execute(
+            "UPDATE jobs SET status = 'failed', error = 'Worker stopped responding', finished_at = ? "
+            "WHERE status = 'running' AND heartbeat_at < ? AND attempts >= ?",
+            (now, cutoff, self.max_attempts)
+        )
+        requeued = conn.execute(
+            "UPDATE jobs SET status = 'queued', worker = NULL WHERE status = 'running' AND heartbeat_at < ?",
+            (cutoff,)
+        ).rowcount
+        if requeued:
+            logger.warning(f"Re-queued {requeued} jobs from unresponsive workers")
+
+    def claim(self, worker_id: str) -> Optional[Dict]:
+        """Take the oldest queued job for a worker, or return None if the queue is empty."""
+        now = time.time()
+        with self._transaction() as conn:
+            self._recover_stale(conn, now)
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, attempts = attempts + 1, "
+                "started_at = ?, heartbeat_at = ?, progress = NULL WHERE id = ?",
+                (worker_id, now, now, row["id"])
+            )
+            return self._decode(conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone())
+
+    def heartbeat(self, job_id: str, worker_id: str):
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                (time.time(), job_id, worker_id)
+            )
+
+    def update_progress(self, job_id: str, worker_id: str, progress: Dict):
+        """Store the latest progress snapshot of a running job (also counts as a heartbeat)."""
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE jobs SET progress = ?, heartbeat_at = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                (json.dumps(progress), time.time(), job_id, worker_id)
+            )
+
+    def complete(self, job_id: str, worker_id: str, result: Dict):
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'succeeded', result = ?, error = NULL, finished_at = ? "
+                "WHERE id = ? AND worker = ?",
+                (json.dumps(result), time.time(), job_id, worker_id)
+            )
+
+    def fail(self, job_id: str, worker_id: str, error: str):
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ? AND worker = ?",
+                (error, time.time(), job_id, worker_id)
+            )
+
+def jobs_db_path() -> str:
+    """SQLite job database (PODGEM_JOBS_DB, default <cache root>/jobs.sqlite3)."""
+    return os.getenv("PODGEM_JOBS_DB") or os.path.join(cache_root(), "jobs.sqlite3")
+
+@functools.lru_cache(maxsize=None)
+def get_job_store() -> JobStore:
+    """Process-wide job store."""
+    return JobStore(jobs_db_path())
+
+def execute_job(store: JobStore, job: Dict, worker_id: str, heartbeat_interval: float = 15.0,
+                progress_interval: float = 0.5):
+    """Run one claimed job through generate_podcast, heartbeating and recording progress until it finishes."""
+    from services.pipeline import generate_podcast
+
+    done = threading.Event()
+    last_progress = {"at": 0.0, "stage": None}
+
+    def record_progress(snapshot: Dict):
+        # Per-line updates can be frequent; stage changes are always written
+        now = time.monotonic()
+        if snapshot["status"] == "update" and snapshot["stage"] == last_progress["stage"] \
+                and now - last_progress["at"] < progress_interval:
+            return
+        last_progress.update(at=now, stage=snapshot["stage"])
+        try:
+            store.update_progress(job["id"], worker_id, snapshot)
+        except sqlite3.Error as e:
+            logger.warning(f"Progress update for job {job['id']} failed: {e}")
+
+    def beat():
+        while not done.wait(heartbeat_interval):
+            try:
+                store.heartbeat(job["id"], worker_id)
+            except sqlite3.Error as e:
+                logger.warning(f"Heartbeat for job {job['id']} failed: {e}")
+
+    heartbeat = threading.Thread(target=beat, daemon=True)
+    heartbeat.start()
+    logger.info(f"Worker {worker_id} running job {job['id']} (attempt {job['attempts']})")
+    try:
+        # The job id doubles as the workspace id, so a retried job reuses its output directory
+        result = generate_podcast(**job["params"], job_id=job["id"], progress=record_progress)
+        store.complete(job["id"], worker_id, result)
+        logger.info(f"Job {job['id']} succeeded")
+    except Exception as e:
+        store.fail(job["id"], worker_id, str(e))
+        logger.error(f"Job {job['id']} failed: {e}")
+    finally:
+        done.set()
+        heartbeat.join()
+
+def run_worker(store_path: Optional[str] = None, poll_interval: float = 1.0, stop_event=None):
+    """Claim and run jobs until stop_event is set."""
+    store = JobStore(store_path) if store_path else get_job_store()
+    worker_id = f"{socket.gethostname()}-{os.getpid()}"
+    logger.info(f"Job worker {worker_id} started")
+
+    while stop_event is None or not stop_event.is_set():
+        try:
+            job = store.claim(worker_id)
+        except sqlite3.Error as e:
+            logger.warning(f"Could not claim a job: {e}")
+            job = None
+        if job is None:
+            if stop_event is not None:
+                stop_event.wait(poll_interval)
+            else:
+                time.sleep(poll_interval)
+            continue
+        execute_job(store, job, worker_id)
+
+def _worker_process(store_path: str, poll_interval: float, stop_event):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(name)s - %(message)s')
+    if fake_backends_requested():
+        use_fake_backends()
+    try:
+        run_worker(store_path, poll_interval, stop_event)
+    except KeyboardInterrupt:
+        pass
+
+class WorkerPool:
+    """A set of worker processes draining the job queue; independent of any UI session."""
+
+    def __init__(self, num_workers: int = 2, store_path: Optional[str] = None, poll_interval: float = 1.0):
+        self.num_workers = num_workers
+        self.store_path = store_path or jobs_db_path()
+        self.poll_interval = poll_interval
+        # Spawned (not forked) so workers don't inherit the parent's threads and sockets
+        self._context = multiprocessing.get_context("spawn")
+        self._stop_event = self._context.Event()
+        self._processes = []
+
+    def start(self):
+        # Create the schema once before the workers race to do it
+        JobStore(self.store_path)
+        for _ in range(self.num_workers):
+            process = self._context.Process(
+                target=_worker_process,
+                args=(self.store_path, self.poll_interval, self._stop_event),
+                daemon=True
+            )
+            process.start()
+            self._processes.append(process)
+        logger.info(f"Started {self.num_workers} job workers")
+
+    def alive(self) -> int:
+        return sum(1 for process in self._processes if process.is_alive())
+
+    def stop(self, timeout: float = 10.0):
+        """Ask workers to stop after their current job, then terminate stragglers."""
+        self._stop_event.set()
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+
+def main():
+    parser = argparse.ArgumentParser(description="Run PodGem job workers")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("PODGEM_WORKERS", "2")))
+    parser.add_argument("--db", default=jobs_db_path(), help="SQLite job database")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(name)s - %(message)s')
+    pool = WorkerPool(args.workers, args.db)
+    pool.start()
+    try:
+        while pool.alive():
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        logger.info("Stopping job workers...")
+    finally:
+        pool.stop()
+
+if __name__ == "__main__":
+    main()
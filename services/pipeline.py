@@ -0,0 +1,471 @@
+import os
+import asyncio
+import logging
+import re
+from typing import Dict, List, Optional
+
+from services.crawl import crawl_website
+from services.dedupe import dedupe_text
+from services.dialogue import DIALOGUE_FORMAT_NOTE, DIALOGUE_SCHEMA, parse_dialogue
+from services.documents import read_document_text, read_pdf_text
+from services.elevenlabs import generate_audio, generate_audio_async
+from services.episode_cache import LIVE_SOURCE_MAX_AGE, episode_key, get_episode_cache
+from services.gemini import call_gemini, call_gemini_async, upload_to_gemini
+from services.prefetch import get_history_cache, history_key
+from services.progress import STAGE_WEIGHTS, ProgressCallback, ProgressTracker
+from services.tokens import estimate_gemini_tokens, exceeds_gemini_budget
+from services.web import extract_website_content
+from services.workspace import JobWorkspace
+
+logger = logging.getLogger("podgem")
+
+# Budgets are in Gemini tokens (see services.tokens.GeminiTokenEstimator)
+WEBSITE_TOKEN_BUDGET = 6000
+TEXT_TOKEN_BUDGET = 8000
+MIN_SUMMARY_TOKENS = 1000
+
+LENGTH_SETTINGS = {
+    "short": "a concise 2-3 paragraph summary",
+    "medium": "a detailed 4-6 paragraph summary with key points",
+    "long": "a comprehensive summary that preserves most important details and examples"
+}
+
+# The prompt builders below are shared by the blocking and asyncio variants of each stage
+
+def _summarize_request(content: str, target_length: str):
+    target = LENGTH_SETTINGS.get(target_length, LENGTH_SETTINGS["medium"])
+    
+    prompt = f"""
+    Summarize the following content into {target}. Preserve the most important information, 
+    key concepts, and any specific data or statistics that would be valuable in a podcast discussion.
+    Focus on creating a coherent narrative that could be used as source material for a podcast.
+    
+    CONTENT TO SUMMARIZE:
+    {content}
+    """
+    
+    system_message = "You are an expert content summarizer who maintains the key information while reducing length."
+    return prompt, system_message
+
+def _topics_request(content: str, num_topics: int):
+    prompt = f"""
+    Identify the {num_topics} most important topics or themes in the following content.
+    For each topic, provide a short phrase (3-5 words) that accurately describes it.
+    Format your response as a simple list of topics, one per line.
+    
+    CONTENT:
+    {content}
+    """
+    
+    system_message = "You are an expert at identifying key topics and themes in content."
+    return prompt, system_message
+
+def _parse_topics(response: str, num_topics: int) -> List[str]:
+    topics = []
+    for line in response.strip().split('\n'):
+        clean_line = re.sub(r'^\d+\.\s*|^-\s*|^•\s*', '', line).strip()
+        if clean_line:
+            topics.append(clean_line)
+            
+    return topics[:num_topics]
+
+def _company_request(company_name: str):
+    prompt = f"""
+    Research and provide comprehensive information about the company '{company_name}'.
+    
+    Include the following information:
+    1. Basic overview and history
+    2. Main products or services offered
+    3. Target market and customer base
+    4. Recent news or developments (within the last 1-2 years)
+    5. Competitive position in the industry
+    6. Any interesting facts or notable aspects of the company culture
+    
+    Structure this information in a way that would be informative and engaging
+    for a podcast audience who may not be familiar with the company.
+    
+    If you can find the company's official website, include that as well.
+    """
+    
+    system_message = "You are an expert business researcher with extensive knowledge of companies across industries. Provide accurate, well-structured information suitable for a podcast script."
+    return prompt, system_message
+
+def _website_text(website_data: Dict) -> str:
+    if not website_data["main_content"].strip():
+        raise ValueError("Could not extract meaningful content from the provided URL.")
+        
+    return f"Title: {website_data['title']}\n\nDescription: {website_data['description']}\n\n{website_data['main_content']}"
+
+def _website_history(website_data: Dict, content_text: str, topics: List[str]) -> list:
+    topic_str = ", ".join(topics)
+    context_message = f"WEBSITE: {website_data['title']}\n\nCONTENT SUMMARY:\n{content_text}\n\nMAIN TOPICS: {topic_str}"
+    return [{'role': 'user', 'parts': [{'text': context_message}]}]
+
+def _source_path(content_source: str) -> str:
+    if not os.path.isfile(content_source):
+        raise FileNotFoundError(f"The file at path '{content_source}' does not exist.")
+    return content_source
+
+def _file_history(files) -> list:
+    return [{'role': 'user', 'parts': [{'file_data': {'mime_type': files.mime_type, 'file_uri': files.uri}}]}]
+
+def _dialogue_items(dialogue: str) -> list:
+    # Parse dialogue into speaker parts
+    dialogue_items = parse_dialogue(dialogue)
+    
+    if not dialogue_items:
+        raise ValueError("No valid dialogue items were parsed from the generated content")
+    
+    logger.info(f"Parsed {len(dialogue_items)} dialogue items")
+    return dialogue_items
+
+def summarize_content(content: str, target_length: str = "medium") -> str:
+    """Use Gemini to summarize long content to a specified target length."""
+    token_count = estimate_gemini_tokens(content)
+    
+    if not exceeds_gemini_budget(content, MIN_SUMMARY_TOKENS):
+        logger.info(f"Content already short ({token_count} tokens), skipping summarization")
+        return content
+    
+    prompt, system_message = _summarize_request(content, target_length)
+    chat_history = []
+    
+    logger.info(f"Summarizing {token_count} tokens of content to '{target_length}' length")
+    summary = call_gemini(prompt, system_message, chat_history)
+    
+    new_token_count = estimate_gemini_tokens(summary)
+    logger.info(f"Summarization complete: {token_count} → {new_token_count} tokens")
+    
+    return summary
+
+def extract_topics(content: str, num_topics: int = 5) -> List[str]:
+    """Extract main topics from content."""
+    prompt, system_message = _topics_request(content, num_topics)
+    chat_history = []
+    
+    response = call_gemini(prompt, system_message, chat_history)
+    return _parse_topics(response, num_topics)
+
+def get_company_info(company_name: str) -> str:
+    """Get comprehensive information about a company using Gemini."""
+    prompt, system_message = _company_request(company_name)
+    chat_history = []
+    
+    logger.info(f"Researching company: {company_name}")
+    company_info = call_gemini(prompt, system_message, chat_history)
+    
+    return company_info
+
+def build_chat_history(content_source: str, source_type: str, max_tokens: Optional[int] = None) -> list:
+    """
+    Run the source-dependent stages and return the chat history for the dialogue call.
+    
+    max_tokens overrides the Gemini token budget for website and text sources (including
+    text-heavy PDFs read locally); content over budget is truncated (websites) or summarized.
+    """
+    if source_type == "pdf":
+        pdf_path = _source_path(content_source)
+        pdf_text = read_pdf_text(pdf_path)
+        if pdf_text is None:
+            files = upload_to_gemini(pdf_path, "application/pdf")
+            return _file_history(files)
+        # Text-heavy PDFs skip the upload and take the budgeted text path below
+        content_source, source_type = pdf_text, "text"
+        
+    if source_type in ("url", "site"):
+        website_budget = max_tokens or WEBSITE_TOKEN_BUDGET
+        logger.info(f"Extracting content from URL: {content_source}")
+        if source_type == "site":
+            website_data = crawl_website(content_source, max_tokens=website_budget)
+        else:
+            website_data = extract_website_content(content_source, max_tokens=website_budget)
+        content_text = _website_text(website_data)
+        
+        if exceeds_gemini_budget(content_text, website_budget):
+            token_count = estimate_gemini_tokens(content_text)
+            logger.info(f"Website content is very long ({token_count} tokens), summarizing...")
+            content_text = summarize_content(content_text, target_length="long")
+            
+        topics = extract_topics(content_text)
+        return _website_history(website_data, content_text, topics)
+        
+    elif source_type == "company":
+        logger.info(f"Researching company: {content_source}")
+        company_info = get_company_info(content_source)
+        return [{'role': 'user', 'parts': [{'text': f"COMPANY INFORMATION:\n{company_info}"}]}]
+        
+    elif source_type in ("text", "document"):
+        if source_type == "document":
+            # TXT/DOCX are read locally and take the text path instead of a file upload
+            content_source = read_document_text(_source_path(content_source))
+        # Repeated headers, footers and boilerplate would only eat into the budget
+        content_source = dedupe_text(content_source)
+        text_content = content_source
+        
+        if exceeds_gemini_budget(content_source, max_tokens or TEXT_TOKEN_BUDGET):
+            token_count = estimate_gemini_tokens(content_source)
+            logger.info(f"Raw text is very long ({token_count} tokens), summarizing...")
+            text_content = summarize_content(content_source, target_length="long")
+            
+        return [{'role': 'user', 'parts': [{'text': text_content}]}]
+        
+    else:
+        raise ValueError(f"Unsupported content source type: {source_type}")
+
+def _history_cache_key(content_source: str, source_type: str, max_tokens: Optional[int]) -> Optional[str]:
+    try:
+        return history_key(content_source, source_type, max_tokens)
+    except OSError:
+        # Let the source stage report the unreadable file
+        return None
+
+def prepared_chat_history(content_source: str, source_type: str, max_tokens: Optional[int] = None) -> list:
+    """
+    build_chat_history through the prefetch cache.
+    
+    Reuses a history prefetched for the same source and budget (waiting for one that is
+    still being built elsewhere) and stores freshly built ones for the next caller.
+    """
+    key = _history_cache_key(content_source, source_type, max_tokens)
+    if key is None:
+        return build_chat_history(content_source, source_type, max_tokens)
+    
+    cache = get_history_cache()
+    while True:
+        chat_history = cache.wait(key)
+        if chat_history is not None:
+            logger.info(f"Using prefetched chat history for {source_type} source")
+            return chat_history
+        
+        with cache.building(key) as owner:
+            if owner:
+                chat_history = build_chat_history(content_source, source_type, max_tokens)
+                # Stored before the marker is removed, so waiters find it instead of rebuilding
+                cache.put(key, chat_history)
+                return chat_history
+        # Another caller claimed the build between our wait and claim; wait for it
+
+def generate_dialogue(prompt: str, system_message: str, chat_history: list) -> list:
+    """Generate the podcast dialogue with Gemini and parse it into DialogueItems."""
+    logger.info("Generating podcast dialogue with Gemini...")
+    dialogue = call_gemini(
+        prompt=f"{prompt}\n\n{DIALOGUE_FORMAT_NOTE}",
+        system_message=system_message,
+        history=chat_history,
+        response_schema=DIALOGUE_SCHEMA
+    )
+    return _dialogue_items(dialogue)
+
+def _episode_cache_key(prompt: str, system_message: str, content_source: str, source_type: str,
+                       max_tokens: Optional[int]) -> Optional[str]:
+    if not get_episode_cache().enabled:
+        return None
+    try:
+        return episode_key(prompt, system_message, content_source, source_type, max_tokens)
+    except OSError as e:
+        # The source stage will report the unreadable file properly
+        logger.warning(f"Could not fingerprint the source for the episode cache: {e}")
+        return None
+
+def _cached_episode(cache_key: str, source_type: str, job_id: Optional[str], tracker: ProgressTracker) -> Optional[dict]:
+    max_age = LIVE_SOURCE_MAX_AGE if source_type in ("url", "site", "company") else None
+    workspace = JobWorkspace(job_id)
+    cached = get_episode_cache().restore(cache_key, workspace.work_dir, max_age)
+    if cached is None:
+        workspace.discard()
+        return None
+    
+    logger.info(f"Reusing cached episode {cache_key}")
+    result = dict(workspace.commit(cached), cached=True)
+    for stage in STAGE_WEIGHTS:
+        tracker.emit(stage, "finished")
+    return result
+
+def _finish_episode(workspace: JobWorkspace, audio_result: dict, tracker: ProgressTracker,
+                    cache_key: Optional[str]) -> dict:
+    result = workspace.commit(audio_result)
+    tracker.emit("save", "finished", bytes_written=os.path.getsize(result["audio_path"]))
+    # Episodes with failed lines are worth retrying, not replaying
+    if cache_key and result["processed_items"] == result["total_items"]:
+        get_episode_cache().put(cache_key, result)
+    return dict(result, cached=False)
+
+def generate_podcast(prompt: str, system_message: str, content_source: str = "", source_type: str = "pdf",
+                     max_tokens: Optional[int] = None, job_id: Optional[str] = None,
+                     progress: Optional[ProgressCallback] = None, regenerate: bool = False) -> dict:
+    """
+    Generate a podcast from various content sources.
+    
+    Output goes to a private workspace for job_id (a fresh id when not given) that is
+    published atomically once the audio is complete; the returned paths point into it.
+    A finished episode with the same source content, prompts and voice settings is
+    reused from the episode cache (result["cached"] is True) unless regenerate is set.
+    progress, if given, receives a snapshot dict (see services.progress.ProgressTracker)
+    as each stage starts and finishes and as each dialogue line is synthesized.
+    """
+    logger.info(f"Generating podcast from {source_type} source")
+    tracker = ProgressTracker(progress)
+    
+    try:
+        cache_key = _episode_cache_key(prompt, system_message, content_source, source_type, max_tokens)
+        if cache_key and not regenerate:
+            cached = _cached_episode(cache_key, source_type, job_id, tracker)
+            if cached is not None:
+                return cached
+        
+        tracker.emit("source", "started")
+        chat_history = prepared_chat_history(content_source, source_type, max_tokens)
+        tracker.emit("source", "finished")
+        
+        tracker.emit("dialogue", "started")
+        dialogue_items = generate_dialogue(prompt, system_message, chat_history)
+        tracker.emit("dialogue", "finished", done=len(dialogue_items), total=len(dialogue_items))
+        
+        # Generate audio
+        logger.info("Generating audio with ElevenLabs...")
+        tracker.emit("audio", "started", done=0, total=len(dialogue_items))
+        with JobWorkspace(job_id) as workspace:
+            audio_result = generate_audio(
+                dialogue_items, output_filename="podcast.mp3", output_dir=workspace.work_dir,
+                on_line=lambda done, total: tracker.emit("audio", "update", done=done, total=total)
+            )
+            tracker.emit("audio", "finished", done=audio_result["processed_items"], total=len(dialogue_items))
+            return _finish_episode(workspace, audio_result, tracker, cache_key)
+        
+    except Exception as e:
+        logger.error(f"Error generating podcast: {e}", exc_info=True)
+        raise
+
+# Asyncio variants: same stages and prompts, but Gemini and ElevenLabs calls await
+# instead of holding a thread, so one event loop can drive many episodes at once.
+# Local or SDK-only work (PDF upload, page download, budget checks that may call
+# countTokens) runs in the default executor.
+
+async def summarize_content_async(content: str, target_length: str = "medium") -> str:
+    """Asyncio counterpart of summarize_content."""
+    token_count = estimate_gemini_tokens(content)
+    
+    if not await asyncio.to_thread(exceeds_gemini_budget, content, MIN_SUMMARY_TOKENS):
+        logger.info(f"Content already short ({token_count} tokens), skipping summarization")
+        return content
+    
+    prompt, system_message = _summarize_request(content, target_length)
+    
+    logger.info(f"Summarizing {token_count} tokens of content to '{target_length}' length")
+    summary = await call_gemini_async(prompt, system_message, [])
+    
+    new_token_count = estimate_gemini_tokens(summary)
+    logger.info(f"Summarization complete: {token_count} → {new_token_count} tokens")
+    
+    return summary
+
+async def extract_topics_async(content: str, num_topics: int = 5) -> List[str]:
+    """Asyncio counterpart of extract_topics."""
+    prompt, system_message = _topics_request(content, num_topics)
+    response = await call_gemini_async(prompt, system_message, [])
+    return _parse_topics(response, num_topics)
+
+async def get_company_info_async(company_name: str) -> str:
+    """Asyncio counterpart of get_company_info."""
+    prompt, system_message = _company_request(company_name)
+    logger.info(f"Researching company: {company_name}")
+    return await call_gemini_async(prompt, system_message, [])
+
+async def build_chat_history_async(content_source: str, source_type: str, max_tokens: Optional[int] = None) -> list:
+    """Asyncio counterpart of build_chat_history."""
+    if source_type == "pdf":
+        pdf_path = _source_path(content_source)
+        pdf_text = await asyncio.to_thread(read_pdf_text, pdf_path)
+        if pdf_text is None:
+            files = await asyncio.to_thread(upload_to_gemini, pdf_path, "application/pdf")
+            return _file_history(files)
+        content_source, source_type = pdf_text, "text"
+        
+    if source_type in ("url", "site"):
+        website_budget = max_tokens or WEBSITE_TOKEN_BUDGET
+        logger.info(f"Extracting content from URL: {content_source}")
+        extract = crawl_website if source_type == "site" else extract_website_content
+        website_data = await asyncio.to_thread(extract, content_source, max_tokens=website_budget)
+        content_text = _website_text(website_data)
+        
+        if await asyncio.to_thread(exceeds_gemini_budget, content_text, website_budget):
+            token_count = estimate_gemini_tokens(content_text)
+            logger.info(f"Website content is very long ({token_count} tokens), summarizing...")
+            content_text = await summarize_content_async(content_text, target_length="long")
+            
+        topics = await extract_topics_async(content_text)
+        return _website_history(website_data, content_text, topics)
+        
+    elif source_type == "company":
+        company_info = await get_company_info_async(content_source)
+        return [{'role': 'user', 'parts': [{'text': f"COMPANY INFORMATION:\n{company_info}"}]}]
+        
+    elif source_type in ("text", "document"):
+        if source_type == "document":
+            content_source = await asyncio.to_thread(read_document_text, _source_path(content_source))
+        content_source = await asyncio.to_thread(dedupe_text, content_source)
+        text_content = content_source
+        
+        if await asyncio.to_thread(exceeds_gemini_budget, content_source, max_tokens or TEXT_TOKEN_BUDGET):
+            token_count = estimate_gemini_tokens(content_source)
+            logger.info(f"Raw text is very long ({token_count} tokens), summarizing...")
+            text_content = await summarize_content_async(content_source, target_length="long")
+            
+        return [{'role': 'user', 'parts': [{'text': text_content}]}]
+        
+    else:
+        raise ValueError(f"Unsupported content source type: {source_type}")
+
+async def generate_dialogue_async(prompt: str, system_message: str, chat_history: list) -> list:
+    """Asyncio counterpart of generate_dialogue."""
+    logger.info("Generating podcast dialogue with Gemini...")
+    dialogue = await call_gemini_async(
+        prompt=f"{prompt}\n\n{DIALOGUE_FORMAT_NOTE}",
+        system_message=system_message,
+        history=chat_history,
+        response_schema=DIALOGUE_SCHEMA
+    )
+    return _dialogue_items(dialogue)
+
+async def generate_podcast_async(prompt: str, system_message: str, content_source: str = "", source_type: str = "pdf",
+                                 max_tokens: Optional[int] = None, job_id: Optional[str] = None,
+                                 progress: Optional[ProgressCallback] = None, regenerate: bool = False) -> dict:
+    """Asyncio counterpart of generate_podcast."""
+    logger.info(f"Generating podcast from {source_type} source")
+    tracker = ProgressTracker(progress)
+    
+    try:
+        cache_key = _episode_cache_key(prompt, system_message, content_source, source_type, max_tokens)
+        if cache_key and not regenerate:
+            cached = _cached_episode(cache_key, source_type, job_id, tracker)
+            if cached is not None:
+                return cached
+        
+        tracker.emit("source", "started")
+        # Only finished prefetches are reused here; waiting on a build would block the loop
+        prefetch_key = _history_cache_key(content_source, source_type, max_tokens)
+        chat_history = get_history_cache().get(prefetch_key) if prefetch_key else None
+        if chat_history is None:
+            chat_history = await build_chat_history_async(content_source, source_type, max_tokens)
+            if prefetch_key:
+                get_history_cache().put(prefetch_key, chat_history)
+        tracker.emit("source", "finished")
+        
+        tracker.emit("dialogue", "started")
+        dialogue_items = await generate_dialogue_async(prompt, system_message, chat_history)
+        tracker.emit("dialogue", "finished", done=len(dialogue_items), total=len(dialogue_items))
+        
+        # Generate audio
+        logger.info("Generating audio with ElevenLabs...")
+        tracker.emit("audio", "started", done=0, total=len(dialogue_items))
+        with JobWorkspace(job_id) as workspace:
+            audio_result = await generate_audio_async(
+                dialogue_items, output_filename="podcast.mp3", output_dir=workspace.work_dir,
+                on_line=lambda done, total: tracker.emit("audio", "update", done=done, total=total)
+            )
+            tracker.emit("audio", "finished", done=audio_result["processed_items"], total=len(dialogue_items))
+            return _finish_episode(workspace, audio_result, tracker, cache_key)
+        
+    except Exception as e:
+        logger.error(f"Error generating podcast: {e}", exc_info=True)
+        raise
@@ -0,0 +1,242 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+import functools
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Optional
+
+from services.episode_cache import source_fingerprint
+from services.http_cache import cache_root
+
+logger = logging.getLogger("podgem")
+
+# Prefetched histories can reference Gemini file uploads (kept 48h) and web pages that
+# change, so they are only reused for a while
+HISTORY_MAX_AGE = 3600
+
+# A marker not renewed for this long belongs to a dead build and is no longer waited for
+BUILD_TIMEOUT = 180
+# Builders renew their marker this often, so long builds (big summaries, crawls) keep it
+MARKER_RENEW_INTERVAL = BUILD_TIMEOUT / 3
+
+# Source inputs must stay unchanged this long before a prefetch starts (paid) Gemini work
+PREFETCH_DEBOUNCE = 5.0
+
+def history_key(content_source: str, source_type: str, max_tokens: Optional[int] = None) -> str:
+    """
+    Key for the chat history built from a source under a token budget.
+
+    Raises:
+        OSError: If a file source can't be read
+    """
+    # Company research doesn't depend on the budget
+    budget = None if source_type == "company" else max_tokens
+    material = [source_fingerprint(content_source, source_type), source_type, budget]
+    return hashlib.sha256(json.dumps(material).encode("utf-8")).hexdigest()
+
+class ChatHistoryCache:
+    """
+    On-disk store of chat histories from the source stages (build_chat_history).
+
+    Files are shared between the UI process that prefetches and the job workers that
+    generate, so a worker can pick up a history prefetched while the user was still
+    editing prompts. A ".building" marker tells other processes a history is on its way.
+    """
+
+    def __init__(self, directory: str, max_age: float = HISTORY_MAX_AGE):
+        self.directory = directory
+        self.max_age = max_age
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _marker(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.building")
+
+    def get(self, key: str) -> Optional[list]:
+        """Return a fresh history for the key, or None."""
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.max_age:
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def is_building(self, key: str) -> bool:
+        try:
+            return time.time() - os.path.getmtime(self._marker(key)) < BUILD_TIMEOUT
+        except OSError:
+            return False
+
+    def wait(self, key: str, poll_interval: float = 0.5) -> Optional[list]:
+        """Return the history for the key, waiting while another process is still building it."""
+        history = self.get(key)
+        while history is None and self.is_building(key):
+            time.sleep(poll_interval)
+            history = self.get(key)
+        return history
+
+    def _claim(self, key: str) -> bool:
+        marker = self._marker(key)
+        for _ in range(2):
+            try:
+                # O_EXCL makes the claim atomic: exactly one process creates the marker
+                os.close(os.open(marker, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return True
+            except FileExistsError:
+                if self.is_building(key):
+                    return False
+                # Left behind by a build that died; take it over
+                try:
+                    os.remove(marker)
+                except OSError:
+                    pass
+            except OSError as e:
+                logger.warning(f"Could not mark history {key} as building: {e}")
+                return True
+        return False
+
+    @contextmanager
+    def building(self, key: str):
+        """
+        Claim the build of a history for the duration of the block.
+
+        Yields True to the one caller that holds the marker and should build the history
+        (and put it before leaving the block), False when another caller got there first.
+        """
+        owner = self._claim(key)
+        stop = threading.Event()
+        if owner:
+            threading.Thread(target=self._renew, args=(key, stop), daemon=True).start()
+        try:
+            yield owner
+        finally:
+            stop.set()
+            if owner:
+                try:
+                    os.remove(self._marker(key))
+                except OSError:
+                    pass
+
+    def _renew(self, key: str, stop: threading.Event):
+        # Keeps the marker's mtime fresh so is_building holds for however long the build takes
+        while not stop.wait(MARKER_RENEW_INTERVAL):
+            try:
+                os.utime(self._marker(key))
+            except OSError:
+                pass
+
+    def put(self, key: str, history: list):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(history, f)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError) as e:
+            logger.warning(f"Could not store chat history {key}: {e}")
+        self.prune()
+
+    def prune(self):
+        """Drop expired histories and abandoned markers."""
+        now = time.time()
+        for entry in os.scandir(self.directory):
+            try:
+                age = now - entry.stat().st_mtime
+                if (entry.name.endswith((".json", ".tmp")) and age > self.max_age) or \
+                        (entry.name.endswith(".building") and age > BUILD_TIMEOUT):
+                    os.remove(entry.path)
+            except OSError:
+                continue
+
+@functools.lru_cache(maxsize=None)
+def get_history_cache() -> ChatHistoryCache:
+    """Process-wide chat history cache under <cache root>/histories."""
+    return ChatHistoryCache(os.path.join(cache_root(), "histories"))
+
+@functools.lru_cache(maxsize=None)
+def get_prefetch_executor() -> ThreadPoolExecutor:
+    """Small pool for prefetching; the generation itself runs in the job workers."""
+    from services.fakes import fake_backends_requested, use_fake_backends
+
+    # Prefetch must hit the same backends the workers will use
+    if fake_backends_requested():
+        use_fake_backends()
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="podgem-prefetch")
+
+def _prefetch(content_source: str, source_type: str, max_tokens: Optional[int]):
+    from services.pipeline import prepared_chat_history
+
+    started = time.monotonic()
+    prepared_chat_history(content_source, source_type, max_tokens)
+    logger.info(f"Prefetched {source_type} source in {time.monotonic() - started:.1f}s")
+
+class SessionPrefetcher:
+    """
+    Prefetches the chat history for one UI session's current source in the background.
+
+    Every change of source or budget replaces the previous request, and a request only
+    starts once it has been left alone for PREFETCH_DEBOUNCE seconds, so typing, URL edits
+    and slider moves don't each start Gemini work. At most one prefetch per session runs
+    at a time; a request made meanwhile starts when it ends (a run cannot be interrupted
+    once its Gemini calls are under way). Failures are logged; generation simply builds
+    the history itself when no prefetched one is available.
+    """
+
+    def __init__(self, debounce: float = PREFETCH_DEBOUNCE):
+        self.debounce = debounce
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._pending: Optional[tuple] = None
+        self._running: Optional[Future] = None
+
+    def request(self, content_source: str, source_type: str, max_tokens: Optional[int] = None):
+        """Make this the source to prefetch once it has stayed unchanged for the debounce delay."""
+        try:
+            history_key(content_source, source_type, max_tokens)
+        except OSError as e:
+            # Generation will report the unreadable source properly
+            logger.warning(f"Not prefetching unreadable source: {e}")
+            self.cancel()
+            return
+
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._pending = (content_source, source_type, max_tokens)
+            self._timer = threading.Timer(self.debounce, self._start)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def cancel(self):
+        """Drop the request that has not started yet (Generate builds the history itself)."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer, self._pending = None, None
+
+    def _start(self):
+        with self._lock:
+            self._timer = None
+            # A running prefetch starts the pending request itself when it ends
+            if self._running is not None or self._pending is None:
+                return
+            request, self._pending = self._pending, None
+            running = self._running = get_prefetch_executor().submit(_prefetch, *request)
+        running.add_done_callback(self._finished)
+
+    def _finished(self, done: Future):
+        if done.exception() is not None:
+            logger.warning(f"Prefetching source failed: {done.exception()}")
+        with self._lock:
+            self._running = None
+            start_next = self._pending is not None and self._timer is None
+        if start_next:
+            self._start()
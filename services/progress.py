@@ -0,0 +1,73 @@
+import time
+import logging
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger("podgem")
+
+# Rough share of an episode's wall time per stage, used to turn stage events into an
+# overall fraction. Audio dominates: one TTS request per dialogue line.
+STAGE_WEIGHTS = {"source": 0.2, "dialogue": 0.2, "audio": 0.55, "save": 0.05}
+
+STAGE_LABELS = {
+    "source": "Reading the source",
+    "dialogue": "Writing the dialogue",
+    "audio": "Synthesizing audio",
+    "save": "Saving the episode",
+}
+
+ProgressCallback = Callable[[Dict], None]
+
+class ProgressTracker:
+    """
+    Turn pipeline stage events into progress snapshots for a callback.
+
+    Each snapshot is a JSON-serializable dict with the event (stage, status, done, total,
+    bytes) plus the overall fraction, elapsed time, an ETA extrapolated from the time
+    spent so far, and a display message. Callback errors are logged, never raised into
+    the pipeline.
+    """
+
+    def __init__(self, callback: Optional[ProgressCallback] = None):
+        self.callback = callback
+        self.started_at = time.monotonic()
+        self._finished_weight = 0.0
+        self._stage_fraction = 0.0
+        self._stage = None
+
+    def fraction(self) -> float:
+        current = STAGE_WEIGHTS.get(self._stage, 0.0) * self._stage_fraction
+        return min(1.0, self._finished_weight + current)
+
+    def emit(self, stage: str, status: str, done: Optional[int] = None, total: Optional[int] = None,
+             bytes_written: Optional[int] = None):
+        """Record a stage event ("started", "update" or "finished") and notify the callback."""
+        if status == "finished":
+            self._finished_weight += STAGE_WEIGHTS.get(stage, 0.0)
+            self._stage, self._stage_fraction = None, 0.0
+        else:
+            self._stage = stage
+            self._stage_fraction = done / total if done is not None and total else 0.0
+
+        if self.callback is None:
+            return
+
+        elapsed = time.monotonic() - self.started_at
+        fraction = self.fraction()
+        message = STAGE_LABELS.get(stage, stage)
+        if done is not None and total:
+            message += f" ({done}/{total})"
+        snapshot = {
+            "stage": stage,
+            "status": status,
+            "done": done,
+            "total": total,
+            "bytes": bytes_written,
+            "fraction": round(fraction, 4),
+            "elapsed_seconds": round(elapsed, 1),
+            "eta_seconds": round(elapsed / fraction * (1 - fraction), 1) if fraction >= 0.05 else None,
+            "message": message,
+        }
+        try:
+            self.callback(snapshot)
+        except Exception as e:
+            logger.warning(f"Progress callback failed: {e}")
@@ -0,0 +1,77 @@
+import json
+import hashlib
+import logging
+import threading
+import functools
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger("podgem")
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+class SingleFlight:
+    """
+    Collapse concurrent identical calls into one.
+
+    The first caller for a key runs the function; callers arriving with the same key
+    while it is in flight wait for it and get the same result (or the same exception).
+    Nothing is remembered once the call finishes, so this only covers bursts; caching
+    finished results is left to the callers' own caches.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+
+    def do(self, key: str, fn: Callable, *args, **kwargs) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.followers += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            if call.followers:
+                logger.info(f"Shared one in-flight call with {call.followers} identical request(s)")
+            call.done.set()
+
+_group = SingleFlight()
+
+def call_key(name: str, args: tuple, kwargs: dict) -> str:
+    """Stable key for a call from the function name and its arguments."""
+    material = json.dumps([name, args, kwargs], sort_keys=True, default=repr)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+def single_flight(func: Callable) -> Callable:
+    """
+    Decorator: concurrent calls with equal arguments share one execution.
+
+    Every caller receives the same result object, so results must be treated as
+    read-only. Coalescing is per process; job workers in other processes are
+    deduplicated by the job queue instead.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return _group.do(call_key(func.__qualname__, args, kwargs), func, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,292 @@
+import os
+import json
+import hashlib
+import logging
+import functools
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+import tiktoken
+
+from services.http_cache import cache_root
+
+logger = logging.getLogger("podgem")
+
+_encodings = {}
+_encodings_lock = threading.Lock()
+
+_count_memo = OrderedDict()
+_count_memo_lock = threading.Lock()
+COUNT_MEMO_SIZE = 4096
+
+def get_encoding(model: str = "gpt-3.5-turbo") -> Optional["tiktoken.Encoding"]:
+    """
+    Process-wide cached tokenizer for a model.
+    
+    Failures are cached too (as None), so a missing encoding file is not re-downloaded
+    on every count.
+    """
+    with _encodings_lock:
+        if model not in _encodings:
+            try:
+                _encodings[model] = tiktoken.encoding_for_model(model)
+            except Exception as e:
+                logger.warning(f"Could not load tokenizer for {model}: {e}. Using character-based estimates.")
+                _encodings[model] = None
+        return _encodings[model]
+
+def _memo_key(text: str, model: str):
+    return model, hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+def _memo_get(key) -> Optional[int]:
+    with _count_memo_lock:
+        count = _count_memo.get(key)
+        if count is not None:
+            _count_memo.move_to_end(key)
+        return count
+
+def _memo_put(key, count: int):
+    with _count_memo_lock:
+        _count_memo[key] = count
+        _count_memo.move_to_end(key)
+        while len(_count_memo) > COUNT_MEMO_SIZE:
+            _count_memo.popitem(last=False)
+
+# Token counter for rate limiting
+def count_tokens(text: str, model: str = "gpt-3.5-turbo") -> int:
+    """Count the number of tokens in a text string (memoized by content hash)."""
+    encoding = get_encoding(model)
+    if encoding is None:
+        # Fallback to character-based estimate (roughly 4 chars per token)
+        return len(text) // 4
+    
+    key = _memo_key(text, model)
+    count = _memo_get(key)
+    if count is None:
+        count = len(encoding.encode_ordinary(text))
+        _memo_put(key, count)
+    return count
+
+def count_tokens_batch(texts: List[str], model: str = "gpt-3.5-turbo") -> List[int]:
+    """Count tokens for many texts at once, encoding the uncached ones in parallel."""
+    encoding = get_encoding(model)
+    if encoding is None:
+        return [len(text) // 4 for text in texts]
+    
+    keys = [_memo_key(text, model) for text in texts]
+    counts = [_memo_get(key) for key in keys]
+    missing = [i for i, count in enumerate(counts) if count is None]
+    
+    if missing:
+        encoded = encoding.encode_ordinary_batch([texts[i] for i in missing])
+        for i, tokens in zip(missing, encoded):
+            counts[i] = len(tokens)
+            _memo_put(keys[i], counts[i])
+    return counts
+
+def _clean_cut(prefix: str) -> str:
+    """Trim a truncated prefix back to a paragraph (or failing that, sentence) boundary."""
+    prefix = prefix.rstrip("�")  # partial multi-byte character from a mid-token cut
+    for boundary in ("\n\n", "\n", ". "):
+        position = prefix.rfind(boundary)
+        # Only back off if it keeps most of the budget
+        if position >= len(prefix) * 0.5:
+            return prefix[:position + (1 if boundary == ". " else 0)].rstrip()
+    return prefix.rstrip()
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = "gpt-3.5-turbo") -> str:
+    """
+    Truncate text to at most max_tokens tokens, preferring to end on a paragraph.
+    
+    The cut is made on encoded token boundaries and re-checked, so the result is within
+    budget in one pass regardless of language or content type.
+    """
+    if max_tokens <= 0:
+        return ""
+    
+    encoding = get_encoding(model)
+    if encoding is None:
+        if len(text) <= max_tokens * 4:
+            return text
+        return _clean_cut(text[:max_tokens * 4])
+    
+    tokens = encoding.encode_ordinary(text)
+    if len(tokens) <= max_tokens:
+        return text
+    
+    limit = max_tokens
+    while limit > 0:
+        truncated = _clean_cut(encoding.decode(tokens[:limit]))
+        overflow = len(encoding.encode_ordinary(truncated)) - max_tokens
+        if overflow <= 0:
+            return truncated
+        # Re-encoding a decoded prefix can merge differently; shave off the difference
+        limit -= overflow
+    return ""
+
+# Gemini tokens per gpt-3.5-turbo token, by script. These are only used until a script
+# has been calibrated: the first budget checks count through the API (see
+# GeminiTokenEstimator.exceeds) and the measured ratios persist from then on.
+DEFAULT_GEMINI_RATIOS = {"latin": 1.0, "other": 0.8}
+
+class GeminiTokenEstimator:
+    """
+    Estimate Gemini token counts from the local tiktoken count.
+    
+    Budgets are in Gemini tokens, but counting those exactly takes an API call, so the
+    local count is scaled by a per-script ratio. Until a script has min_calibration_tokens
+    of evidence, budget checks on its texts are counted through the API to seed the ratio
+    (unless `seed` is off, or the API has failed once in this process). With exact
+    counting enabled, texts whose estimate lands within `margin` of a budget are also
+    counted exactly. Exact counts are memoized and folded back into the ratios, which
+    persist across runs.
+    """
+
+    def __init__(self, path: Optional[str] = None, exact: bool = False, margin: float = 0.15,
+                 min_calibration_tokens: int = 2000, max_calibration_tokens: int = 200000, seed: bool = True):
+        self.path = path
+        self.exact = exact
+        self.margin = margin
+        self.seed = seed
+        self.min_calibration_tokens = min_calibration_tokens
+        self.max_calibration_tokens = max_calibration_tokens
+        self._lock = threading.Lock()
+        self._api_failed = False
+        self._totals = self._load()
+
+    def load(self, path: Optional[str]):
+        """Switch to another calibration file (or none) and load its ratios."""
+        with self._lock:
+            self.path = path
+            self._totals = self._load()
+
+    def _load(self) -> dict:
+        totals = {bucket: {"gemini": 0, "reference": 0} for bucket in DEFAULT_GEMINI_RATIOS}
+        if not self.path:
+            return totals
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+            for bucket in totals:
+                if bucket in stored:
+                    totals[bucket] = {"gemini": int(stored[bucket]["gemini"]), "reference": int(stored[bucket]["reference"])}
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        return totals
+
+    def _save(self):
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._totals, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not save token calibration to {self.path}: {e}")
+
+    @staticmethod
+    def _bucket(text: str) -> str:
+        # Extra UTF-8 bytes per character is a cheap proxy for how much non-Latin script there is
+        if not text or text.isascii():
+            return "latin"
+        extra_bytes = len(text.encode("utf-8", "surrogatepass")) - len(text)
+        return "latin" if extra_bytes <= len(text) * 0.1 else "other"
+
+    def calibrated(self, text: str = "") -> bool:
+        """Whether the ratio for the script of a text comes from measurements."""
+        with self._lock:
+            return self._totals[self._bucket(text)]["reference"] >= self.min_calibration_tokens
+
+    def ratio(self, text: str = "") -> float:
+        """Current Gemini-per-reference-token ratio for the script of a text."""
+        bucket = self._bucket(text)
+        with self._lock:
+            totals = self._totals[bucket]
+            if totals["reference"] >= self.min_calibration_tokens:
+                return totals["gemini"] / totals["reference"]
+        return DEFAULT_GEMINI_RATIOS[bucket]
+
+    def calibrate(self, text: str, gemini_tokens: int):
+        """Fold an exact Gemini count for a text into the ratio for its script."""
+        reference_tokens = count_tokens(text)
+        if reference_tokens <= 0:
+            return
+        bucket = self._bucket(text)
+        with self._lock:
+            totals = self._totals[bucket]
+            totals["gemini"] += gemini_tokens
+            totals["reference"] += reference_tokens
+            # Halve old evidence once there is plenty, so the ratio follows tokenizer changes
+            if totals["reference"] > self.max_calibration_tokens:
+                totals["gemini"] //= 2
+                totals["reference"] //= 2
+            self._save()
+
+    def exact_count(self, text: str) -> Optional[int]:
+        """Exact Gemini token count via the API (memoized), or None if it is unavailable."""
+        key = _memo_key(text, "gemini-exact")
+        count = _memo_get(key)
+        if count is not None:
+            return count
+        
+        from services.gemini import GeminiQuotaError, count_gemini_tokens
+        try:
+            count = count_gemini_tokens(text)
+        except GeminiQuotaError as e:
+            # Temporary, and cheap to hit again: the pool and breaker fail fast locally
+            logger.info(f"Exact Gemini token count unavailable ({e}), using the estimate")
+            return None
+        except Exception as e:
+            logger.warning(f"Exact Gemini token count failed ({e}), using the estimate")
+            self._api_failed = True
+            return None
+        _memo_put(key, count)
+        self.calibrate(text, count)
+        return count
+
+    def estimate(self, text: str) -> int:
+        """Estimated Gemini token count (exact if this text was already counted via the API)."""
+        count = _memo_get(_memo_key(text, "gemini-exact"))
+        if count is not None:
+            return count
+        return int(count_tokens(text) * self.ratio(text) + 0.5)
+
+    def exceeds(self, text: str, budget: int) -> bool:
+        """Whether a text is over a Gemini token budget, counting exactly when it is too close to call."""
+        estimate = self.estimate(text)
+        seeding = self.seed and not self._api_failed and not self.calibrated(text)
+        near_budget = self.exact and abs(estimate - budget) <= budget * self.margin
+        if seeding or near_budget:
+            count = self.exact_count(text)
+            if count is not None:
+                return count > budget
+        return estimate > budget
+
+    def reference_budget(self, budget: int, text: str = "") -> int:
+        """Translate a Gemini token budget into gpt-3.5-turbo tokens for truncation."""
+        return int(budget / self.ratio(text))
+
+@functools.lru_cache(maxsize=None)
+def get_gemini_estimator() -> GeminiTokenEstimator:
+    """
+    Process-wide Gemini token estimator.
+    
+    Environment:
+        GEMINI_EXACT_TOKEN_COUNT: 1 also counts near-budget texts through the API, 0 never
+            calls the API (not even to seed the ratios); unset only seeds the ratios
+    """
+    setting = os.getenv("GEMINI_EXACT_TOKEN_COUNT", "").strip().lower()
+    exact = setting in ("1", "true", "yes")
+    seed = setting not in ("0", "false", "no")
+    return GeminiTokenEstimator(os.path.join(cache_root(), "token_calibration.json"), exact=exact, seed=seed)
+
+def estimate_gemini_tokens(text: str) -> int:
+    """Estimated Gemini token count for a text."""
+    return get_gemini_estimator().estimate(text)
+
+def exceeds_gemini_budget(text: str, budget: int) -> bool:
+    """Whether a text is over a budget measured in Gemini tokens."""
+    return get_gemini_estimator().exceeds(text, budget)
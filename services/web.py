@@ -0,0 +1,248 @@
+import time
+import logging
+import requests
+import urllib3
+import functools
+import trafilatura
+from trafilatura.settings import use_config
+from trafilatura.utils import load_html
+from typing import Dict, Set
+from urllib.parse import urldefrag, urljoin
+
+from services.http_cache import HttpCache, get_http_cache
+from services.singleflight import single_flight
+from services.dedupe import dedupe_text
+from services.tokens import count_tokens, estimate_gemini_tokens, exceeds_gemini_budget, get_gemini_estimator, truncate_to_tokens
+
+logger = logging.getLogger("podgem")
+
+# Bump when extract_html_content changes so cached pages are re-extracted
+EXTRACTOR_VERSION = 2
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# Limits for a single page download
+MAX_PAGE_BYTES = 5 * 1024 * 1024
+FETCH_DEADLINE = 20.0
+READ_TIMEOUT = 15.0
+READ_CHUNK_BYTES = 8 * 1024
+PAGE_CONTENT_TYPES = {"text/html", "application/xhtml+xml", "text/plain"}
+MAX_LINKS = 200
+
+@functools.lru_cache(maxsize=None)
+def _trafilatura_config():
+    # trafilatura's extraction timeout relies on SIGALRM, which only works in the main
+    # thread; Streamlit scripts, crawl workers and asyncio.to_thread all run elsewhere
+    config = use_config()
+    config.set("DEFAULT", "EXTRACTION_TIMEOUT", "0")
+    return config
+
+def _node_text(node) -> str:
+    return " ".join(node.text_content().split())
+
+def extract_html_content(html: bytes, url: str = None) -> Dict[str, str]:
+    """
+    Extract title, description and main content from raw HTML.
+    
+    The page is parsed once into an lxml tree that serves the metadata lookups, the
+    paragraph fallback and trafilatura. trafilatura prunes the tree it is given, so it
+    runs last.
+    
+    Args:
+        html: Raw response body (bytes, so lxml/trafilatura handle the encoding)
+        url: Source URL, used by trafilatura for metadata heuristics
+        
+    Returns:
+        Dict with title, description, main_content and meta
+    """
+    result = {
+        "title": "",
+        "description": "",
+        "main_content": "",
+        "meta": {}
+    }
+    
+    tree = load_html(html)
+    if tree is None:
+        return result
+    
+    meta_desc = tree.xpath('//meta[@name="description"]/@content') or tree.xpath('//meta[@property="og:description"]/@content')
+    if meta_desc and meta_desc[0]:
+        result["description"] = meta_desc[0]
+    
+    title_tag = tree.find('.//title')
+    result["title"] = _node_text(title_tag) if title_tag is not None else ""
+    
+    paragraphs = [text for text in (_node_text(p) for p in tree.iter('p')) if len(text) > 50]
+    
+    # Outgoing links, for crawl mode
+    if url:
+        links = []
+        for href in tree.xpath('//a/@href'):
+            link = urldefrag(urljoin(url, href.strip()))[0]
+            if link.startswith(("http://", "https://")) and link not in links:
+                links.append(link)
+            if len(links) >= MAX_LINKS:
+                break
+        result["meta"]["links"] = links
+    
+    main_content = trafilatura.extract(
+        tree,
+        url=url,
+        include_comments=False,
+        include_tables=True,
+        include_images=False,
+        include_links=False,
+        output_format="text",
+        config=_trafilatura_config()
+    )
+    
+    result["main_content"] = main_content or '\n\n'.join(paragraphs)
+    return result
+
+def _set_read_timeout(response, seconds: float):
+    """Apply a read timeout to the response's socket for the next read."""
+    sock = getattr(getattr(response.raw, "connection", None), "sock", None)
+    if sock is not None:
+        sock.settimeout(max(0.01, seconds))
+
+def fetch_page(url: str, headers: Dict[str, str], max_bytes: int = MAX_PAGE_BYTES, deadline: float = FETCH_DEADLINE,
+               content_types: Set[str] = PAGE_CONTENT_TYPES):
+    """
+    Download a page as a stream with a size cap and an overall deadline.
+    
+    The status, Content-Type and Content-Length are checked before any of the body is
+    read, and the download aborts as soon as it exceeds max_bytes or the deadline, so a
+    huge page or a binary served as HTML cannot tie up the worker. The body is read in
+    small pieces with the socket timeout clamped to the time left, so a server that
+    trickles bytes cannot stretch a fetch past the deadline either.
+    
+    Args:
+        url: Page URL
+        headers: Request headers
+        max_bytes: Maximum body size to accept
+        deadline: Overall time budget in seconds, including connect and all reads
+        content_types: Acceptable Content-Type values
+        
+    Returns:
+        Tuple of (status_code, response_headers, body); body is empty for a 304
+        
+    Raises:
+        ValueError: If the content type is not acceptable or the page is too large
+        TimeoutError: If the download does not finish within the deadline
+        requests.exceptions.RequestException: For network or HTTP errors
+    """
+    started = time.monotonic()
+    
+    with requests.get(url, headers=headers, stream=True, timeout=(min(5.0, deadline), min(READ_TIMEOUT, deadline))) as response:
+        if response.status_code == 304:
+            return response.status_code, response.headers, b""
+        response.raise_for_status()
+        
+        content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+        if content_type and content_type not in content_types:
+            raise ValueError(f"Unsupported content type for {url}: {content_type}")
+        
+        content_length = response.headers.get("Content-Length")
+        if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+            raise ValueError(f"Page at {url} is too large ({int(content_length)} bytes, limit {max_bytes})")
+        
+        # read1 returns whatever has arrived instead of waiting for a full chunk
+        read = response.raw.read1 if hasattr(response.raw, "read1") else response.raw.read
+        chunks = []
+        received = 0
+        while True:
+            remaining = deadline - (time.monotonic() - started)
+            if remaining <= 0:
+                raise TimeoutError(f"Fetching {url} exceeded the {deadline:.0f}s deadline")
+            _set_read_timeout(response, min(READ_TIMEOUT, remaining))
+            try:
+                chunk = read(READ_CHUNK_BYTES, decode_content=True)
+            except urllib3.exceptions.ReadTimeoutError as e:
+                if time.monotonic() - started >= deadline:
+                    raise TimeoutError(f"Fetching {url} exceeded the {deadline:.0f}s deadline")
+                raise requests.exceptions.ReadTimeout(e)
+            if not chunk:
+                break
+            received += len(chunk)
+            if received > max_bytes:
+                raise ValueError(f"Page at {url} exceeds the {max_bytes} byte limit")
+            chunks.append(chunk)
+        
+        return response.status_code, response.headers, b"".join(chunks)
+
+def fetch_and_extract(url: str, use_cache: bool = True) -> Dict[str, str]:
+    """Fetch a page (revalidating any cached copy) and return its untruncated extraction."""
+    cache = get_http_cache() if use_cache else None
+    entry = cache.get(url) if cache else None
+    
+    headers = {'User-Agent': USER_AGENT}
+    headers.update(HttpCache.conditional_headers(entry))
+    status_code, response_headers, body = fetch_page(url, headers)
+    
+    if status_code == 304 and entry:
+        logger.info(f"{url} not modified, using cached extraction")
+        if entry.get("extractor_version") == EXTRACTOR_VERSION:
+            return entry["extracted"]
+        
+        # Extraction logic changed since the page was cached: re-extract the stored body
+        cached_body = cache.get_body(url)
+        if cached_body is not None:
+            result = extract_html_content(cached_body, url)
+            cache.update_extraction(entry, result, EXTRACTOR_VERSION)
+            return result
+        
+        # Body went missing; fetch it again without validators
+        status_code, response_headers, body = fetch_page(url, {'User-Agent': USER_AGENT})
+    
+    result = extract_html_content(body, url)
+    if cache:
+        cache.store(url, response_headers, body, result, EXTRACTOR_VERSION)
+    return result
+
+TRUNCATION_NOTE = "\n\n[Content truncated due to length limits]"
+
+def _truncate_main_content(result: Dict[str, str], max_tokens: int) -> str:
+    """Cut main_content so the full 'Title/Description/content' text fits max_tokens exactly."""
+    header = f"Title: {result['title']}\n\nDescription: {result['description']}\n\n"
+    budget = max_tokens - count_tokens(header) - count_tokens(TRUNCATION_NOTE)
+    
+    while budget > 0:
+        truncated_content = truncate_to_tokens(result["main_content"], budget) + TRUNCATION_NOTE
+        # Tokens can merge across the joins, so check the assembled text
+        overflow = count_tokens(header + truncated_content) - max_tokens
+        if overflow <= 0:
+            return truncated_content
+        budget -= overflow
+    # Not even the header fits
+    return ""
+
+# Advanced web content extraction
+@single_flight
+def extract_website_content(url: str, max_tokens: int = 6000, use_cache: bool = True) -> Dict[str, str]:
+    """
+    Extract content from a website, truncated to max_tokens Gemini tokens.
+    
+    Concurrent requests for the same page share one fetch; treat the result as read-only.
+    """
+    try:
+        logger.info(f"Fetching content from {url}")
+        result = fetch_and_extract(url, use_cache)
+        result["main_content"] = dedupe_text(result["main_content"])
+        
+        content_text = f"Title: {result['title']}\n\nDescription: {result['description']}\n\n{result['main_content']}"
+        token_count = estimate_gemini_tokens(content_text)
+        
+        logger.info(f"Extracted ~{token_count} tokens from {url}")
+        
+        if exceeds_gemini_budget(content_text, max_tokens):
+            logger.info(f"Content exceeds {max_tokens} tokens, truncating...")
+            # Truncation works on local tokens, so translate the budget for this script
+            reference_budget = get_gemini_estimator().reference_budget(max_tokens, content_text)
+            result["main_content"] = _truncate_main_content(result, reference_budget)
+        
+        return result
+        
+    except Exception as e:
+        logger.error(f"Failed to extract content from {url}: {e}", exc_info=True)
+        return {"title": "", "description": "", "main_content": "", "meta": {}}
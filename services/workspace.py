@@ -0,0 +1,155 @@
+import os
+import re
+import time
+import uuid
+import hashlib
+import shutil
+import logging
+from typing import Dict, Optional
+
+logger = logging.getLogger("podgem")
+
+def output_root() -> str:
+    """Root directory for job outputs and uploads (PODGEM_OUTPUT_DIR, default podgem_output)."""
+    return os.getenv("PODGEM_OUTPUT_DIR", "podgem_output")
+
+# Job outputs and uploads are removed once unused for this long (PODGEM_OUTPUT_MAX_AGE_HOURS)
+OUTPUT_MAX_AGE_HOURS = 72
+# Pruning walks the output tree, so each process does it at most this often
+PRUNE_INTERVAL = 3600
+
+_last_prune = 0.0
+
+def output_max_age() -> float:
+    """Seconds a job output or upload is kept after its last use; 0 keeps everything."""
+    try:
+        hours = float(os.getenv("PODGEM_OUTPUT_MAX_AGE_HOURS", str(OUTPUT_MAX_AGE_HOURS)))
+    except ValueError:
+        logger.warning(f"PODGEM_OUTPUT_MAX_AGE_HOURS is not a number, using {OUTPUT_MAX_AGE_HOURS}")
+        hours = OUTPUT_MAX_AGE_HOURS
+    return max(0.0, hours * 3600)
+
+def prune_outputs(max_age: Optional[float] = None, root: Optional[str] = None) -> int:
+    """
+    Remove job directories (finished or abandoned) and uploads unused for max_age seconds.
+
+    A directory's mtime is its last use: job directories are written while the job runs
+    and uploads are touched whenever they are saved again. Finished episodes worth keeping
+    live in the episode cache, which has its own quota.
+
+    Returns:
+        Number of directories removed
+    """
+    max_age = output_max_age() if max_age is None else max_age
+    if max_age <= 0:
+        return 0
+    root = root or output_root()
+    cutoff = time.time() - max_age
+    removed = 0
+    for parent in ("jobs", "uploads"):
+        directory = os.path.join(root, parent)
+        for entry in os.scandir(directory) if os.path.isdir(directory) else []:
+            try:
+                if entry.is_dir() and entry.stat().st_mtime < cutoff:
+                    shutil.rmtree(entry.path)
+                    removed += 1
+            except OSError as e:
+                logger.warning(f"Could not prune {entry.path}: {e}")
+    if removed:
+        logger.info(f"Pruned {removed} old job outputs and uploads from {root}")
+    return removed
+
+def maybe_prune_outputs(root: Optional[str] = None):
+    """prune_outputs, at most once per PRUNE_INTERVAL in this process."""
+    global _last_prune
+    now = time.monotonic()
+    if _last_prune and now - _last_prune < PRUNE_INTERVAL:
+        return
+    _last_prune = now
+    prune_outputs(root=root)
+
+def _safe_name(name: str) -> str:
+    name = re.sub(r"[^A-Za-z0-9._-]+", "_", os.path.basename(name)).strip("._")
+    return name or "upload"
+
+class JobWorkspace:
+    """
+    Private output directory for one podcast job.
+
+    Files are written into a hidden staging directory and the whole directory is
+    renamed into place by commit(), so concurrent jobs never share paths and readers
+    never see a half-written episode. A failed job's staging directory is discarded.
+    """
+
+    def __init__(self, job_id: Optional[str] = None, root: Optional[str] = None):
+        self.job_id = job_id or uuid.uuid4().hex
+        root = root or output_root()
+        self.final_dir = os.path.join(root, "jobs", self.job_id)
+        self.work_dir = os.path.join(root, "jobs", f".{self.job_id}.partial")
+        # Left over from an attempt whose worker died
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+        os.makedirs(self.work_dir)
+
+    def path(self, name: str) -> str:
+        """Staging path for a file while the job is running."""
+        return os.path.join(self.work_dir, name)
+
+    def final_path(self, name: str) -> str:
+        """Where a staged file ends up once the job is committed."""
+        return os.path.join(self.final_dir, name)
+
+    def commit(self, result: Dict) -> Dict:
+        """Publish the staged files and point the result's paths at their final location."""
+        if os.path.isdir(self.final_dir):
+            shutil.rmtree(self.final_dir)
+        os.rename(self.work_dir, self.final_dir)
+        logger.info(f"Job {self.job_id} output committed to {self.final_dir}")
+        maybe_prune_outputs(os.path.dirname(os.path.dirname(self.final_dir)))
+
+        committed = dict(result, job_id=self.job_id, output_dir=self.final_dir)
+        for key in ("audio_path", "transcript_path"):
+            if committed.get(key):
+                committed[key] = self.final_path(os.path.basename(committed[key]))
+        return committed
+
+    def discard(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.discard()
+        return False
+
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+def save_upload(filename: str, data, root: Optional[str] = None) -> str:
+    """
+    Store an uploaded file under a directory named by its content hash and return the path.
+
+    Identical content always maps to the same path, so a file that is already stored is
+    not written again (whichever session uploaded it). New files are written in chunks
+    to a temporary file and renamed into place.
+    """
+    view = memoryview(data).cast("B")
+    digest = hashlib.sha256(view).hexdigest()
+    directory = os.path.join(root or output_root(), "uploads", digest[:32])
+    path = os.path.join(directory, _safe_name(filename))
+    if os.path.isfile(path):
+        # Re-uploading counts as use, so prune_outputs keeps it
+        try:
+            os.utime(directory)
+        except OSError:
+            pass
+        return path
+
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp"
+    with open(tmp_path, "wb") as f:
+        for offset in range(0, len(view), UPLOAD_CHUNK_BYTES):
+            f.write(view[offset:offset + UPLOAD_CHUNK_BYTES])
+    os.replace(tmp_path, path)
+    logger.info(f"Stored upload {filename} ({len(view)} bytes) at {path}")
+    return path